@@ -1,15 +1,20 @@
 import cgi
+import collections
+import concurrent.futures
+import csv
 import distutils.util
 import io
 import json
 import numbers
 import pathlib
 import sys
+import tempfile
+import textwrap
 import time
 from argparse import FileType, Namespace
 from pathlib import Path
 from pprint import pformat
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 
 import tabulate
 
@@ -200,166 +205,204 @@ def delete_experiment(args: Namespace) -> None:
         print("Aborting experiment deletion.")
 
 
+# The number of experiments `det experiment describe` fetches from the master at once.
+DESCRIBE_CONCURRENCY = 8
+
+
+def _fetch_in_order(
+    fetch: Callable[[str], Any], keys: List[str], max_workers: int
+) -> Iterator[Any]:
+    """
+    Call `fetch` for every key from a pool of threads and yield the results in the order of
+    `keys`. At most `max_workers` results are fetched ahead of the one being consumed.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()  # type: Deque[concurrent.futures.Future]
+        for key in keys:
+            pending.append(executor.submit(fetch, key))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _DescribeTable:
+    """
+    A table of `det experiment describe`. When it is saved to a file, rows are written as they are
+    added rather than kept in memory.
+    """
+
+    def __init__(self, headers: List[str], outfile: Optional[Path]) -> None:
+        self.headers = headers
+        self.rows = []  # type: List[List[Any]]
+        self._file = outfile.open("w") if outfile else None
+        self._writer = csv.writer(self._file) if self._file else None
+        if self._writer:
+            self._writer.writerow(headers)
+
+    def add(self, row: List[Any]) -> None:
+        if self._writer:
+            self._writer.writerow(row)
+        else:
+            self.rows.append(row)
+
+    def close(self, title: str, as_csv: bool) -> None:
+        if self._file:
+            self._file.close()
+        else:
+            print(title)
+            render.tabulate_or_csv(self.headers, self.rows, as_csv)
+
+
+def _workload_rows(doc: Dict[str, Any]) -> Iterator[List[Any]]:
+    """
+    Yield the rows of the workloads table for an experiment, with the training metrics (or None if
+    the step has none) and the validation metrics as dicts, since the metric columns are only known
+    once every experiment has been seen.
+    """
+    for trial in doc["trials"]:
+        for step in trial["steps"]:
+            t_metrics = step["metrics"]["avg_metrics"] if step.get("metrics") else None
+
+            checkpoint = step.get("checkpoint") or {}
+            validation = step.get("validation")
+            if validation and validation["metrics"]:
+                v_metrics = validation["metrics"].get("validation_metrics", {})
+            else:
+                v_metrics = {}
+            validation = validation or {}
+
+            yield [
+                [
+                    step["trial_id"],
+                    step["num_batches"] + step["prior_batches_processed"],
+                    step["state"],
+                    render.format_time(step.get("start_time")),
+                    render.format_time(step.get("end_time")),
+                ],
+                t_metrics,
+                [
+                    checkpoint.get("state"),
+                    render.format_time(checkpoint.get("start_time")),
+                    render.format_time(checkpoint.get("end_time")),
+                    validation.get("state"),
+                    render.format_time(validation.get("start_time")),
+                    render.format_time(validation.get("end_time")),
+                ],
+                v_metrics,
+            ]
+
+
 @authentication_required
 def describe(args: Namespace) -> None:
-    docs = []
-    for experiment_id in args.experiment_ids.split(","):
-        if args.metrics:
-            r = api.get(args.master, "experiments/{}/metrics/summary".format(experiment_id))
-        else:
-            r = api.get(args.master, "experiments/{}".format(experiment_id))
-        docs.append(r.json())
+    path = "experiments/{}/metrics/summary" if args.metrics else "experiments/{}"
+
+    def fetch(experiment_id: str) -> Any:
+        return api.get(args.master, path.format(experiment_id)).json()
+
+    # Experiments are fetched concurrently but processed one at a time, in order, so that only a
+    # few experiment documents are in memory at once.
+    docs = _fetch_in_order(fetch, args.experiment_ids.split(","), DESCRIBE_CONCURRENCY)
 
     if args.json:
-        print(json.dumps(docs, indent=4))
+        # Equivalent to json.dumps(docs, indent=4), one experiment at a time.
+        print("[")
+        for i, doc in enumerate(docs):
+            if i > 0:
+                print(",")
+            print(textwrap.indent(json.dumps(doc, indent=4), " " * 4), end="")
+        print("\n]")
         return
 
-    # Display overall experiment information.
-    headers = [
-        "Experiment ID",
-        "State",
-        "Progress",
-        "Start Time",
-        "End Time",
-        "Description",
-        "Archived",
-        "Labels",
-    ]
-    values = [
-        [
-            doc["id"],
-            doc["state"],
-            render.format_percent(doc["progress"]),
-            render.format_time(doc.get("start_time")),
-            render.format_time(doc.get("end_time")),
-            doc["config"].get("description"),
-            doc["archived"],
-            ", ".join(sorted(doc["config"].get("labels", []))),
-        ]
-        for doc in docs
-    ]
-    if not args.outdir:
-        outfile = None
-        print("Experiment:")
-    else:
-        outfile = args.outdir.joinpath("experiments.csv")
-    render.tabulate_or_csv(headers, values, args.csv, outfile)
+    def outfile(name: str) -> Optional[Path]:
+        return args.outdir.joinpath(name) if args.outdir else None
 
-    # Display trial-related information.
-    headers = ["Trial ID", "Experiment ID", "State", "Start Time", "End Time", "H-Params"]
-    values = [
+    experiments = _DescribeTable(
         [
-            trial["id"],
-            doc["id"],
-            trial["state"],
-            render.format_time(trial.get("start_time")),
-            render.format_time(trial.get("end_time")),
-            json.dumps(trial["hparams"], indent=4),
-        ]
-        for doc in docs
-        for trial in doc["trials"]
-    ]
-    if not args.outdir:
-        outfile = None
-        print("\nTrials:")
-    else:
-        outfile = args.outdir.joinpath("trials.csv")
-    render.tabulate_or_csv(headers, values, args.csv, outfile)
-
-    # Display step-related information.
-    if args.metrics:
-        # Accumulate the scalar training and validation metric names from all provided experiments.
-        t_metrics_names = sorted({n for doc in docs for n in scalar_training_metrics_names(doc)})
-        t_metrics_headers = ["Training Metric: {}".format(name) for name in t_metrics_names]
-
-        v_metrics_names = sorted({n for doc in docs for n in scalar_validation_metrics_names(doc)})
-        v_metrics_headers = ["Validation Metric: {}".format(name) for name in v_metrics_names]
-    else:
-        t_metrics_headers = []
-        v_metrics_headers = []
-
-    headers = (
-        ["Trial ID", "# of Batches", "State", "Start Time", "End Time"]
-        + t_metrics_headers
-        + [
-            "Checkpoint State",
-            "Checkpoint Start Time",
-            "Checkpoint End Time",
-            "Validation State",
-            "Validation Start Time",
-            "Validation End Time",
-        ]
-        + v_metrics_headers
+            "Experiment ID",
+            "State",
+            "Progress",
+            "Start Time",
+            "End Time",
+            "Description",
+            "Archived",
+            "Labels",
+        ],
+        outfile("experiments.csv"),
     )
-
-    values = []
-    for doc in docs:
-        for trial in doc["trials"]:
-            for step in trial["steps"]:
-                t_metrics_fields = []
-                if step.get("metrics"):
-                    avg_metrics = step["metrics"]["avg_metrics"]
-                    for name in t_metrics_names:
-                        if name in avg_metrics:
-                            t_metrics_fields.append(avg_metrics[name])
-                        else:
-                            t_metrics_fields.append(None)
-
-                checkpoint = step.get("checkpoint")
-                if checkpoint:
-                    checkpoint_state = checkpoint["state"]
-                    checkpoint_start_time = checkpoint.get("start_time")
-                    checkpoint_end_time = checkpoint.get("end_time")
-                else:
-                    checkpoint_state = None
-                    checkpoint_start_time = None
-                    checkpoint_end_time = None
-
-                validation = step.get("validation")
-                if validation:
-                    validation_state = validation["state"]
-                    validation_start_time = validation.get("start_time")
-                    validation_end_time = validation.get("end_time")
-                else:
-                    validation_state = None
-                    validation_start_time = None
-                    validation_end_time = None
-
-                if args.metrics:
-                    v_metrics_fields = [
-                        api.metric.get_validation_metric(name, validation)
-                        for name in v_metrics_names
-                    ]
-                else:
-                    v_metrics_fields = []
-
-                row = (
+    trials = _DescribeTable(
+        ["Trial ID", "Experiment ID", "State", "Start Time", "End Time", "H-Params"],
+        outfile("trials.csv"),
+    )
+    t_metrics_names = set()  # type: Set[str]
+    v_metrics_names = set()  # type: Set[str]
+
+    # The workload rows are spooled to a temporary file until the metric columns are known.
+    with tempfile.TemporaryFile("w+") as workloads:
+        for doc in docs:
+            experiments.add(
+                [
+                    doc["id"],
+                    doc["state"],
+                    render.format_percent(doc["progress"]),
+                    render.format_time(doc.get("start_time")),
+                    render.format_time(doc.get("end_time")),
+                    doc["config"].get("description"),
+                    doc["archived"],
+                    ", ".join(sorted(doc["config"].get("labels", []))),
+                ]
+            )
+            for trial in doc["trials"]:
+                trials.add(
                     [
-                        step["trial_id"],
-                        step["num_batches"] + step["prior_batches_processed"],
-                        step["state"],
-                        render.format_time(step.get("start_time")),
-                        render.format_time(step.get("end_time")),
-                    ]
-                    + t_metrics_fields
-                    + [
-                        checkpoint_state,
-                        render.format_time(checkpoint_start_time),
-                        render.format_time(checkpoint_end_time),
-                        validation_state,
-                        render.format_time(validation_start_time),
-                        render.format_time(validation_end_time),
+                        trial["id"],
+                        doc["id"],
+                        trial["state"],
+                        render.format_time(trial.get("start_time")),
+                        render.format_time(trial.get("end_time")),
+                        json.dumps(trial["hparams"], indent=4),
                     ]
-                    + v_metrics_fields
                 )
-                values.append(row)
 
-    if not args.outdir:
-        outfile = None
-        print("\nWorkloads:")
-    else:
-        outfile = args.outdir.joinpath("workloads.csv")
-    render.tabulate_or_csv(headers, values, args.csv, outfile)
+            if args.metrics:
+                # Accumulate the scalar training and validation metric names from all provided
+                # experiments.
+                t_metrics_names |= scalar_training_metrics_names(doc)
+                v_metrics_names |= scalar_validation_metrics_names(doc)
+
+            for row in _workload_rows(doc):
+                workloads.write(json.dumps(row) + "\n")
+
+        experiments.close("Experiment:", args.csv)
+        trials.close("\nTrials:", args.csv)
+
+        # Display step-related information.
+        t_names = sorted(t_metrics_names)
+        v_names = sorted(v_metrics_names)
+        steps = _DescribeTable(
+            ["Trial ID", "# of Batches", "State", "Start Time", "End Time"]
+            + ["Training Metric: {}".format(name) for name in t_names]
+            + [
+                "Checkpoint State",
+                "Checkpoint Start Time",
+                "Checkpoint End Time",
+                "Validation State",
+                "Validation Start Time",
+                "Validation End Time",
+            ]
+            + ["Validation Metric: {}".format(name) for name in v_names],
+            outfile("workloads.csv"),
+        )
+        workloads.seek(0)
+        for line in workloads:
+            step_fields, t_metrics, other_fields, v_metrics = json.loads(line)
+            steps.add(
+                step_fields
+                + ([t_metrics.get(name) for name in t_names] if t_metrics is not None else [])
+                + other_fields
+                + [v_metrics.get(name) for name in v_names]
+            )
+        steps.close("\nWorkloads:", args.csv)
 
 
 @authentication_required
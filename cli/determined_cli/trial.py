@@ -250,6 +250,11 @@ args_description = [
                         action="append",
                         help="output stream to show logs from (repeat for multiple values)",
                     ),
+                    Arg(
+                        "--output-dir",
+                        help="directory to keep a compressed copy of the logs in; later "
+                        "invocations with the same directory only fetch new log entries",
+                    ),
                 ],
             ),
             Cmd(
@@ -1,11 +1,16 @@
+import csv
+import gzip
 import os
 import tempfile
 from pathlib import Path
+from typing import Any, Dict, Union, cast
 
 import pytest
 import requests
 import requests_mock
+import simplejson
 
+import determined_cli
 import determined_cli.cli as cli
 import determined_cli.command as command
 from determined_common import constants, context
@@ -63,6 +68,71 @@ def test_create_with_model_def(requests_mock: requests_mock.Mocker, tmp_path: Pa
         )
 
 
+@pytest.mark.parametrize("gzip_experiment_requests", [False, True])  # type: ignore
+def test_create_streams_model_def(
+    requests_mock: requests_mock.Mocker, tmp_path: Path, gzip_experiment_requests: bool
+) -> None:
+    # Only masters which advertise it accept compressed requests.
+    info = {"version": "1.0"}  # type: Dict[str, Any]
+    if gzip_experiment_requests:
+        info["gzip_experiment_requests"] = True
+    requests_mock.get("/info", status_code=200, json=info)
+
+    requests_mock.get(
+        "/users/me", status_code=200, json={"username": constants.DEFAULT_DETERMINED_USER}
+    )
+
+    requests_mock.post("/login", status_code=200, json={"token": "fake-token"})
+
+    requests_mock.post(
+        "/experiments", status_code=requests.codes.created, headers={"Location": "/experiments/1"}
+    )
+
+    files = {
+        "config.yaml": MINIMAL_CONFIG,
+        "model_def/A.py": "a = 1\n",
+        "model_def/B.py": "",
+        "model_def/sub/C.py": "c = 3\n",
+        "model_def/big.bin": "x" * 10000,
+    }  # type: Dict[Union[Path, str], str]
+    with FileTree(tmp_path, files) as tree:
+        cli.main(
+            [
+                "experiment",
+                "create",
+                "--paused",
+                str(tree.joinpath("config.yaml")),
+                str(tree.joinpath("model_def")),
+            ]
+        )
+        expected, _ = context.read_context(tree.joinpath("model_def"))
+        # The mock does not consume the streamed body; files are read as it is consumed.
+        body = b"".join(requests_mock.last_request.body)
+
+    if gzip_experiment_requests:
+        assert requests_mock.last_request.headers["Content-Encoding"] == "gzip"
+        assert len(body) < 10000
+        body = gzip.decompress(body)
+    else:
+        assert "Content-Encoding" not in requests_mock.last_request.headers
+    sent = simplejson.loads(body)
+    assert sent["validate_only"] is False
+    assert sent["model_definition"] == simplejson.loads(simplejson.dumps(expected))
+
+
+def test_context_iter_json(tmp_path: Path) -> None:
+    files = {
+        "f{}.txt".format(i): str(i) * (i * 100) for i in range(10)
+    }  # type: Dict[Union[Path, str], str]
+    with FileTree(tmp_path, files) as tree:
+        model_context = context.Context.from_local(tree)
+        chunks = list(model_context.iter_json(chunk_size=1000))
+        expected = simplejson.dumps([e.dict() for e in model_context.entries])
+
+    assert len(chunks) > 1
+    assert simplejson.loads(b"".join(chunks)) == simplejson.loads(expected)
+
+
 @pytest.mark.slow  # type: ignore
 def test_create_reject_large_model_def(requests_mock: requests_mock.Mocker, tmp_path: Path) -> None:
     requests_mock.get("/info", status_code=200, json={"version": "1.0"})
@@ -194,3 +264,94 @@ def test_read_context_ignore_pycaches(tmp_path: Path) -> None:
     ) as tree:
         model_def, _ = context.read_context(tree)
         assert {f["path"] for f in model_def} == {"A.py", "subdir", "subdir/A.py"}
+
+
+def make_experiment_doc(experiment_id: int, metric_name: str) -> Dict[str, Any]:
+    step = {
+        "trial_id": experiment_id * 10,
+        "num_batches": 100,
+        "prior_batches_processed": 0,
+        "state": "COMPLETED",
+        "metrics": {"avg_metrics": {metric_name: 0.5}},
+        "checkpoint": None,
+        "validation": {
+            "state": "COMPLETED",
+            "metrics": {"validation_metrics": {"error": 0.25}},
+        },
+    }
+    trial = {"id": experiment_id * 10, "state": "COMPLETED", "hparams": {}, "steps": [step]}
+    return {
+        "id": experiment_id,
+        "state": "COMPLETED",
+        "progress": 1.0,
+        "config": {"description": "test"},
+        "archived": False,
+        "trials": [trial],
+    }
+
+
+def test_describe(requests_mock: requests_mock.Mocker, tmp_path: Path, capsys: Any) -> None:
+    # Match the CLI version so that no version warning is printed.
+    requests_mock.get("/info", status_code=200, json={"version": determined_cli.__version__})
+    requests_mock.get(
+        "/users/me", status_code=200, json={"username": constants.DEFAULT_DETERMINED_USER}
+    )
+    requests_mock.post("/login", status_code=200, json={"token": "fake-token"})
+    docs = [make_experiment_doc(1, "loss"), make_experiment_doc(2, "accuracy")]
+    for doc in docs:
+        requests_mock.get("/experiments/{}/metrics/summary".format(doc["id"]), json=doc)
+
+    cli.main(["experiment", "describe", "1,2", "--metrics", "--json"])
+    assert simplejson.loads(capsys.readouterr().out) == docs
+
+    cli.main(["experiment", "describe", "1,2", "--metrics", "--outdir", str(tmp_path)])
+    with tmp_path.joinpath("experiments.csv").open() as f:
+        assert [row[0] for row in csv.reader(f)] == ["Experiment ID", "1", "2"]
+    with tmp_path.joinpath("workloads.csv").open() as f:
+        rows = list(csv.DictReader(f))
+    # The metric columns cover every experiment.
+    assert [row["Trial ID"] for row in rows] == ["10", "20"]
+    assert [row["Training Metric: loss"] for row in rows] == ["0.5", ""]
+    assert [row["Training Metric: accuracy"] for row in rows] == ["", "0.5"]
+    assert [row["Validation Metric: error"] for row in rows] == ["0.25", "0.25"]
+
+
+def test_trial_logs_output_dir(
+    requests_mock: requests_mock.Mocker, tmp_path: Path, capsys: Any
+) -> None:
+    requests_mock.get("/info", status_code=200, json={"version": determined_cli.__version__})
+    requests_mock.get(
+        "/users/me", status_code=200, json={"username": constants.DEFAULT_DETERMINED_USER}
+    )
+    requests_mock.post("/login", status_code=200, json={"token": "fake-token"})
+
+    messages = ["line {}\n".format(i) for i in range(10)]
+
+    def logs_callback(request: Any, context: Any) -> str:
+        offset = int(request.qs["offset"][0])
+        limit = int(request.qs["limit"][0])
+        end = offset + limit if limit else len(messages)
+        return "".join(
+            simplejson.dumps({"result": {"message": m}}) + "\n" for m in messages[offset:end]
+        )
+
+    logs = requests_mock.get("/api/v1/trials/1/logs", text=logs_callback)
+    output_dir = str(tmp_path / "logs")
+
+    def run(*flags: str) -> str:
+        capsys.readouterr()
+        cli.main(["trial", "logs", "1", "--output-dir", output_dir, *flags])
+        return cast(str, capsys.readouterr().out)
+
+    assert run("--head", "3").startswith("".join(messages[:3]))
+    assert [r.qs["offset"] for r in logs.request_history] == [["0"]]
+
+    # Only the entries which have not been downloaded yet are fetched.
+    assert run("--tail", "4").startswith("".join(messages[-4:]))
+    assert [r.qs["offset"] for r in logs.request_history] == [["0"], ["3"]]
+
+    assert run("--head", "5").startswith("".join(messages[:5]))
+    assert logs.call_count == 2
+
+    assert run().startswith("".join(messages))
+    assert [r.qs["offset"] for r in logs.request_history] == [["0"], ["3"], ["10"]]
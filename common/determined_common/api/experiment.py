@@ -3,8 +3,9 @@ import random
 import sys
 import time
 import uuid
+import zlib
 from argparse import Namespace
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urlencode
 
 import simplejson
@@ -12,6 +13,7 @@ from termcolor import colored
 
 from determined_common import api, constants, context, yaml
 from determined_common.api import request as req
+from determined_common.api import trial_logs
 from determined_common.api.authentication import authentication_required
 
 
@@ -42,16 +44,8 @@ def logs(args: Namespace) -> None:
         except ValueError:
             raise Exception("invalid log level: {}".format(level))
 
-    def print_logs(
-        offset: Optional[int], limit: Optional[int] = 5000, follow: bool = False
-    ) -> None:
-        query = {}  # type: Dict[str, Any]
-        if offset is not None:
-            query["offset"] = offset
-        if limit is not None:
-            query["limit"] = limit
-        if follow:
-            query["follow"] = "true"
+    def make_filters() -> Dict[str, Any]:
+        filters = {}  # type: Dict[str, Any]
         for f in [
             "agent_ids",
             "container_ids",
@@ -62,19 +56,63 @@ def logs(args: Namespace) -> None:
             "timestamp_after",
         ]:
             if getattr(args, f, None) is not None:
-                query[f] = getattr(args, f)
+                filters[f] = getattr(args, f)
 
         if getattr(args, "level", None) is not None:
-            query["levels"] = to_levels_above(args.level)
+            filters["levels"] = to_levels_above(args.level)
+        return filters
+
+    def fetch_logs(
+        offset: Optional[int], limit: Optional[int] = 5000, follow: bool = False
+    ) -> Iterator[bytes]:
+        query = make_filters()
+        if offset is not None:
+            query["offset"] = offset
+        if limit is not None:
+            query["limit"] = limit
+        if follow:
+            query["follow"] = "true"
 
         path = "/api/v1/trials/{}/logs?{}".format(args.trial_id, urlencode(query, doseq=True))
         with api.get(args.master, path, stream=True) as r:
-            for line in r.iter_lines():
-                log = simplejson.loads(line)["result"]
-                print(log["message"], end="")
+            yield from r.iter_lines()
 
-    try:
+    def print_log(line: bytes) -> None:
+        log = simplejson.loads(line)["result"]
+        print(log["message"], end="")
+
+    def print_logs(
+        offset: Optional[int], limit: Optional[int] = 5000, follow: bool = False
+    ) -> None:
+        for line in fetch_logs(offset, limit, follow):
+            print_log(line)
+
+    def print_cached_logs(output_dir: str) -> None:
+        # Only the log entries that are not in the output directory yet are fetched.
+        cache = trial_logs.TrialLogCache(output_dir, args.trial_id, make_filters())
         if args.head is not None:
+            if cache.num_lines < args.head:
+                trial_logs.download(cache, fetch_logs, args.head - cache.num_lines)
+            lines = cache.read(0, args.head)
+        elif args.tail is not None:
+            trial_logs.download(cache, fetch_logs)
+            lines = cache.read(max(cache.num_lines - args.tail, 0))
+        else:
+            for line in cache.read():
+                print_log(line)
+            trial_logs.download(
+                cache,
+                lambda offset, limit: fetch_logs(offset, limit, args.follow),
+                on_line=print_log,
+            )
+            return
+        for line in lines:
+            print_log(line)
+
+    try:
+        if getattr(args, "output_dir", None) is not None:
+            print_cached_logs(args.output_dir)
+        elif args.head is not None:
             print_logs(0, args.head)
         elif args.tail is not None:
             print_logs(-args.tail, args.tail)
@@ -193,6 +231,19 @@ def follow_test_experiment_logs(master_url: str, exp_id: int) -> None:
             time.sleep(0.2)
 
 
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks into the gzip format. Most of the size of a model definition is
+    base64-encoded file content, which compresses back to less than its original size.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
 def create_experiment(
     master_url: str,
     config: Dict[str, Any],
@@ -205,9 +256,8 @@ def create_experiment(
 ) -> int:
     body = {
         "experiment_config": yaml.safe_dump(config),
-        "model_definition": [e.dict() for e in model_context.entries],
         "validate_only": validate_only,
-    }
+    }  # type: Dict[str, Any]
     if template:
         body["template"] = template
     if archived:
@@ -215,7 +265,21 @@ def create_experiment(
     if additional_body_fields:
         body.update(additional_body_fields)
 
-    r = req.post(master_url, "experiments", body=body)
+    def encode_body() -> Iterator[bytes]:
+        # Stream the model definition rather than encoding the whole request in memory.
+        yield simplejson.dumps(body)[:-1].encode("utf-8")
+        yield b', "model_definition": '
+        yield from model_context.iter_json()
+        yield b"}"
+
+    # Older masters do not decompress request bodies.
+    headers = {"Content-Type": "application/json"}
+    data = encode_body()
+    if api.get(master_url, "info", authenticated=False).json().get("gzip_experiment_requests"):
+        headers["Content-Encoding"] = "gzip"
+        data = gzip_chunks(data)
+
+    r = req.post(master_url, "experiments", data=data, headers=headers)
     if not hasattr(r, "headers"):
         raise Exception(r)
 
@@ -1,7 +1,7 @@
 import os
 import webbrowser
 from types import TracebackType
-from typing import Any, Dict, Iterator, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 from urllib import parse
 
 import lomond
@@ -18,6 +18,9 @@ _master_cert_bundle = None
 # The name we use to verify the master.
 _master_cert_name = None
 
+# The number of records requested at a time from paginated endpoints.
+DEFAULT_PAGE_SIZE = 100
+
 
 def set_master_cert_bundle(path: Optional[Union[str, bool]]) -> None:
     if path == "":
@@ -99,7 +102,12 @@ def do_request(
     headers: Optional[Dict[str, str]] = None,
     authenticated: bool = True,
     stream: bool = False,
+    data: Optional[Iterable[bytes]] = None,
 ) -> requests.Response:
+    """
+    Send a request to the remote API. The request body is either `body`, encoded as JSON, or the
+    chunks of `data`, which are sent as they are produced.
+    """
     if headers is None:
         h = {}  # type: Dict[str, str]
     else:
@@ -117,6 +125,7 @@ def do_request(
             make_url(host, path),
             params=params,
             json=body,
+            data=data,
             headers=h,
             verify=_master_cert_bundle,
             stream=stream,
@@ -161,6 +170,33 @@ def get(
     )
 
 
+def get_pages(
+    host: str,
+    path: str,
+    key: str,
+    params: Optional[Dict[str, Any]] = None,
+    page_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Send GET requests for consecutive pages of a paginated endpoint of the remote API and yield
+    the decoded response for each page, in which `key` holds the records of the page. Each page is
+    only requested once the previous one has been consumed, so callers which stop early do not
+    fetch the remaining records.
+    """
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    offset = 0
+    while True:
+        page = get(host, path, params={**(params or {}), "offset": offset, "limit": page_size})
+        data = page.json()  # type: Dict[str, Any]
+        yield data
+
+        num_records = len(data.get(key) or [])
+        offset += num_records
+        pagination = data.get("pagination") or {}
+        if num_records < page_size or offset >= pagination.get("total", offset + 1):
+            return
+
+
 def delete(
     host: str,
     path: str,
@@ -182,11 +218,14 @@ def post(
     body: Optional[Dict[str, Any]] = None,
     headers: Optional[Dict[str, str]] = None,
     authenticated: bool = True,
+    data: Optional[Iterable[bytes]] = None,
 ) -> requests.Response:
     """
     Send a POST request to the remote API.
     """
-    return do_request("POST", host, path, body=body, headers=headers, authenticated=authenticated)
+    return do_request(
+        "POST", host, path, body=body, headers=headers, authenticated=authenticated, data=data
+    )
 
 
 def patch(
@@ -0,0 +1,205 @@
+"""
+A local, resumable copy of the logs of a trial.
+
+The logs are stored in a directory as a sequence of gzip-compressed segment files holding the log
+entries exactly as the master returned them, one JSON document per line. Every batch of entries is
+appended to the current segment as a separate gzip member, and an index records the line number
+and byte offset at which each member starts. The index makes it possible to resume a download
+from the last entry written and to read any range of lines (e.g., the last N) without
+decompressing the segments that precede it.
+"""
+import bisect
+import gzip
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+import simplejson
+
+from determined_common import check
+from determined_common.api import errors
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# Segments are closed once they hold this many log entries.
+SEGMENT_LINES = 100000
+
+# Entries are written to disk (and become visible to readers) in batches of at most this many
+# lines, and at least this often while following a running trial.
+FLUSH_LINES = 1000
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# How often a download is resumed after the connection to the master is lost.
+MAX_RECONNECTS = 5
+RECONNECT_BACKOFF_SECONDS = 1.0
+
+RECONNECT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    errors.MasterNotFoundException,
+)
+
+
+class TrialLogCache:
+    """
+    TrialLogCache stores the logs of one trial, fetched with one set of filters, in a directory.
+    """
+
+    def __init__(self, directory: str, trial_id: int, filters: Dict[str, Any]) -> None:
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self._index = simplejson.load(f)  # type: Dict[str, Any]
+            check.eq(self._index["version"], INDEX_VERSION, "Unsupported log index version")
+            if self._index["trial_id"] != trial_id or self._index["filters"] != filters:
+                raise ValueError(
+                    "{} holds the logs of trial {} with filters {}; use a different directory "
+                    "for the logs of trial {} with filters {}".format(
+                        directory,
+                        self._index["trial_id"],
+                        self._index["filters"],
+                        trial_id,
+                        filters,
+                    )
+                )
+        else:
+            self._index = {
+                "version": INDEX_VERSION,
+                "trial_id": trial_id,
+                "filters": filters,
+                "lines": 0,
+                "segments": [],
+            }
+
+        # Drop anything written to the last segment after the index was last saved, e.g., by a
+        # download that was interrupted part of the way through a batch.
+        if self._index["segments"]:
+            segment = self._index["segments"][-1]
+            with open(self._segment_path(segment), "r+b") as segment_file:
+                segment_file.truncate(segment["size"])
+
+    @property
+    def num_lines(self) -> int:
+        return int(self._index["lines"])
+
+    def _segment_path(self, segment: Dict[str, Any]) -> str:
+        return os.path.join(self._directory, segment["file"])
+
+    def _save_index(self) -> None:
+        path = os.path.join(self._directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            simplejson.dump(self._index, f)
+        os.replace(path + ".tmp", path)
+
+    def write(self, lines: List[bytes]) -> None:
+        """Append log entries to the cache."""
+        segments = self._index["segments"]
+        while lines:
+            if not segments or segments[-1]["lines"] >= SEGMENT_LINES:
+                segments.append(
+                    {
+                        "file": "{:06d}.log.gz".format(len(segments)),
+                        "line": self.num_lines,
+                        "lines": 0,
+                        "size": 0,
+                        "members": [],
+                    }
+                )
+                open(self._segment_path(segments[-1]), "wb").close()
+            segment = segments[-1]
+            batch, lines = (
+                lines[: SEGMENT_LINES - segment["lines"]],
+                lines[SEGMENT_LINES - segment["lines"] :],
+            )
+
+            with open(self._segment_path(segment), "ab") as f:
+                f.write(gzip.compress(b"".join(line + b"\n" for line in batch)))
+                size = f.tell()
+            segment["members"].append([self.num_lines, segment["size"]])
+            segment["lines"] += len(batch)
+            segment["size"] = size
+            self._index["lines"] += len(batch)
+            self._save_index()
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the cached log entries from line `start` up to, but not including, `stop`."""
+        stop = self.num_lines if stop is None else min(stop, self.num_lines)
+        segments = self._index["segments"]
+        first = max(bisect.bisect_right([s["line"] for s in segments], start) - 1, 0)
+        line_number = start
+        for segment in segments[first:]:
+            if line_number >= stop:
+                return
+            members = segment["members"]
+            member = max(bisect.bisect_right([m[0] for m in members], line_number) - 1, 0)
+            member_line, offset = members[member]
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                # Only read the members that the index refers to.
+                members_file = _Limited(f, segment["size"] - offset)
+                with gzip.GzipFile(fileobj=members_file) as g:  # type: ignore
+                    for i, line in enumerate(g, member_line):
+                        if i >= stop:
+                            return
+                        if i >= line_number:
+                            yield line.rstrip(b"\n")
+            line_number = segment["line"] + segment["lines"]
+
+
+class _Limited:
+    """A read-only view of the next `size` bytes of a file."""
+
+    def __init__(self, f: Any, size: int) -> None:
+        self._f = f
+        self._remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)  # type: bytes
+        self._remaining -= len(data)
+        return data
+
+
+def download(
+    cache: TrialLogCache,
+    fetch: Callable[[int, int], Iterable[bytes]],
+    limit: int = 0,
+    on_line: Optional[Callable[[bytes], None]] = None,
+) -> None:
+    """
+    Fetch the log entries which are not in the cache yet and append them to it.
+
+    `fetch(offset, limit)` returns the log entries starting at line `offset`, at most `limit` of
+    them if `limit` is not 0. If the connection to the master is lost, the download resumes from
+    the last entry received. `on_line` is called with every new entry as it arrives.
+    """
+    stop = cache.num_lines + limit if limit else None
+    reconnects = 0
+    while stop is None or cache.num_lines < stop:
+        batch = []  # type: List[bytes]
+        last_flush = time.time()
+        try:
+            for line in fetch(cache.num_lines, stop - cache.num_lines if stop else 0):
+                if not line:
+                    continue
+                batch.append(line)
+                if on_line is not None:
+                    on_line(line)
+                if len(batch) >= FLUSH_LINES or time.time() - last_flush > FLUSH_INTERVAL_SECONDS:
+                    cache.write(batch)
+                    batch = []
+                    last_flush = time.time()
+            return
+        except RECONNECT_ERRORS:
+            if reconnects >= MAX_RECONNECTS:
+                raise
+            reconnects += 1
+            time.sleep(RECONNECT_BACKOFF_SECONDS * reconnects)
+        finally:
+            cache.write(batch)
@@ -3,17 +3,29 @@ import collections
 import os
 import pathlib
 import tarfile
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pathspec
+import simplejson
 
 from determined_common import check, constants
 from determined_common.util import sizeof_fmt
 
+# Streamed context entries are sent to the master in chunks of about this many bytes.
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def _encoded_size(size: int) -> int:
+    """Return the length of the base64 encoding of `size` bytes."""
+    return 4 * ((size + 2) // 3)
+
 
 class ContextItem:
     """
     ContextItem wraps the content and metadata of a file or a directory.
+
+    The content of local files is only read (and base64-encoded) when the item is encoded, so that
+    a Context does not hold the content of every file in memory.
     """
 
     def __init__(self, path: str):
@@ -24,17 +36,28 @@ class ContextItem:
         self.content = bytes()
         self.mtime = -1
         self.mode = -1
+        self.local_path = None  # type: Optional[pathlib.Path]
+        self.local_size = 0
 
     @property
     def size(self) -> int:
         if self.content:
             return len(self.content)
+        if self.local_path is not None:
+            return _encoded_size(self.local_size)
         return 0
 
+    def encoded_content(self) -> bytes:
+        """Return the base64-encoded content of the item."""
+        if self.local_path is not None:
+            with self.local_path.open("rb") as f:
+                return base64.b64encode(f.read())
+        return self.content
+
     def dict(self) -> Dict[str, Any]:
         d = {"path": self.path, "type": self.type, "uid": self.uid, "gid": self.gid}
         if self.type == ord(tarfile.REGTYPE):
-            d["content"] = self.content
+            d["content"] = self.encoded_content()
         if self.mtime != -1:
             d["mtime"] = self.mtime
         if self.mode != -1:
@@ -52,11 +75,14 @@ class ContextItem:
     def from_local_file(cls, path: str, local_path: pathlib.Path) -> "ContextItem":
         context_item = ContextItem(path)
         context_item.type = ord(tarfile.REGTYPE)
-        context_item.mtime = int(local_path.stat().st_mtime)
-        context_item.mode = local_path.stat().st_mode
-        with local_path.open("rb") as f:
-            content = f.read()
-            context_item.content = base64.b64encode(content)
+        stat = local_path.stat()
+        context_item.mtime = int(stat.st_mtime)
+        context_item.mode = stat.st_mode
+        # Only check that the file can be read; its content is read when the item is encoded.
+        with local_path.open("rb"):
+            pass
+        context_item.local_path = local_path
+        context_item.local_size = stat.st_size
         return context_item
 
     @classmethod
@@ -92,6 +118,25 @@ class Context:
         self._items[entry.path] = entry
         self._size += entry.size
 
+    def iter_json(self, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Encode the entries as a JSON array, like simplejson.dumps([e.dict() for e in entries]), in
+        chunks of about `chunk_size` bytes. Only the files of the current chunk are held in memory.
+        """
+        chunk = [b"["]
+        chunk_len = 1
+        for i, entry in enumerate(self.entries):
+            encoded = simplejson.dumps(entry.dict()).encode("utf-8")
+            if i > 0:
+                chunk.append(b", ")
+            chunk.append(encoded)
+            chunk_len += len(encoded) + 2
+            if chunk_len >= chunk_size:
+                yield b"".join(chunk)
+                chunk, chunk_len = [], 0
+        chunk.append(b"]")
+        yield b"".join(chunk)
+
     @classmethod
     def from_local(
         cls,
@@ -1 +1,6 @@
-from determined_common.experimental.checkpoint._checkpoint import Checkpoint, CheckpointState
+from determined_common.experimental.checkpoint._checkpoint import (
+    Checkpoint,
+    CheckpointOrderBy,
+    CheckpointSortBy,
+    CheckpointState,
+)
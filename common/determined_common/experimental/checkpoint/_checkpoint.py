@@ -1,11 +1,83 @@
 import enum
 import json
+import logging
 import pathlib
 import shutil
+import sys
 from typing import Any, Dict, List, Optional, cast
 
 from determined_common import api, constants, storage
-from determined_common.storage import shared
+from determined_common.storage import shared, transfer
+
+
+def _directory_resources(directory: pathlib.Path) -> Dict[str, int]:
+    """Return the resources of a checkpoint directory, in the format of StorageMetadata."""
+    resources = {}
+    for path in directory.rglob("*"):
+        rel_path = str(path.relative_to(directory))
+        if path.is_dir():
+            resources[rel_path + "/"] = 0
+        else:
+            resources[rel_path] = path.stat().st_size
+    return resources
+
+
+def _missing_resources(directory: pathlib.Path, resources: Dict[str, int]) -> Dict[str, int]:
+    """Return the resources which are not present in a directory with their recorded size."""
+    missing = {}
+    for rel_path, size in resources.items():
+        path = directory.joinpath(rel_path)
+        if rel_path.endswith("/"):
+            if not path.is_dir():
+                missing[rel_path] = size
+        elif not path.is_file() or path.stat().st_size != size:
+            missing[rel_path] = size
+    return missing
+
+
+# The Linux ioctl which makes a file share the data of another on copy-on-write file systems.
+_FICLONE = 0x40049409
+
+
+def _clone_file(src: str, dst: str) -> None:
+    """Copy a file as a copy-on-write clone (reflink) where the file system supports it."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _copy_checkpoint(
+    src: pathlib.Path, dst: pathlib.Path, resources: Dict[str, int], clone: bool = False
+) -> transfer.TransferStats:
+    """
+    Copy the resources of a checkpoint directory into another directory, concurrently. If `clone`
+    is True, files are cloned rather than copied where the file system supports it.
+    """
+    dst.mkdir(parents=True, exist_ok=True)
+    for rel_path in resources:
+        dst.joinpath(rel_path).parent.mkdir(parents=True, exist_ok=True)
+        if rel_path.endswith("/"):
+            dst.joinpath(rel_path).mkdir(parents=True, exist_ok=True)
+
+    def copy_file(rel_path: str) -> None:
+        src_path, dst_path = src.joinpath(rel_path), dst.joinpath(rel_path)
+        # Replace partial copies rather than writing through them, since they may be links.
+        if dst_path.exists():
+            dst_path.unlink()
+        if clone:
+            _clone_file(str(src_path), str(dst_path))
+        else:
+            shutil.copy2(str(src_path), str(dst_path))
+
+    return transfer.transfer_files(resources, copy_file, transfer.DEFAULT_MAX_CONCURRENCY)
 
 
 class ModelFramework(enum.Enum):
@@ -21,6 +93,33 @@ class CheckpointState(enum.Enum):
     DELETED = 4
 
 
+class CheckpointSortBy(enum.Enum):
+    """
+    The fields that the master can sort the checkpoints of an experiment on. The values are those
+    of GetExperimentCheckpointsRequest.SortBy in proto/src/determined/api/v1/experiment.proto.
+    """
+
+    UNSPECIFIED = 0
+    UUID = 1
+    TRIAL_ID = 4
+    BATCH_NUMBER = 6
+    START_TIME = 7
+    END_TIME = 8
+    VALIDATION_STATE = 15
+    STATE = 16
+    SEARCHER_METRIC = 17
+
+
+class CheckpointOrderBy(enum.Enum):
+    """
+    Whether a sorted list of checkpoints is in ascending or descending order. The values are those
+    of OrderBy in proto/src/determined/api/v1/pagination.proto.
+    """
+
+    ASC = 1
+    DESC = 2
+
+
 class Checkpoint(object):
     """
     A ``Checkpoint`` represents a trained model.
@@ -119,6 +218,63 @@ class Checkpoint(object):
             "checkpoint storage configuration.".format(self.uuid, potential_paths)
         )
 
+    def _fetch(self, local_ckpt_dir: pathlib.Path, resources: Optional[Dict[str, int]]) -> None:
+        """Fetch `resources` (or the whole checkpoint, if None) into `local_ckpt_dir`."""
+        checkpoint_storage = self.experiment_config["checkpoint_storage"]
+        if checkpoint_storage["type"] == "shared_fs" and not checkpoint_storage.get(
+            "content_addressed"
+        ):
+            src_ckpt_dir = self._find_shared_fs_path()
+            stats = _copy_checkpoint(
+                src_ckpt_dir,
+                local_ckpt_dir,
+                resources if resources is not None else _directory_resources(src_ckpt_dir),
+            )
+            logging.info("Copied checkpoint {}: {}".format(self.uuid, stats))
+            return
+
+        local_ckpt_dir.mkdir(parents=True, exist_ok=True)
+        manager = storage.build(checkpoint_storage, container_path=None)
+        if not isinstance(
+            manager,
+            (
+                storage.S3StorageManager,
+                storage.GCSStorageManager,
+                storage.ContentAddressedStorageManager,
+            ),
+        ):
+            raise AssertionError(
+                "Downloading from S3 or GCS requires the experiment to be configured with "
+                "S3 or GCS checkpointing, {} found instead".format(checkpoint_storage["type"])
+            )
+
+        cache = storage.CheckpointCache.from_env()
+        if cache is not None:
+            # The cached files are shared by every trial and download on this node, so the
+            # caller gets its own copies, which it may modify; they are cloned where the file
+            # system supports it, so that they do not take up space twice.
+            metadata = storage.StorageMetadata.from_json(
+                {"uuid": self.uuid, "resources": self.resources}
+            )
+            with cache.restore_path(manager, metadata) as cached_ckpt_dir:
+                cached_ckpt_dir_path = pathlib.Path(cached_ckpt_dir)
+                _copy_checkpoint(
+                    cached_ckpt_dir_path,
+                    local_ckpt_dir,
+                    resources
+                    if resources is not None
+                    else _directory_resources(cached_ckpt_dir_path),
+                    clone=True,
+                )
+        else:
+            metadata = storage.StorageMetadata.from_json(
+                {
+                    "uuid": self.uuid,
+                    "resources": resources if resources is not None else self.resources,
+                }
+            )
+            manager.download(metadata, str(local_ckpt_dir))
+
     def download(self, path: Optional[str] = None) -> str:
         """
         Download checkpoint to local storage.
@@ -134,37 +290,30 @@ class Checkpoint(object):
         else:
             local_ckpt_dir = pathlib.Path("checkpoints", self.uuid)
 
-        # Backward compatibility: we used MLflow's MLmodel checkpoint format for
-        # serializing pytorch models. We now use our own format that contains a
-        # metadata.json file. We are checking for checkpoint existence by
-        # looking for both checkpoint formats in the output directory.
-        potential_metadata_paths = [
-            local_ckpt_dir.joinpath(f) for f in ["metadata.json", "MLmodel"]
-        ]
-        if not any(p.exists() for p in potential_metadata_paths):
-            # If the target directory doesn't already appear to contain a
-            # checkpoint, attempt to fetch one.
-            if self.experiment_config["checkpoint_storage"]["type"] == "shared_fs":
-                src_ckpt_dir = self._find_shared_fs_path()
-                shutil.copytree(str(src_ckpt_dir), str(local_ckpt_dir))
-            else:
-                local_ckpt_dir.mkdir(parents=True, exist_ok=True)
-                manager = storage.build(
-                    self.experiment_config["checkpoint_storage"],
-                    container_path=None,
-                )
-                if not isinstance(manager, (storage.S3StorageManager, storage.GCSStorageManager)):
+        if self.resources:
+            # Only fetch the files which are missing or incomplete, e.g., after an interrupted
+            # download, and check the sizes of all files against the checkpoint's resources.
+            missing = _missing_resources(local_ckpt_dir, self.resources)
+            if missing:
+                self._fetch(local_ckpt_dir, missing)
+                incomplete = _missing_resources(local_ckpt_dir, self.resources)
+                if incomplete:
                     raise AssertionError(
-                        "Downloading from S3 or GCS requires the experiment to be configured with "
-                        "S3 or GCS checkpointing, {} found instead".format(
-                            self.experiment_config["checkpoint_storage"]["type"]
-                        )
+                        "Checkpoint {} was not downloaded completely; these files are missing "
+                        "or have unexpected sizes: {}".format(self.uuid, sorted(incomplete))
                     )
-
-                metadata = storage.StorageMetadata.from_json(
-                    {"uuid": self.uuid, "resources": self.resources}
-                )
-                manager.download(metadata, str(local_ckpt_dir))
+        else:
+            # Backward compatibility: we used MLflow's MLmodel checkpoint format for
+            # serializing pytorch models. We now use our own format that contains a
+            # metadata.json file. We are checking for checkpoint existence by
+            # looking for both checkpoint formats in the output directory.
+            potential_metadata_paths = [
+                local_ckpt_dir.joinpath(f) for f in ["metadata.json", "MLmodel"]
+            ]
+            if not any(p.exists() for p in potential_metadata_paths):
+                # If the target directory doesn't already appear to contain a
+                # checkpoint, attempt to fetch one.
+                self._fetch(local_ckpt_dir, None)
 
         if not local_ckpt_dir.joinpath("metadata.json").exists():
             with open(local_ckpt_dir.joinpath("metadata.json"), "w") as f:
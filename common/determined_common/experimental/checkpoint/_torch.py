@@ -4,13 +4,13 @@ from typing import Any, Dict, Union, cast
 import torch
 
 from determined import experimental, util
-from determined.pytorch import PyTorchTrial, PyTorchTrialContext
+from determined.pytorch import PyTorchTrial, PyTorchTrialContext, _checkpoint
 
 
 def load_model(
     ckpt_dir: pathlib.Path, metadata: Dict[str, Any], **kwargs: Any
 ) -> Union[PyTorchTrial, torch.nn.Module]:
-    checkpoint = torch.load(str(ckpt_dir.joinpath("state_dict.pth")), **kwargs)  # type: ignore
+    checkpoint = _checkpoint.load_checkpoint(ckpt_dir, **kwargs)
 
     trial_cls, trial_context = experimental._load_trial_on_local(
         ckpt_dir.joinpath("code"),
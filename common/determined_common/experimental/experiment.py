@@ -1,4 +1,5 @@
-from typing import List, Optional
+import heapq
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from determined_common import api
 from determined_common.experimental import checkpoint
@@ -75,36 +76,81 @@ class ExperimentReference:
                 this parameter is ignored. By default, the value of ``smaller_is_better``
                 from the experiment's configuration is used.
         """
-        r = api.get(
+        if not sort_by:
+            return self._top_n_checkpoints_by_searcher_metric(limit)
+
+        # Only the best checkpoint of every trial is kept while the checkpoints are fetched page
+        # by page; the top N of those are then selected with a heap.
+        found = False
+        best_per_trial = {}  # type: Dict[int, Tuple[Any, Dict[str, Any]]]
+        # Sort by UUID so that pages are consistent with each other.
+        for ckpt in self._get_checkpoints(sort_by=checkpoint.CheckpointSortBy.UUID.value):
+            found = True
+            metric = ckpt["metrics"]["validationMetrics"][sort_by]
+            best = best_per_trial.get(ckpt["trialId"])
+            if (
+                best is None
+                or (smaller_is_better and metric < best[0])
+                or (not smaller_is_better and metric > best[0])
+            ):
+                best_per_trial[ckpt["trialId"]] = (metric, ckpt)
+
+        if not found:
+            raise AssertionError("No checkpoint found for experiment {}".format(self.id))
+
+        # Ensure returned checkpoints are from distinct trials.
+        select = heapq.nsmallest if smaller_is_better else heapq.nlargest
+        return [
+            checkpoint.Checkpoint.from_json(ckpt, self._master)
+            for _, ckpt in select(limit, best_per_trial.values(), key=lambda x: x[0])
+        ]
+
+    def _top_n_checkpoints_by_searcher_metric(self, limit: int) -> List[checkpoint.Checkpoint]:
+        if limit <= 0:
+            return []
+
+        config = api.get(self._master, "/api/v1/experiments/{}".format(self.id)).json()["config"]
+        smaller_is_better = config["searcher"]["smaller_is_better"]
+
+        # The master sorts the checkpoints from the best to the worst searcher metric, so the
+        # first checkpoint of every trial is that trial's best one, and only the pages up to the
+        # N-th distinct trial are needed.
+        best_per_trial = {}  # type: Dict[int, Dict[str, Any]]
+        order_by = (
+            checkpoint.CheckpointOrderBy.ASC
+            if smaller_is_better
+            else checkpoint.CheckpointOrderBy.DESC
+        )
+        for ckpt in self._get_checkpoints(
+            sort_by=checkpoint.CheckpointSortBy.SEARCHER_METRIC.value, order_by=order_by.value
+        ):
+            best_per_trial.setdefault(ckpt["trialId"], ckpt)
+            if len(best_per_trial) >= limit:
+                break
+
+        if not best_per_trial:
+            raise AssertionError("No checkpoint found for experiment {}".format(self.id))
+
+        return [
+            checkpoint.Checkpoint.from_json(ckpt, self._master) for ckpt in best_per_trial.values()
+        ]
+
+    def _get_checkpoints(self, **params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the completed checkpoints of the experiment with completed validations, in the
+        order given by `params`. Pages are only requested as the checkpoints are consumed.
+        """
+        for page in api.get_pages(
             self._master,
             "/api/v1/experiments/{}/checkpoints".format(self.id),
+            "checkpoints",
             params={
                 "states": checkpoint.CheckpointState.COMPLETED.value,
                 "validation_states": checkpoint.CheckpointState.COMPLETED.value,
+                **params,
             },
-        )
-        checkpoints = r.json()["checkpoints"]
-
-        if not checkpoints:
-            raise AssertionError("No checkpoint found for experiment {}".format(self.id))
-
-        if not sort_by:
-            sort_by = checkpoints[0]["experimentConfig"]["searcher"]["metric"]
-            smaller_is_better = checkpoints[0]["experimentConfig"]["searcher"]["smaller_is_better"]
-
-        checkpoints.sort(
-            reverse=not smaller_is_better, key=lambda x: x["metrics"]["validationMetrics"][sort_by]
-        )
-
-        # Ensure returned checkpoints are from distinct trials.
-        t_ids = set()
-        checkpoint_refs = []
-        for ckpt in checkpoints:
-            if ckpt["trialId"] not in t_ids:
-                checkpoint_refs.append(checkpoint.Checkpoint.from_json(ckpt, self._master))
-                t_ids.add(ckpt["trialId"])
-
-        return checkpoint_refs[:limit]
+        ):
+            yield from page["checkpoints"]
 
     def __repr__(self) -> str:
         return "Experiment(id={})".format(self.id)
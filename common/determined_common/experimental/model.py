@@ -121,24 +121,25 @@ class Model:
         Arguments:
             order_by (enum): A member of the :class:`ModelOrderBy` enum.
         """
-        resp = api.get(
+        versions = []  # type: List[Checkpoint]
+        for data in api.get_pages(
             self._master,
             "/api/v1/models/{}/versions/".format(self.name),
+            "modelVersions",
             params={"order_by": order_by.value},
-        )
-        data = resp.json()
-
-        return [
-            Checkpoint.from_json(
-                {
-                    **version["checkpoint"],
-                    "model_version": version["version"],
-                    "model_name": data["model"]["name"],
-                },
-                self._master,
+        ):
+            versions.extend(
+                Checkpoint.from_json(
+                    {
+                        **version["checkpoint"],
+                        "model_version": version["version"],
+                        "model_name": data["model"]["name"],
+                    },
+                    self._master,
+                )
+                for version in data["modelVersions"]
             )
-            for version in data["modelVersions"]
-        ]
+        return versions
 
     def register_version(self, checkpoint_uuid: str) -> Checkpoint:
         """
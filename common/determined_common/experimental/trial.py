@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from determined_common import api, check
 from determined_common.experimental import checkpoint
@@ -102,33 +102,52 @@ class TrialReference:
             resp = api.get(self._master, "/api/v1/checkpoints/{}".format(uuid))
             return checkpoint.Checkpoint.from_json(resp.json()["checkpoint"], master=self._master)
 
-        r = api.get(
-            self._master,
-            "/api/v1/trials/{}/checkpoints".format(self.id),
+        path = "/api/v1/trials/{}/checkpoints".format(self.id)
+        if latest:
             # The default sort order from the API is by batch number. The order
             # by parameter indicates descending order.
-            params={"order_by": 2},
-        ).json()
-        checkpoints = r["checkpoints"]
-
-        if not checkpoints:
+            r = api.get(
+                self._master,
+                path,
+                params={"order_by": checkpoint.CheckpointOrderBy.DESC.value, "limit": 1},
+            ).json()
+            if not r["checkpoints"]:
+                raise AssertionError("No checkpoint found for trial {}".format(self.id))
+            return checkpoint.Checkpoint.from_json(r["checkpoints"][0], master=self._master)
+
+        # Only the best checkpoint seen so far is kept while the checkpoints are fetched page by
+        # page.
+        found = False
+        best_checkpoint = None  # type: Optional[Dict[str, Any]]
+        best_metric = None  # type: Any
+        for page in api.get_pages(
+            self._master,
+            path,
+            "checkpoints",
+            params={"order_by": checkpoint.CheckpointOrderBy.DESC.value},
+        ):
+            for c in page["checkpoints"]:
+                if not found:
+                    found = True
+                    if not sort_by:
+                        sort_by = c["experimentConfig"]["searcher"]["metric"]
+                        smaller_is_better = c["experimentConfig"]["searcher"]["smaller_is_better"]
+                if c["metrics"] is None:
+                    continue
+                metric = c["metrics"]["validationMetrics"][sort_by]
+                if (
+                    best_checkpoint is None
+                    or (smaller_is_better and metric < best_metric)
+                    or (not smaller_is_better and metric > best_metric)
+                ):
+                    best_checkpoint, best_metric = c, metric
+
+        if not found:
             raise AssertionError("No checkpoint found for trial {}".format(self.id))
+        if best_checkpoint is None:
+            raise AssertionError("No validated checkpoint found for trial {}".format(self.id))
 
-        if latest:
-            return checkpoint.Checkpoint.from_json(checkpoints[0], master=self._master)
-
-        if not sort_by:
-            sort_by = checkpoints[0]["experimentConfig"]["searcher"]["metric"]
-            smaller_is_better = checkpoints[0]["experimentConfig"]["searcher"]["smaller_is_better"]
-
-        best_checkpoint_func = min if smaller_is_better else max
-        return checkpoint.Checkpoint.from_json(
-            best_checkpoint_func(
-                [c for c in checkpoints if c["metrics"] is not None],
-                key=lambda x: x["metrics"]["validationMetrics"][sort_by],
-            ),
-            master=self._master,
-        )
+        return checkpoint.Checkpoint.from_json(best_checkpoint, master=self._master)
 
     def __repr__(self) -> str:
         return "Trial(id={})".format(self.id)
@@ -1,16 +1,35 @@
 """
 A drop-in replacement for requests.request() which supports server name overriding.
+
+Requests are sent through a process-wide pool of sessions, one per combination of master URL,
+certificate bundle, and server name, so that consecutive requests to the master reuse their TCP
+and TLS connections. The sessions may be shared by any number of threads.
 """
-from typing import Any, Optional
+import http.cookiejar
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib import parse
 
 import requests
+from urllib3.util import retry
+
+# The maximum number of connections kept open to each master.
+POOL_SIZE_ENV_VAR = "DET_MASTER_POOL_SIZE"
+DEFAULT_POOL_SIZE = 10
+
+# Idempotent requests (GET, HEAD, PUT, DELETE, OPTIONS, and TRACE) which fail to connect, or which
+# the master answers with one of these statuses, are retried with exponential backoff.
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = frozenset({502, 503, 504})
 
 
 class HTTPAdapter(requests.adapters.HTTPAdapter):
     """A new HTTPAdapter which honors the ServerName as a value for the verify arg."""
 
-    def __init__(self, server_hostname: Optional[str]) -> None:
-        super().__init__()
+    def __init__(self, server_hostname: Optional[str], **kwargs: Any) -> None:
+        super().__init__(**kwargs)
         self.server_hostname = server_hostname
 
     def cert_verify(self, conn: Any, url: Any, verify: Any, cert: Any) -> None:
@@ -20,14 +39,78 @@ class HTTPAdapter(requests.adapters.HTTPAdapter):
             conn.assert_hostname = self.server_hostname
 
 
+class _NoCookiesPolicy(http.cookiejar.CookiePolicy):
+    """
+    Never store cookies, so that sharing a session between requests does not change what is sent
+    to the master; every request is authenticated by its own headers.
+    """
+
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie: http.cookiejar.Cookie, request: Any) -> bool:
+        return False
+
+    def return_ok(self, cookie: http.cookiejar.Cookie, request: Any) -> bool:
+        return False
+
+    def domain_return_ok(self, domain: str, request: Any) -> bool:
+        return False
+
+    def path_return_ok(self, path: str, request: Any) -> bool:
+        return False
+
+
+def _pool_size() -> int:
+    pool_size = os.environ.get(POOL_SIZE_ENV_VAR)
+    return int(pool_size) if pool_size else DEFAULT_POOL_SIZE
+
+
 class Session(requests.sessions.Session):
-    def __init__(self, server_hostname: Optional[str]) -> None:
+    def __init__(self, server_hostname: Optional[str], pool_size: int = DEFAULT_POOL_SIZE) -> None:
         super().__init__()
+        self.cookies.set_policy(_NoCookiesPolicy())
+        max_retries = retry.Retry(
+            total=MAX_RETRIES,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter_kwargs = {
+            "pool_connections": pool_size,
+            "pool_maxsize": pool_size,
+            "max_retries": max_retries,
+        }
+        self.mount("http://", HTTPAdapter(None, **adapter_kwargs))
         # Override the https adapter.
-        self.mount("https://", HTTPAdapter(server_hostname))
+        self.mount("https://", HTTPAdapter(server_hostname, **adapter_kwargs))
+
+
+_sessions = {}  # type: Dict[Tuple[str, str, Any, Optional[str]], Session]
+_sessions_lock = threading.Lock()
+
+
+def _get_session(url: str, verify: Any, server_hostname: Optional[str]) -> Session:
+    parsed = parse.urlparse(url)
+    key = (parsed.scheme, parsed.netloc, verify, server_hostname)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = Session(server_hostname, _pool_size())
+            _sessions[key] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close every pooled connection to the master."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
 
 
 def request(method: str, url: str, **kwargs: Any) -> requests.Response:
     server_hostname = kwargs.pop("server_hostname", None)
-    with Session(server_hostname) as session:
-        return session.request(method=method, url=url, **kwargs)
+    session = _get_session(url, kwargs.get("verify"), server_hostname)
+    return session.request(method=method, url=url, **kwargs)
@@ -1,11 +1,92 @@
-from typing import Any, Dict, List, Optional
+import collections
+import hashlib
+import json
+import numbers
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import jsonschema
 
 from determined_common.schemas import extensions, util
 from determined_common.schemas.expconf import _v1_gen
 
+# The number of validated configs whose errors are remembered by validation_errors().
+VALIDATION_MEMO_SIZE = 256
+
+_v1_validator_cls = None  # type: Any
 _v1_validators = {}  # type: Dict[str, Any]
+_v1_memo = collections.OrderedDict()  # type: collections.OrderedDict
+
+
+def _ref(validator: Any, ref: str, instance: Any, schema: Any) -> Iterator:
+    """
+    Every $ref of the v1 schemas names a whole schema by its absolute URL, so look the schema up
+    directly rather than resolving the reference against the current scope every time.
+    """
+    resolved = _v1_gen.schemas.get(ref)
+    if resolved is None:
+        yield from jsonschema.Draft7Validator.VALIDATORS["$ref"](validator, ref, instance, schema)
+        return
+
+    validator.resolver.push_scope(ref)
+    try:
+        yield from validator.descend(instance, resolved)
+    finally:
+        validator.resolver.pop_scope()
+
+
+def _is_number(checker: Any, instance: Any) -> bool:
+    return isinstance(instance, numbers.Number) and not isinstance(instance, bool)
+
+
+def _is_integer(checker: Any, instance: Any) -> bool:
+    if isinstance(instance, float):
+        return instance.is_integer()
+    return isinstance(instance, int) and not isinstance(instance, bool)
+
+
+# The Draft7 type checks, which V1Validator looks up in a plain dict.
+_type_checks = {
+    "array": lambda checker, instance: isinstance(instance, list),
+    "boolean": lambda checker, instance: isinstance(instance, bool),
+    "integer": _is_integer,
+    "null": lambda checker, instance: instance is None,
+    "number": _is_number,
+    "object": lambda checker, instance: isinstance(instance, dict),
+    "string": lambda checker, instance: isinstance(instance, str),
+}  # type: Dict[str, Callable[[Any, Any], bool]]
+
+
+def _v1_validator_class() -> Any:
+    """
+    Build the validator class for the v1 schemas once: Draft7 with the custom extensions, a
+    direct lookup for $ref, and type checks which skip the persistent-map lookups of the default
+    TypeChecker.
+    """
+    global _v1_validator_cls
+    if _v1_validator_cls is not None:
+        return _v1_validator_cls
+
+    ext = {
+        "$ref": _ref,
+        "disallowProperties": extensions.disallowProperties,
+        "union": extensions.union,
+        "checks": extensions.checks,
+        "compareProperties": extensions.compareProperties,
+        "conditional": extensions.conditional,
+        "eventuallyRequired": extensions.eventuallyRequired,
+    }
+    type_checker = jsonschema.Draft7Validator.TYPE_CHECKER.redefine_many(_type_checks)
+    base = jsonschema.validators.extend(jsonschema.Draft7Validator, ext, type_checker=type_checker)
+
+    class V1Validator(base):  # type: ignore
+        def is_type(self, instance: Any, type: str) -> bool:
+            fn = _type_checks.get(type)
+            if fn is None:
+                return bool(super().is_type(instance, type))
+            return fn(self.TYPE_CHECKER, instance)
+
+    _v1_validator_cls = V1Validator
+    return _v1_validator_cls
 
 
 def v1_validator(url: Optional[str] = None) -> Any:
@@ -25,22 +106,40 @@ def v1_validator(url: Optional[str] = None) -> Any:
         handlers={"http": lambda url: _v1_gen.schemas[url]},
     )
 
-    validator = jsonschema.Draft7Validator(schema=schema, resolver=resolver)
-    ext = {
-        "disallowProperties": extensions.disallowProperties,
-        "union": extensions.union,
-        "checks": extensions.checks,
-        "compareProperties": extensions.compareProperties,
-        "conditional": extensions.conditional,
-        "eventuallyRequired": extensions.eventuallyRequired,
-    }
-    cls = jsonschema.validators.extend(validator, ext)
+    cls = _v1_validator_class()
     _v1_validators[url] = cls(schema=schema, resolver=resolver)
 
     return _v1_validators[url]
 
 
+def _memo_key(instance: Any, url: str) -> Optional[Tuple[str, str]]:
+    """
+    Key a config by the hash of its canonical JSON encoding, or return None if the encoding does
+    not represent the config exactly (e.g., tuples or non-string keys, which validate differently
+    than the lists and strings they are encoded as).
+    """
+    try:
+        text = json.dumps(instance, sort_keys=True)
+        if json.loads(text) != instance:
+            return None
+    except (TypeError, ValueError):
+        return None
+    return url, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 def validation_errors(instance: Any, url: Optional[str] = None) -> List[str]:
     validator = v1_validator(url)
-    errors = validator.iter_errors(instance)
-    return util.format_validation_errors(errors)
+
+    # The CLI and the harness validate the same configs repeatedly.
+    key = _memo_key(instance, validator.resolver.base_uri)
+    if key is not None and key in _v1_memo:
+        _v1_memo.move_to_end(key)
+        return list(_v1_memo[key])
+
+    errors = util.format_validation_errors(validator.iter_errors(instance))
+
+    if key is not None:
+        _v1_memo[key] = tuple(errors)
+        if len(_v1_memo) > VALIDATION_MEMO_SIZE:
+            _v1_memo.popitem(last=False)
+    return errors
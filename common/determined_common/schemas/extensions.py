@@ -4,6 +4,19 @@ from typing import Any, Dict, Iterator, List
 import jsonschema
 
 
+def _has_errors(errors: Iterator[jsonschema.ValidationError]) -> bool:
+    """
+    Check whether a validation produced any error without computing the others, e.g., for a
+    subschema whose errors are never shown. The generator is closed right away so that the
+    resolver scope stack is unwound in order.
+    """
+    try:
+        return next(errors, None) is not None
+    finally:
+        # mypy does not know that the errors are generated.
+        errors.close()  # type: ignore
+
+
 def disallowProperties(
     validator: jsonschema.Draft7Validator, disallowed: Dict, instance: Any, schema: Dict
 ) -> Iterator[jsonschema.ValidationError]:
@@ -80,11 +93,11 @@ def union(
     valid = []
 
     for idx, item in enumerate(det_one_of["items"]):
-        errors = list(validator.descend(instance, schema=item, schema_path=idx))
-        if errors:
+        if _has_errors(validator.descend(instance, schema=item, schema_path=idx)):
             key = item["unionKey"]
             if not selected_errors and _evaluate_unionKey(key, instance):
-                selected_errors = errors
+                # Only the errors of the selected subschema are reported.
+                selected_errors = list(validator.descend(instance, schema=item, schema_path=idx))
         else:
             valid.append(item)
 
@@ -177,8 +190,7 @@ def checks(
         }
     """
     for msg, subschema in schema["checks"].items():
-        errors = list(validator.descend(instance, schema=subschema))
-        if errors:
+        if _has_errors(validator.descend(instance, schema=subschema)):
             yield jsonschema.ValidationError(msg)
 
 
@@ -286,12 +298,12 @@ def conditional(
     enforce = conditional["enforce"]
 
     if when is not None:
-        if list(validator.descend(instance, schema=when, schema_path="when")):
+        if _has_errors(validator.descend(instance, schema=when, schema_path="when")):
             # "when" clause failed, return early.
             return
     else:
         assert unless is not None, "invalid schema"
-        if not list(validator.descend(instance, schema=unless, schema_path="unless")):
+        if not _has_errors(validator.descend(instance, schema=unless, schema_path="unless")):
             # "unless" clause passed, returned early.
             return
 
@@ -6,12 +6,16 @@ from typing import Any, Dict, Optional, Type
 from determined_common.check import check_eq, check_in, check_type
 
 from .base import StorageManager, StorageMetadata
+from .cache import CheckpointCache
+from .content_addressed import ContentAddressedStorageManager
 from .gcs import GCSStorageManager
 from .hdfs import HDFSStorageManager
 from .s3 import S3StorageManager
 from .shared import SharedFSStorageManager
 
 __all__ = [
+    "CheckpointCache",
+    "ContentAddressedStorageManager",
     "GCSStorageManager",
     "StorageManager",
     "StorageMetadata",
@@ -53,6 +57,7 @@ def build(config: Dict[str, Any], container_path: Optional[str]) -> StorageManag
     config.pop("save_experiment_best", None)
     config.pop("save_trial_best", None)
     config.pop("save_trial_latest", None)
+    content_addressed = config.pop("content_addressed", None)
 
     # For shared_fs maintain backwards compatibility by folding old keys into
     # storage_path.
@@ -66,12 +71,16 @@ def build(config: Dict[str, Any], container_path: Optional[str]) -> StorageManag
     config.pop("checkpoint_path", None)
 
     try:
-        return subclass.from_config(config, container_path)
+        manager = subclass.from_config(config, container_path)
     except TypeError as e:
         raise TypeError(
             "Failed to instantiate {} checkpoint storage: {}".format(identifier, str(e))
         )
 
+    if content_addressed:
+        return ContentAddressedStorageManager(manager)
+    return manager
+
 
 def validate_manager(manager: StorageManager) -> None:
     """
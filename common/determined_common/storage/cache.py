@@ -0,0 +1,271 @@
+import contextlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import IO, Any, Iterator, List, Optional, Tuple
+
+import simplejson
+
+from determined_common import check, util
+from determined_common.storage.base import StorageManager, StorageMetadata
+from determined_common.storage.content_addressed import ContentAddressedStorageManager
+from determined_common.storage.gcs import GCSStorageManager
+from determined_common.storage.s3 import S3StorageManager
+
+try:
+    import fcntl
+
+    _HAVE_FCNTL = True
+except ImportError:
+    # File locking is only available on POSIX systems; elsewhere the cache is only safe to use
+    # from a single process at a time.
+    _HAVE_FCNTL = False
+
+CACHE_DIR_ENV_VAR = "DET_CHECKPOINT_CACHE_DIR"
+CACHE_MAX_SIZE_ENV_VAR = "DET_CHECKPOINT_CACHE_MAX_SIZE"
+
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+_INDEX_LOCK_NAME = ".cache.lock"
+_TMP_PREFIX = ".tmp-"
+_ENTRY_SUFFIX = ".entry"
+_LOCK_SUFFIX = ".lock"
+_DOWNLOAD_LOCK_SUFFIX = ".download.lock"
+
+
+def _lock(f: IO[Any], shared: bool = False, blocking: bool = True) -> bool:
+    """Lock an open file; return False if `blocking` is False and the lock is held elsewhere."""
+    if not _HAVE_FCNTL:
+        return True
+    op = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    if not blocking:
+        op |= fcntl.LOCK_NB
+    try:
+        fcntl.flock(f, op)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock(f: IO[Any]) -> None:
+    if _HAVE_FCNTL:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _is_current(f: IO[Any], path: str) -> bool:
+    """Return whether an open file is still the file at `path`."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+@contextlib.contextmanager
+def _locked(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold a lock on the lock file at `path`, creating it if needed. Lock files are removed when
+    their checkpoint is evicted; if that happens while waiting for the lock, the lock is taken
+    again on the new file at `path`.
+    """
+    while True:
+        with open(path, "a") as f:
+            _lock(f, shared=shared)
+            try:
+                if _is_current(f, path):
+                    yield
+                    return
+            finally:
+                _unlock(f)
+
+
+class CheckpointCache:
+    """
+    CheckpointCache keeps recently restored checkpoints in a node-local directory so that
+    restoring the same checkpoint again (after a trial restart, or from the experimental Python
+    API) does not download it from checkpoint storage again.
+
+    Checkpoints are cached by storage_id. When the total size of the cache would exceed
+    `max_size` bytes, the least recently used checkpoints are evicted first. Every cached
+    checkpoint is checked against the file sizes in StorageMetadata.resources before it is used
+    and is downloaded again if it is incomplete or has been modified.
+
+    The cache directory may be shared by several processes or containers on the same machine:
+    checkpoints which are in use hold a shared lock file and are never evicted, and concurrent
+    downloads of the same checkpoint are serialized by a second lock file. Cached checkpoints must
+    be treated as read-only.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        check.gt(len(cache_dir), 0, "cache_dir must not be empty")
+        check.gt(max_size, 0, "max_size must be greater than 0")
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    @staticmethod
+    def from_env() -> Optional["CheckpointCache"]:
+        """
+        Return the cache configured by the DET_CHECKPOINT_CACHE_DIR and
+        DET_CHECKPOINT_CACHE_MAX_SIZE environment variables, or None if caching is disabled.
+        """
+        cache_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+        if not cache_dir:
+            return None
+        max_size = os.environ.get(CACHE_MAX_SIZE_ENV_VAR)
+        return CheckpointCache(cache_dir, int(max_size) if max_size else DEFAULT_MAX_SIZE)
+
+    @staticmethod
+    def is_supported(manager: StorageManager) -> bool:
+        """Return whether restoring checkpoints from `manager` can be cached."""
+        # Checkpoints on a shared file system are already local; there is nothing to gain from
+        # copying them into the cache.
+        return isinstance(
+            manager, (S3StorageManager, GCSStorageManager, ContentAddressedStorageManager)
+        )
+
+    def _entry_dir(self, storage_id: str) -> str:
+        return os.path.join(self.cache_dir, storage_id)
+
+    def _entry_path(self, storage_id: str) -> str:
+        return os.path.join(self.cache_dir, storage_id + _ENTRY_SUFFIX)
+
+    def _lock_path(self, storage_id: str) -> str:
+        return os.path.join(self.cache_dir, storage_id + _LOCK_SUFFIX)
+
+    def _download_lock_path(self, storage_id: str) -> str:
+        return os.path.join(self.cache_dir, storage_id + _DOWNLOAD_LOCK_SUFFIX)
+
+    @staticmethod
+    def _size(metadata: StorageMetadata) -> int:
+        return sum(metadata.resources.values())
+
+    def _is_valid(self, metadata: StorageMetadata) -> bool:
+        """Check that a cached checkpoint contains every resource with its recorded size."""
+        if not os.path.exists(self._entry_path(metadata.storage_id)):
+            return False
+
+        entry_dir = self._entry_dir(metadata.storage_id)
+        for rel_path, size in metadata.resources.items():
+            abs_path = os.path.join(entry_dir, rel_path)
+            if rel_path.endswith("/"):
+                if not os.path.isdir(abs_path):
+                    return False
+            elif not os.path.isfile(abs_path) or os.path.getsize(abs_path) != size:
+                return False
+        return True
+
+    def _remove(self, storage_id: str) -> None:
+        # Remove the entry file first so that a partially removed directory is never mistaken
+        # for a valid cached checkpoint.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._entry_path(storage_id))
+        shutil.rmtree(self._entry_dir(storage_id), ignore_errors=True)
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """Return (last use time, storage_id, size) for every cached checkpoint."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path) as f:
+                    size = simplejson.load(f)["size"]
+                last_used = os.path.getmtime(path)
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((last_used, name[: -len(_ENTRY_SUFFIX)], size))
+        return entries
+
+    def _make_room(self, storage_id: str, size: int) -> None:
+        """Evict least recently used checkpoints until `size` more bytes fit in the cache."""
+        with open(os.path.join(self.cache_dir, _INDEX_LOCK_NAME), "a") as index_lock:
+            _lock(index_lock)
+            try:
+                entries = sorted(self._entries())
+                total = sum(entry_size for _, _, entry_size in entries)
+                for _, other_id, entry_size in entries:
+                    if total + size <= self.max_size:
+                        break
+                    if other_id == storage_id:
+                        continue
+                    lock_path = self._lock_path(other_id)
+                    with open(lock_path, "a") as entry_lock:
+                        # Checkpoints which are being restored or used hold their lock; skip them.
+                        if not _lock(entry_lock, blocking=False):
+                            continue
+                        try:
+                            logging.info("Evicting checkpoint {} from cache".format(other_id))
+                            self._remove(other_id)
+                            total -= entry_size
+                            # Processes waiting for these locks notice that they were removed and
+                            # lock the new files instead.
+                            with contextlib.suppress(FileNotFoundError):
+                                os.remove(self._download_lock_path(other_id))
+                            os.remove(lock_path)
+                        finally:
+                            _unlock(entry_lock)
+            finally:
+                _unlock(index_lock)
+
+    def _fetch(self, manager: Any, metadata: StorageMetadata) -> None:
+        storage_id = metadata.storage_id
+        self._remove(storage_id)
+        self._make_room(storage_id, self._size(metadata))
+
+        # Download into a temporary directory which is renamed into place once complete, so a
+        # crash in the middle of a download never leaves a partial checkpoint behind.
+        tmp_dir = os.path.join(self.cache_dir, "{}{}".format(_TMP_PREFIX, uuid.uuid4()))
+        os.makedirs(tmp_dir)
+        try:
+            manager.download(metadata, tmp_dir)
+            os.rename(tmp_dir, self._entry_dir(storage_id))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        with open(self._entry_path(storage_id), "w") as f:
+            simplejson.dump({"size": self._size(metadata)}, f)
+
+    @contextlib.contextmanager
+    def restore_path(self, manager: StorageManager, metadata: StorageMetadata) -> Iterator[str]:
+        """
+        Like manager.restore_path(), but yield the path of a cached copy of the checkpoint,
+        downloading it first if it is not cached yet. Checkpoints which cannot be cached are
+        restored by `manager` directly.
+        """
+        if not self.is_supported(manager) or self._size(metadata) > self.max_size:
+            with manager.restore_path(metadata) as path:
+                yield path
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        storage_id = metadata.storage_id
+        # Readers share the lock so that any number of processes can use a cached checkpoint at
+        # once; evicting a checkpoint needs the lock exclusively.
+        with _locked(self._lock_path(storage_id), shared=True):
+            if self._is_valid(metadata):
+                logging.info("Restoring checkpoint {} from cache".format(storage_id))
+            else:
+                # Downloads take a separate lock, so the checkpoint stays protected from eviction
+                # from the moment it is downloaded until it is no longer used.
+                with _locked(self._download_lock_path(storage_id)):
+                    # Another process may have cached the checkpoint while we waited.
+                    if not self._is_valid(metadata):
+                        start = time.time()
+                        self._fetch(manager, metadata)
+                        logging.info(
+                            "Cached checkpoint {} ({}) in {:.2f}s".format(
+                                storage_id,
+                                util.sizeof_fmt(self._size(metadata)),
+                                time.time() - start,
+                            )
+                        )
+
+            # Record the use for LRU eviction. Pass the time explicitly; the default is the
+            # coarse-grained file system clock.
+            now = time.time()
+            os.utime(self._entry_path(storage_id), (now, now))
+
+            yield self._entry_dir(storage_id)
@@ -0,0 +1,401 @@
+import abc
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+import botocore.exceptions
+import google.api_core.exceptions
+import simplejson
+
+from determined_common import check, util
+from determined_common.storage import transfer
+from determined_common.storage.base import StorageManager, StorageMetadata
+from determined_common.storage.gcs import GCSStorageManager, retry_network_errors
+from determined_common.storage.s3 import S3StorageManager
+from determined_common.storage.shared import SharedFSStorageManager
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+MANIFEST_NAME = "cas_manifest.json"
+MANIFEST_VERSION = 1
+
+BLOBS_PREFIX = "cas/blobs"
+REFS_PREFIX = "cas/refs"
+TOMBSTONES_PREFIX = "cas/tombstones"
+
+# Uploads wait at most this long for a chunk which is being deleted; a tombstone which is older
+# is assumed to be left behind by a delete which has failed.
+TOMBSTONE_TIMEOUT_SECONDS = 60.0
+TOMBSTONE_POLL_SECONDS = 0.5
+
+
+class _BlobStore(metaclass=abc.ABCMeta):
+    """
+    _BlobStore is the minimal key-value interface that content-addressed storage needs from a
+    storage backend. Keys are "/"-separated paths relative to the root of the backend.
+    """
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete a key; deleting a key which does not exist is not an error."""
+        pass
+
+    @abc.abstractmethod
+    def list(self, prefix: str) -> List[str]:
+        """Return the keys which start with `prefix`."""
+        pass
+
+
+class _SharedFSBlobStore(_BlobStore):
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so that readers never see a partially written blob.
+        tmp_path = "{}.{}.tmp".format(path, uuid.uuid4())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(key))
+
+    def list(self, prefix: str) -> List[str]:
+        directory = self._path(prefix)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(prefix, name) for name in os.listdir(directory)]
+
+
+class _S3BlobStore(_BlobStore):
+    def __init__(self, client: Any, bucket: str) -> None:
+        self.client = client
+        self.bucket = bucket
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+        return True
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        return cast(bytes, self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read())
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, prefix: str) -> List[str]:
+        keys = []  # type: List[str]
+        kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            keys.extend(obj["Key"] for obj in response.get("Contents", []))
+            if not response.get("IsTruncated"):
+                return keys
+            kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+class _GCSBlobStore(_BlobStore):
+    def __init__(self, bucket: Any) -> None:
+        self.bucket = bucket
+
+    def exists(self, key: str) -> bool:
+        return bool(self.bucket.blob(key).exists())
+
+    def put(self, key: str, data: bytes) -> None:
+        retry_network_errors(self.bucket.blob(key).upload_from_string)(data)
+
+    def get(self, key: str) -> bytes:
+        return cast(bytes, self.bucket.blob(key).download_as_string())
+
+    def delete(self, key: str) -> None:
+        with contextlib.suppress(google.api_core.exceptions.NotFound):
+            self.bucket.blob(key).delete()
+
+    def list(self, prefix: str) -> List[str]:
+        return [blob.name for blob in self.bucket.list_blobs(prefix=prefix)]
+
+
+def _blob_key(digest: str) -> str:
+    return "{}/{}/{}".format(BLOBS_PREFIX, digest[:2], digest)
+
+
+def _ref_key(digest: str, storage_id: str) -> str:
+    return "{}/{}/{}".format(REFS_PREFIX, digest, storage_id)
+
+
+def _tombstone_key(digest: str, storage_id: str) -> str:
+    return "{}/{}/{}".format(TOMBSTONES_PREFIX, digest, storage_id)
+
+
+def _manifest_key(storage_id: str) -> str:
+    return "{}/{}".format(storage_id, MANIFEST_NAME)
+
+
+class ContentAddressedStorageManager(StorageManager):
+    """
+    Store checkpoints in a content-addressed layout on top of a shared_fs, S3, or GCS storage
+    manager.
+
+    Every file of a checkpoint is split into chunks of `chunk_size` bytes and each chunk is
+    stored once, under its SHA-256 digest, no matter how many checkpoints contain it. Chunks that
+    already exist in storage are not uploaded again, so unchanged model code and frozen weights
+    only cost storage and upload bandwidth the first time they are saved. The list of chunks that
+    make up each file is written to a manifest under the checkpoint's storage_id.
+
+    Each checkpoint which references a chunk holds a reference marker next to it; deleting a
+    checkpoint removes its markers and then deletes the chunks which are no longer referenced.
+    Before deleting a chunk, the delete writes a tombstone for it and checks for references
+    again, and uploads wait for the tombstones of a chunk to disappear before checking whether
+    the chunk is stored, so a chunk is never deleted after an upload has decided to reuse it.
+    """
+
+    def __init__(
+        self,
+        manager: StorageManager,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        check.gt(chunk_size, 0, "chunk_size must be greater than 0")
+
+        if isinstance(manager, SharedFSStorageManager):
+            # Stage checkpoints locally so that only new chunks are written to the shared file
+            # system.
+            base_path = tempfile.gettempdir()
+            self._store = _SharedFSBlobStore(manager._base_path)  # type: _BlobStore
+        elif isinstance(manager, S3StorageManager):
+            base_path = manager._base_path
+            self._store = _S3BlobStore(manager.client, manager.bucket)
+            if max_concurrency is None:
+                max_concurrency = manager.max_concurrency
+        elif isinstance(manager, GCSStorageManager):
+            base_path = manager._base_path
+            self._store = _GCSBlobStore(manager.bucket)
+        else:
+            raise TypeError(
+                "Content-addressed storage is not supported for {}".format(type(manager).__name__)
+            )
+
+        super().__init__(base_path)
+        self.manager = manager
+        self.chunk_size = chunk_size
+        self.max_concurrency = (
+            max_concurrency if max_concurrency is not None else transfer.DEFAULT_MAX_CONCURRENCY
+        )
+
+    def _chunk_file(self, path: str) -> Iterator[Tuple[int, bytes]]:
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    return
+                yield offset, data
+                offset += len(data)
+
+    def _build_manifest(
+        self, storage_dir: str, metadata: StorageMetadata
+    ) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, int, int]]]:
+        """
+        Hash every file of a checkpoint. Return the manifest and, for every distinct chunk, the
+        file, offset, and length where the chunk can be read from.
+        """
+        files = {}  # type: Dict[str, List[str]]
+        locations = {}  # type: Dict[str, Tuple[str, int, int]]
+        for rel_path in metadata.resources:
+            if rel_path.endswith("/"):
+                continue
+            digests = []
+            for offset, data in self._chunk_file(os.path.join(storage_dir, rel_path)):
+                digest = hashlib.sha256(data).hexdigest()
+                digests.append(digest)
+                locations.setdefault(digest, (rel_path, offset, len(data)))
+            files[rel_path] = digests
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "chunk_size": self.chunk_size,
+            "resources": metadata.resources,
+            "files": files,
+        }
+        return manifest, locations
+
+    def _get_manifest(self, storage_id: str) -> Dict[str, Any]:
+        manifest = simplejson.loads(self._store.get(_manifest_key(storage_id)))
+        check.eq(
+            manifest["version"],
+            MANIFEST_VERSION,
+            "Unsupported manifest version for checkpoint {}".format(storage_id),
+        )
+        return cast(Dict[str, Any], manifest)
+
+    def _wait_for_tombstones(self, digest: str) -> None:
+        """Wait until no checkpoint delete is deleting a chunk."""
+        prefix = "{}/{}/".format(TOMBSTONES_PREFIX, digest)
+        deadline = time.time() + TOMBSTONE_TIMEOUT_SECONDS
+        while True:
+            tombstones = self._store.list(prefix)
+            if not tombstones:
+                return
+            if time.time() >= deadline:
+                # Deletes give up on a chunk before this deadline, so the tombstones are stale.
+                logging.warning("Removing stale tombstones of chunk {}".format(digest))
+                for key in tombstones:
+                    self._store.delete(key)
+                return
+            time.sleep(TOMBSTONE_POLL_SECONDS)
+
+    def post_store_path(self, storage_id: str, storage_dir: str, metadata: StorageMetadata) -> None:
+        """post_store_path uploads the new chunks of a checkpoint and deletes the original files."""
+        try:
+            logging.info("Storing checkpoint {} as content-addressed chunks".format(storage_id))
+            self.upload(metadata, storage_dir)
+        finally:
+            self._remove_checkpoint_directory(metadata.storage_id)
+
+    @contextlib.contextmanager
+    def restore_path(self, metadata: StorageMetadata) -> Iterator[str]:
+        storage_dir = os.path.join(self._base_path, metadata.storage_id)
+        os.makedirs(storage_dir, exist_ok=True)
+
+        logging.info("Restoring content-addressed checkpoint {}".format(metadata.storage_id))
+        self.download(metadata, storage_dir)
+
+        try:
+            yield storage_dir
+        finally:
+            self._remove_checkpoint_directory(metadata.storage_id)
+
+    @util.preserve_random_state
+    def upload(self, metadata: StorageMetadata, storage_dir: str) -> None:
+        manifest, locations = self._build_manifest(storage_dir, metadata)
+        chunk_sizes = {digest: length for digest, (_, _, length) in locations.items()}
+
+        # Reference markers are written before checking which chunks are stored, so that a
+        # concurrent delete of another checkpoint either sees the marker and keeps the chunk, or
+        # has written its tombstone already; see release() in delete().
+        def add_ref(digest: str) -> None:
+            self._store.put(_ref_key(digest, metadata.storage_id), b"")
+
+        transfer.transfer_files(chunk_sizes, add_ref, self.max_concurrency)
+
+        uploaded = {}  # type: Dict[str, int]
+
+        def upload_chunk(digest: str) -> None:
+            key = _blob_key(digest)
+            self._wait_for_tombstones(digest)
+            if self._store.exists(key):
+                return
+            rel_path, offset, length = locations[digest]
+            with open(os.path.join(storage_dir, rel_path), "rb") as f:
+                f.seek(offset)
+                self._store.put(key, f.read(length))
+            uploaded[digest] = length
+
+        stats = transfer.transfer_files(chunk_sizes, upload_chunk, self.max_concurrency)
+        self._store.put(_manifest_key(metadata.storage_id), simplejson.dumps(manifest).encode())
+
+        logging.info(
+            "Stored checkpoint {}: uploaded {} of {} chunks ({}), skipped {} already stored "
+            "in {:.2f}s".format(
+                metadata.storage_id,
+                len(uploaded),
+                len(chunk_sizes),
+                util.sizeof_fmt(sum(uploaded.values())),
+                util.sizeof_fmt(sum(chunk_sizes.values()) - sum(uploaded.values())),
+                stats.seconds,
+            )
+        )
+
+    @util.preserve_random_state
+    def download(self, metadata: StorageMetadata, storage_dir: str) -> None:
+        manifest = self._get_manifest(metadata.storage_id)
+        files = manifest["files"]  # type: Dict[str, List[str]]
+        # Only restore the requested resources, e.g., those missing from a partial download.
+        resources = {
+            rel_path: size
+            for rel_path, size in manifest["resources"].items()
+            if rel_path in metadata.resources
+        }
+
+        for rel_path in resources:
+            os.makedirs(os.path.dirname(os.path.join(storage_dir, rel_path)), exist_ok=True)
+
+        def download_file(rel_path: str) -> None:
+            with open(os.path.join(storage_dir, rel_path), "wb") as f:
+                for digest in files[rel_path]:
+                    f.write(self._store.get(_blob_key(digest)))
+
+        stats = transfer.transfer_files(resources, download_file, self.max_concurrency)
+        logging.info("Restored checkpoint {}: {}".format(metadata.storage_id, stats))
+
+    @util.preserve_random_state
+    def delete(self, metadata: StorageMetadata) -> None:
+        logging.info("Deleting content-addressed checkpoint {}".format(metadata.storage_id))
+
+        manifest = self._get_manifest(metadata.storage_id)
+        digests = {digest for chunks in manifest["files"].values() for digest in chunks}
+
+        def release(digest: str) -> None:
+            refs_prefix = "{}/{}/".format(REFS_PREFIX, digest)
+            self._store.delete(_ref_key(digest, metadata.storage_id))
+            if self._store.list(refs_prefix):
+                return
+
+            # An upload which adds a reference after the check below finds the tombstone and
+            # waits for it to be removed, and then uploads the chunk again.
+            tombstone = _tombstone_key(digest, metadata.storage_id)
+            start = time.time()
+            self._store.put(tombstone, b"")
+            try:
+                if self._store.list(refs_prefix):
+                    return
+                if time.time() - start > TOMBSTONE_TIMEOUT_SECONDS / 2:
+                    # Uploads may stop waiting for the tombstone soon; leave the chunk in storage
+                    # rather than deleting it from under them.
+                    logging.warning("Not deleting chunk {}: timed out".format(digest))
+                    return
+                logging.debug("Deleting unreferenced chunk {}".format(digest))
+                self._store.delete(_blob_key(digest))
+            finally:
+                self._store.delete(tombstone)
+
+        transfer.transfer_files({d: 0 for d in digests}, release, self.max_concurrency)
+        self._store.delete(_manifest_key(metadata.storage_id))
@@ -10,6 +10,7 @@ from google.api_core import retry
 from google.cloud import storage
 
 from determined_common import util
+from determined_common.storage import transfer
 from determined_common.storage.base import StorageManager, StorageMetadata
 
 retry_network_errors = retry.Retry(
@@ -29,8 +30,8 @@ class GCSStorageManager(StorageManager):
 
     Batching is supported by the GCS API for deletion, however it is not used because
     of observed request failures. Batching is not used for uploading
-    or downloading files, because the GCS API does not support it. Upload/download
-    performance could be improved by using multiple clients in a multithreaded fashion.
+    or downloading files, because the GCS API does not support it. Instead, the files of a
+    checkpoint are downloaded concurrently by a pool of threads.
 
     Authentication is currently only supported via the "Application
     Default Credentials" method in GCP [1]. Typical configuration:
@@ -83,21 +84,26 @@ class GCSStorageManager(StorageManager):
 
     @util.preserve_random_state
     def download(self, metadata: StorageMetadata, storage_dir: str) -> None:
+        # Create every directory up front so that concurrent downloads never race on makedirs.
+        # Only create empty directory for keys that end with "/".
+        # See `upload` method for more context.
         for rel_path in metadata.resources.keys():
             abs_path = os.path.join(storage_dir, rel_path)
             os.makedirs(os.path.dirname(abs_path), exist_ok=True)
 
-            # Only create empty directory for keys that end with "/".
-            # See `upload` method for more context.
-            if rel_path.endswith("/"):
-                continue
-
+        def download_file(rel_path: str) -> None:
             blob_name = "{}/{}".format(metadata.storage_id, rel_path)
             blob = self.bucket.blob(blob_name)
 
             logging.debug("Downloading from GCS: {}".format(blob_name))
 
-            blob.download_to_filename(abs_path)
+            abs_path = os.path.join(storage_dir, rel_path)
+            retry_network_errors(blob.download_to_filename)(abs_path)
+
+        stats = transfer.transfer_files(
+            metadata.resources, download_file, transfer.DEFAULT_MAX_CONCURRENCY
+        )
+        logging.info("Downloaded checkpoint {} from GCS: {}".format(metadata.storage_id, stats))
 
     @util.preserve_random_state
     def delete(self, metadata: StorageMetadata) -> None:
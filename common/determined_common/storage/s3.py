@@ -6,14 +6,22 @@ from typing import Iterator, Optional
 
 import boto3
 import requests
+from boto3.s3.transfer import TransferConfig
 
 from determined_common import util
+from determined_common.storage import transfer
 from determined_common.storage.base import StorageManager, StorageMetadata
 
 
 class S3StorageManager(StorageManager):
     """
     Store and load checkpoints from S3.
+
+    The files of a checkpoint are transferred concurrently by a pool of at most
+    `max_concurrency` threads. Files larger than `multipart_chunk_size` bytes are split into
+    parts which are transferred in parallel as well; the threads available to a single file are
+    scaled down as more files are in flight so that the total number of concurrent requests stays
+    bounded by `max_concurrency`.
     """
 
     def __init__(
@@ -23,9 +31,19 @@ class S3StorageManager(StorageManager):
         secret_key: Optional[str] = None,
         endpoint_url: Optional[str] = None,
         temp_dir: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        multipart_chunk_size: Optional[int] = None,
     ) -> None:
         super().__init__(temp_dir if temp_dir is not None else tempfile.gettempdir())
         self.bucket = bucket
+        self.max_concurrency = (
+            max_concurrency if max_concurrency is not None else transfer.DEFAULT_MAX_CONCURRENCY
+        )
+        self.multipart_chunk_size = (
+            multipart_chunk_size
+            if multipart_chunk_size is not None
+            else TransferConfig().multipart_chunksize
+        )
         self.client = boto3.client(
             "s3",
             endpoint_url=endpoint_url,
@@ -69,47 +87,72 @@ class S3StorageManager(StorageManager):
         finally:
             self._remove_checkpoint_directory(metadata.storage_id)
 
+    def _transfer_config(self, metadata: StorageMetadata) -> TransferConfig:
+        """
+        Build the per-file boto3 transfer configuration for a checkpoint, splitting the
+        concurrency budget between the files transferred in parallel and the parts of each file.
+        """
+        num_files = sum(1 for rel_path in metadata.resources if not rel_path.endswith("/"))
+        files_in_flight = max(1, min(self.max_concurrency, num_files))
+        return TransferConfig(
+            multipart_threshold=self.multipart_chunk_size,
+            multipart_chunksize=self.multipart_chunk_size,
+            max_concurrency=max(1, self.max_concurrency // files_in_flight),
+        )
+
     @util.preserve_random_state
     def upload(self, metadata: StorageMetadata, storage_dir: str) -> None:
         for rel_path in metadata.resources.keys():
+            if not rel_path.endswith("/"):
+                continue
+
             key_name = "{}/{}".format(metadata.storage_id, rel_path)
-            url = "s3://{}/{}".format(self.bucket, key_name)
-
-            logging.debug("Uploading {} to {}".format(rel_path, url))
-
-            if rel_path.endswith("/"):
-                # Create empty S3 keys for each subdirectory to mimic what the S3 console does to
-                # represent empty directories.
-                if not self._use_minio_workaround:
-                    self.client.put_object(Bucket=self.bucket, Key=key_name, Body=b"")
-                else:
-                    # boto3 will puke on the following MinIO response if you ever create a
-                    # directory by uploading an empty blob.  Uploading a normal file in the
-                    # directory and then deleting it seems to cause MinIO to prune the empty
-                    # directory.  The AWS authentication scheme is complex and not worth the
-                    # effort for supporting empty directories, so... just ignore empty directories.
-                    pass
+            logging.debug("Uploading {} to s3://{}/{}".format(rel_path, self.bucket, key_name))
+
+            # Create empty S3 keys for each subdirectory to mimic what the S3 console does to
+            # represent empty directories.
+            if not self._use_minio_workaround:
+                self.client.put_object(Bucket=self.bucket, Key=key_name, Body=b"")
             else:
-                abs_path = os.path.join(storage_dir, rel_path)
-                self.client.upload_file(abs_path, self.bucket, key_name)
+                # boto3 will puke on the following MinIO response if you ever create a
+                # directory by uploading an empty blob.  Uploading a normal file in the
+                # directory and then deleting it seems to cause MinIO to prune the empty
+                # directory.  The AWS authentication scheme is complex and not worth the
+                # effort for supporting empty directories, so... just ignore empty directories.
+                pass
+
+        config = self._transfer_config(metadata)
+
+        def upload_file(rel_path: str) -> None:
+            key_name = "{}/{}".format(metadata.storage_id, rel_path)
+            logging.debug("Uploading {} to s3://{}/{}".format(rel_path, self.bucket, key_name))
+
+            abs_path = os.path.join(storage_dir, rel_path)
+            self.client.upload_file(abs_path, self.bucket, key_name, Config=config)
+
+        stats = transfer.transfer_files(metadata.resources, upload_file, self.max_concurrency)
+        logging.info("Uploaded checkpoint {} to S3: {}".format(metadata.storage_id, stats))
 
     @util.preserve_random_state
     def download(self, metadata: StorageMetadata, storage_dir: str) -> None:
+        # Create every directory up front so that concurrent downloads never race on makedirs.
+        # Only create empty directory for keys that end with "/". See `upload` method for more
+        # context.
         for rel_path in metadata.resources.keys():
             abs_path = os.path.join(storage_dir, rel_path)
-
             os.makedirs(os.path.dirname(abs_path), exist_ok=True)
 
-            # Only create empty directory for keys that end with "/".
-            # See `upload` method for more context.
-            if rel_path.endswith("/"):
-                continue
+        config = self._transfer_config(metadata)
 
+        def download_file(rel_path: str) -> None:
             key_name = "{}/{}".format(metadata.storage_id, rel_path)
-            url = "s3://{}/{}".format(self.bucket, key_name)
-            logging.debug("Downloading {} from {}".format(url, rel_path))
+            logging.debug("Downloading s3://{}/{} to {}".format(self.bucket, key_name, rel_path))
+
+            abs_path = os.path.join(storage_dir, rel_path)
+            self.client.download_file(self.bucket, key_name, abs_path, Config=config)
 
-            self.client.download_file(self.bucket, key_name, abs_path)
+        stats = transfer.transfer_files(metadata.resources, download_file, self.max_concurrency)
+        logging.info("Downloaded checkpoint {} from S3: {}".format(metadata.storage_id, stats))
 
     @util.preserve_random_state
     def delete(self, metadata: StorageMetadata) -> None:
@@ -0,0 +1,66 @@
+import concurrent.futures
+import time
+from typing import Callable, Dict
+
+from determined_common import check, util
+
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+class TransferStats:
+    """
+    The number of files, bytes, and wall-clock seconds spent moving the resources of one
+    checkpoint to or from a storage backend.
+    """
+
+    def __init__(self, num_files: int, num_bytes: int, seconds: float) -> None:
+        self.num_files = num_files
+        self.num_bytes = num_bytes
+        self.seconds = seconds
+
+    def throughput(self) -> float:
+        """Return the transfer rate in bytes per second."""
+        if self.seconds <= 0:
+            return 0.0
+        return self.num_bytes / self.seconds
+
+    def __str__(self) -> str:
+        return "{} files, {} in {:.2f}s ({}/s)".format(
+            self.num_files,
+            util.sizeof_fmt(self.num_bytes),
+            self.seconds,
+            util.sizeof_fmt(self.throughput()),
+        )
+
+
+def transfer_files(
+    resources: Dict[str, int], transfer_fn: Callable[[str], None], max_concurrency: int
+) -> TransferStats:
+    """
+    Call `transfer_fn` with the relative path of every file in `resources` using a pool of at
+    most `max_concurrency` threads. Directories (paths ending in "/") are skipped; callers which
+    need to materialize them should do so before calling this function.
+
+    The first exception raised by `transfer_fn` is re-raised after pending transfers have been
+    cancelled and running transfers have finished.
+    """
+    check.gt(max_concurrency, 0, "max_concurrency must be greater than 0")
+
+    files = [rel_path for rel_path in resources if not rel_path.endswith("/")]
+    start = time.time()
+
+    if files:
+        workers = min(max_concurrency, len(files))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(transfer_fn, rel_path) for rel_path in files]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    return TransferStats(
+        len(files), sum(resources[rel_path] for rel_path in files), time.time() - start
+    )
@@ -18,6 +18,8 @@ setup(
         # google-cloud-core 1.4.2 breaks our windows cli tests for python 3.5.
         "google-cloud-core<1.4.2",
         "hdfs>=2.2.2",
+        # The custom keywords of the experiment config schemas are written for jsonschema 3.
+        "jsonschema>=3.2.0,<4",
         "lomond>=0.3.3",
         "pathspec>=0.6.0",
         "ruamel.yaml>=0.15.78",
@@ -0,0 +1,112 @@
+"""
+Microbenchmark for validating experiment configs with many hyperparameters.
+
+The "full valid experiment" case of schemas/test_cases/v1/experiment.yaml is extended with
+`--hparams` hyperparameters, taken round-robin from the valid cases of hyperparameters.yaml. The
+benchmark reports the latency of validating it with a plain Draft7Validator extended with the
+custom keywords, with the v1 validator, and with the v1 validator on a config that has been
+validated before.
+
+Usage:
+
+    python -m tests.benchmarks.expconf_validation --hparams 10 100 1000
+"""
+import argparse
+import copy
+import os
+import time
+from typing import Any, Callable, List
+
+import jsonschema
+
+from determined_common import yaml
+from determined_common.schemas import extensions
+from determined_common.schemas.expconf import _v1_gen, _validate
+
+TEST_CASES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "schemas", "test_cases", "v1"
+)
+EXPERIMENT_URL = "http://determined.ai/schemas/expconf/v1/experiment.json"
+HYPERPARAMETER_URL = "http://determined.ai/schemas/expconf/v1/hyperparameter.json"
+
+
+def load_cases(name: str) -> List[Any]:
+    with open(os.path.join(TEST_CASES_PATH, name)) as f:
+        return list(yaml.safe_load(f))
+
+
+def make_config(num_hparams: int) -> Any:
+    config = next(c for c in load_cases("experiment.yaml") if c["name"] == "full valid experiment")
+    hparams = [
+        c["case"]
+        for c in load_cases("hyperparameters.yaml")
+        if HYPERPARAMETER_URL in c.get("matches", [])
+    ]
+    config = copy.deepcopy(config["case"])
+    for i in range(num_hparams):
+        config["hyperparameters"]["hparam_{}".format(i)] = copy.deepcopy(hparams[i % len(hparams)])
+    return config
+
+
+def draft7_validator() -> Any:
+    """Build the validator as it was before the v1 validator class."""
+    schema = _v1_gen.schemas[EXPERIMENT_URL]
+    resolver = jsonschema.RefResolver(
+        base_uri=EXPERIMENT_URL,
+        referrer=schema,
+        handlers={"http": lambda url: _v1_gen.schemas[url]},
+    )
+    ext = {
+        "disallowProperties": extensions.disallowProperties,
+        "union": extensions.union,
+        "checks": extensions.checks,
+        "compareProperties": extensions.compareProperties,
+        "conditional": extensions.conditional,
+        "eventuallyRequired": extensions.eventuallyRequired,
+    }
+    cls = jsonschema.validators.extend(jsonschema.Draft7Validator, ext)
+    return cls(schema=schema, resolver=resolver)
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    """Return the mean latency in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hparams", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    draft7 = draft7_validator()
+
+    def validate_cold(config: Any) -> List[str]:
+        _validate._v1_memo.clear()
+        return _validate.validation_errors(config)
+
+    print(
+        "{:>8} {:>12} {:>12} {:>12} {:>8}".format(
+            "hparams", "draft7 (ms)", "v1 (ms)", "memo (ms)", "speedup"
+        )
+    )
+    for num_hparams in args.hparams:
+        config = make_config(num_hparams)
+        errors = validate_cold(config)
+        assert not errors, errors
+
+        baseline = measure(lambda: list(draft7.iter_errors(config)), args.repeat)
+        cold = measure(lambda: validate_cold(config), args.repeat)
+        memoized = measure(lambda: _validate.validation_errors(config), args.repeat)
+        print(
+            "{:>8} {:>12.2f} {:>12.2f} {:>12.2f} {:>7.2f}x".format(
+                num_hparams, baseline, cold, memoized, baseline / cold
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+import requests_mock
+
+from determined_common import api
+from determined_common.experimental import ExperimentReference, Model, TrialReference
+
+MASTER = "http://localhost:8080"
+
+
+@pytest.fixture(autouse=True)
+def no_auth(monkeypatch: Any) -> None:
+    monkeypatch.setattr(api.request, "add_token_to_headers", lambda headers: headers)
+    monkeypatch.setattr(api.request, "DEFAULT_PAGE_SIZE", 3)
+
+
+def make_checkpoint(trial_id: int, batch: int, metric: Optional[float]) -> Dict[str, Any]:
+    return {
+        "uuid": "{}-{}".format(trial_id, batch),
+        "experimentConfig": {"searcher": {"metric": "loss", "smaller_is_better": True}},
+        "experimentId": 1,
+        "trialId": trial_id,
+        "hparams": {},
+        "batchNumber": batch,
+        "startTime": "2020-01-01T00:00:00Z",
+        "endTime": "2020-01-01T00:00:00Z",
+        "resources": {},
+        "metadata": {},
+        "framework": "",
+        "format": "",
+        "determinedVersion": "",
+        "metrics": None if metric is None else {"validationMetrics": {"loss": metric}},
+        "validationState": "STATE_COMPLETED",
+        "state": "STATE_COMPLETED",
+    }
+
+
+def mock_pages(
+    mocker: requests_mock.Mocker, path: str, key: str, records: List[Any], **extra: Any
+) -> Any:
+    def callback(request: Any, context: Any) -> Dict[str, Any]:
+        offset = int(request.qs.get("offset", [0])[0])
+        limit = int(request.qs["limit"][0])
+        return {
+            key: records[offset : offset + limit],
+            "pagination": {
+                "offset": offset,
+                "limit": limit,
+                "startIndex": offset,
+                "endIndex": min(offset + limit, len(records)),
+                "total": len(records),
+            },
+            **extra,
+        }
+
+    return mocker.get(MASTER + path, json=callback)
+
+
+def test_get_pages(requests_mock: requests_mock.Mocker) -> None:
+    records = list(range(7))
+    matcher = mock_pages(requests_mock, "/records", "records", records)
+    pages = api.get_pages(MASTER, "/records", "records", params={"x": 1})
+    assert [page["records"] for page in pages] == [[0, 1, 2], [3, 4, 5], [6]]
+    assert [r.qs for r in matcher.request_history] == [
+        {"x": ["1"], "offset": [str(o)], "limit": ["3"]} for o in (0, 3, 6)
+    ]
+
+    # Pages are only requested as they are consumed, and a full last page does not cause another
+    # request.
+    matcher.reset()
+    next(api.get_pages(MASTER, "/records", "records"))
+    assert matcher.call_count == 1
+    assert len(list(api.get_pages(MASTER, "/records", "records", page_size=7))) == 1
+
+
+def test_top_n_checkpoints(requests_mock: requests_mock.Mocker) -> None:
+    # The master sorts the checkpoints by the searcher metric.
+    checkpoints = [
+        make_checkpoint(trial_id, batch, metric)
+        for trial_id, batch, metric in [
+            (4, 200, 0.05),
+            (1, 200, 0.1),
+            (3, 200, 0.2),
+            (2, 100, 0.3),
+            (4, 100, 0.4),
+            (1, 100, 0.5),
+            (3, 100, 0.9),
+        ]
+    ]
+    requests_mock.get(
+        MASTER + "/api/v1/experiments/1",
+        json={
+            "experiment": {},
+            "config": {"searcher": {"metric": "loss", "smaller_is_better": True}},
+        },
+    )
+    matcher = mock_pages(
+        requests_mock, "/api/v1/experiments/1/checkpoints", "checkpoints", checkpoints
+    )
+    experiment = ExperimentReference(1, MASTER)
+
+    assert [c.uuid for c in experiment.top_n_checkpoints(3)] == ["4-200", "1-200", "3-200"]
+    assert matcher.call_count == 1
+    assert matcher.last_request.qs["sort_by"] == ["17"]
+    assert matcher.last_request.qs["order_by"] == ["1"]
+
+    # Paging stops once enough trials have been seen.
+    matcher.reset()
+    assert [c.uuid for c in experiment.top_n_checkpoints(4)] == ["4-200", "1-200", "3-200", "2-100"]
+    assert matcher.call_count == 2
+
+    matcher.reset()
+    assert experiment.top_checkpoint().uuid == "4-200"
+    assert matcher.call_count == 1
+
+    assert [
+        c.uuid for c in experiment.top_n_checkpoints(2, sort_by="loss", smaller_is_better=False)
+    ] == ["3-100", "1-100"]
+
+
+def test_select_checkpoint(requests_mock: requests_mock.Mocker) -> None:
+    checkpoints = [
+        make_checkpoint(1, batch, metric)
+        for batch, metric in [(500, None), (400, 0.3), (300, 0.1), (200, 0.4), (100, 0.1)]
+    ]
+    mock_pages(requests_mock, "/api/v1/trials/1/checkpoints", "checkpoints", checkpoints)
+    trial = TrialReference(1, MASTER)
+
+    assert trial.top_checkpoint().uuid == "1-300"
+    assert trial.select_checkpoint(best=True, sort_by="loss", smaller_is_better=False).uuid == (
+        "1-200"
+    )
+    assert trial.select_checkpoint(latest=True).uuid == "1-500"
+
+
+def test_get_versions(requests_mock: requests_mock.Mocker) -> None:
+    versions = [
+        {"version": v, "checkpoint": make_checkpoint(1, v * 100, 0.1)} for v in range(5, 0, -1)
+    ]
+    mock_pages(
+        requests_mock,
+        "/api/v1/models/mnist/versions/",
+        "modelVersions",
+        versions,
+        model={"name": "mnist"},
+    )
+
+    checkpoints = Model("mnist", master=MASTER).get_versions()
+    assert [c.model_version for c in checkpoints] == [5, 4, 3, 2, 1]
+    assert all(c.model_name == "mnist" for c in checkpoints)
@@ -0,0 +1,84 @@
+import concurrent.futures
+import http.server
+import socketserver
+import threading
+from typing import Any, Iterator, List
+
+import pytest
+
+import determined_common.requests
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def handle(self) -> None:
+        self.server.connections.append(self.client_address)  # type: ignore
+        super().handle()
+
+    def do_GET(self) -> None:
+        statuses = self.server.statuses  # type: ignore
+        status = statuses.pop(0) if statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.send_header("Set-Cookie", "session=abc")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *_: Any) -> None:
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("localhost", 0), Handler)
+        self.connections = []  # type: List[Any]
+        self.statuses = []  # type: List[int]
+
+    @property
+    def url(self) -> str:
+        return "http://localhost:{}".format(self.server_address[1])
+
+
+@pytest.fixture
+def server() -> Iterator[Server]:
+    server = Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    determined_common.requests.close_sessions()
+    try:
+        yield server
+    finally:
+        determined_common.requests.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_connections_are_reused(server: Server) -> None:
+    for _ in range(5):
+        r = determined_common.requests.request("GET", server.url + "/info")
+        assert r.status_code == 200
+        # Cookies set by the master are not sent with later requests.
+        assert "Cookie" not in r.request.headers
+
+    assert len(server.connections) == 1
+
+
+def test_concurrent_requests_share_pool(server: Server) -> None:
+    def get(_: int) -> int:
+        return determined_common.requests.request("GET", server.url + "/info").status_code
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(get, range(40))) == [200] * 40
+
+    assert len(server.connections) <= determined_common.requests.DEFAULT_POOL_SIZE
+
+
+def test_idempotent_requests_are_retried(server: Server, monkeypatch: Any) -> None:
+    monkeypatch.setattr(determined_common.requests, "RETRY_BACKOFF_FACTOR", 0)
+    server.statuses = [503, 502]
+    r = determined_common.requests.request("GET", server.url + "/info")
+    assert r.status_code == 200
+    assert server.statuses == []
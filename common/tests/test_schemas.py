@@ -1,8 +1,11 @@
 import os
 from typing import Any, Dict, Iterator, List, Optional
 
+import jsonschema
+
 from determined_common import yaml
 from determined_common.schemas import expconf
+from determined_common.schemas.expconf import _validate
 
 test_cases_path = os.path.join(os.path.dirname(__file__), "..", "..", "schemas", "test_cases", "v1")
 
@@ -63,3 +66,29 @@ def test_v1() -> None:
             cases = yaml.safe_load(f)
         for case in cases:
             Case(**case).run()
+
+
+def test_validation_memo() -> None:
+    url = "http://determined.ai/schemas/expconf/v1/hyperparameter.json"
+    valid = {"type": "int", "minval": 1, "maxval": 2}
+    invalid = {"type": "int", "minval": 2, "maxval": 1}
+    for _ in range(2):
+        assert expconf.validation_errors(valid, url) == []
+        errors = expconf.validation_errors(invalid, url)
+        assert errors and all("minval" in e for e in errors)
+        # Changing a memoized result must not change the memo.
+        errors.clear()
+    assert _validate._memo_key(valid, url) in _validate._v1_memo
+
+    # Configs which JSON does not represent exactly are validated every time.
+    assert _validate._memo_key({1: valid}, url) is None
+    assert _validate._memo_key({"a": (1, 2)}, url) is None
+    assert _validate._memo_key({"a": object()}, url) is None
+
+
+def test_type_checks() -> None:
+    validator = _validate.v1_validator()
+    draft7 = jsonschema.Draft7Validator({})
+    for instance in [None, True, 0, 1, 1.0, 1.5, "1", [1], {"a": 1}, (1,)]:
+        for type in ["array", "boolean", "integer", "null", "number", "object", "string"]:
+            assert validator.is_type(instance, type) == draft7.is_type(instance, type)
@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+import requests
+
+from determined_common.api import trial_logs
+
+LINES = [b'{"result": {"message": "line %d\\n"}}' % i for i in range(25)]
+
+
+def test_write_and_read(tmp_path: Path, monkeypatch: Any) -> None:
+    monkeypatch.setattr(trial_logs, "SEGMENT_LINES", 10)
+    cache = trial_logs.TrialLogCache(str(tmp_path), 1, {})
+    for i in range(0, len(LINES), 3):
+        cache.write(LINES[i : i + 3])
+
+    assert cache.num_lines == len(LINES)
+    assert sorted(p.name for p in tmp_path.glob("*.log.gz")) == [
+        "000000.log.gz",
+        "000001.log.gz",
+        "000002.log.gz",
+    ]
+    assert list(cache.read()) == LINES
+    for start, stop in [(0, 1), (4, 17), (10, 20), (24, None), (20, 100), (25, None)]:
+        assert list(cache.read(start, stop)) == LINES[start:stop]
+
+    # The index is persisted.
+    assert list(trial_logs.TrialLogCache(str(tmp_path), 1, {}).read(7)) == LINES[7:]
+
+
+def test_interrupted_write(tmp_path: Path) -> None:
+    cache = trial_logs.TrialLogCache(str(tmp_path), 1, {})
+    cache.write(LINES[:5])
+    # Simulate a process which was killed before it saved the index.
+    with open(str(tmp_path / "000000.log.gz"), "ab") as f:
+        f.write(b"partial")
+
+    cache = trial_logs.TrialLogCache(str(tmp_path), 1, {})
+    assert cache.num_lines == 5
+    cache.write(LINES[5:])
+    assert list(cache.read()) == LINES
+
+
+def test_mismatched_filters(tmp_path: Path) -> None:
+    trial_logs.TrialLogCache(str(tmp_path), 1, {"sources": ["agent"]}).write(LINES[:1])
+    with pytest.raises(ValueError):
+        trial_logs.TrialLogCache(str(tmp_path), 1, {})
+    with pytest.raises(ValueError):
+        trial_logs.TrialLogCache(str(tmp_path), 2, {"sources": ["agent"]})
+
+
+def test_download_resumes(tmp_path: Path, monkeypatch: Any) -> None:
+    monkeypatch.setattr(trial_logs, "FLUSH_LINES", 4)
+    monkeypatch.setattr(trial_logs, "RECONNECT_BACKOFF_SECONDS", 0)
+    requests_made = []  # type: List[Any]
+
+    def fetch(offset: int, limit: int) -> Iterator[bytes]:
+        requests_made.append((offset, limit))
+        end = offset + limit if limit else len(LINES)
+        for i, line in enumerate(LINES[offset:end], offset):
+            # The connection drops every 10 lines.
+            if i > offset and i % 10 == 0:
+                raise requests.exceptions.ChunkedEncodingError()
+            yield line
+
+    received = []  # type: List[bytes]
+    cache = trial_logs.TrialLogCache(str(tmp_path), 1, {})
+    trial_logs.download(cache, fetch, 15, on_line=received.append)
+    assert received == LINES[:15]
+    assert requests_made == [(0, 15), (10, 5)]
+
+    requests_made.clear()
+    trial_logs.download(cache, fetch)
+    assert list(cache.read()) == LINES
+    assert requests_made == [(15, 0), (20, 0)]
@@ -6,8 +6,12 @@ Mostly copy-paste from https://github.com/pytorch/vision/blob/13b35ff/references
 import os
 from io import BytesIO
 
-from google.cloud import storage
-from determined.util import download_gcs_blob_with_backoff
+from determined.pytorch import (
+    BlobCache,
+    BlobPrefetcher,
+    GCSBlobBackend,
+    LocalBlobBackend,
+)
 
 import torchvision
 from PIL import Image
@@ -23,24 +27,6 @@ def unwrap_collate_fn(batch):
     return tuple(batch)
 
 
-class GCSBackend:
-    def __init__(self, bucket_name):
-        self._storage_client = storage.Client(project="determined-ai")
-        self._bucket = self._storage_client.bucket(bucket_name)
-
-    def convert_filepath(self, filepath):
-        tokens = filepath.split("/")
-        directory = tokens[-2]
-        filename = tokens[-1]
-        return "{}/{}".format(directory, filename)
-
-    def get(self, filepath):
-        filepath = self.convert_filepath(filepath)
-        blob = self._bucket.blob(filepath)
-        img_str = download_gcs_blob_with_backoff(blob)
-        return img_str
-
-
 class FakeBackend:
     def __init__(self):
         self.data = None
@@ -54,46 +40,55 @@ class FakeBackend:
         return self.data
 
 
-class LocalBackend:
-    """
-    This class will load data from harddrive.
-    COCO dataset will be downloaded from source in model_def.py if
-    local backend is specified.
-    """
-
-    def __init__(self, outdir):
-        assert os.path.isdir(outdir)
-        self.outdir = outdir
-
-    def get(self, filepath):
-        # Use train_curves.png image as fake data.
-        with open(os.path.join(self.outdir, filepath), "rb") as f:
-            img_str = f.read()
-        return img_str
-
-
 class CocoDetection(torchvision.datasets.CocoDetection):
     def __init__(
-        self, backend, root_dir, img_folder, ann_file, transforms, return_masks
+        self,
+        backend,
+        root_dir,
+        img_folder,
+        ann_file,
+        transforms,
+        return_masks,
+        cache_dir=None,
     ):
         super(CocoDetection, self).__init__(img_folder, ann_file)
         self.img_folder = img_folder
         self._transforms = transforms
         self.prepare = ConvertCocoPolysToMask(return_masks)
+        # Images fetched from GCS are kept in a local cache across epochs if cache_dir is set.
+        cache = BlobCache(cache_dir) if cache_dir else None
+        self.backend_name = backend
         if backend == "fake":
             self.backend = FakeBackend()
         elif backend == "local":
-            self.backend = LocalBackend(img_folder)
+            # COCO dataset will be downloaded from source in model_def.py if local backend is
+            # specified.
+            self.backend = LocalBlobBackend(img_folder)
         elif backend == "gcs":
-            self.backend = GCSBackend(root_dir)
+            self.backend = GCSBlobBackend(root_dir, project="determined-ai", cache=cache)
+
+    def image_key(self, idx):
+        path = self.coco.loadImgs(self.ids[idx])[0]["file_name"]
+        if self.backend_name == "gcs":
+            # Images are stored in the bucket as <image set directory>/<file name>.
+            return "{}/{}".format(os.path.basename(self.img_folder), path)
+        return path
+
+    def blob_prefetcher(self):
+        """
+        Return a BlobPrefetcher which downloads the images of upcoming batches into the cache,
+        or None if images are not cached.
+        """
+        if getattr(self.backend, "cache", None) is None:
+            return None
+        return BlobPrefetcher(self.backend, self.image_key)
 
     def __getitem__(self, idx):
         coco = self.coco
         img_id = self.ids[idx]
         ann_ids = coco.getAnnIds(imgIds=img_id)
         target = coco.loadAnns(ann_ids)
-        path = coco.loadImgs(img_id)[0]["file_name"]
-        img_bytes = BytesIO(self.backend.get(os.path.join(self.img_folder, path)))
+        img_bytes = BytesIO(self.backend.get(self.image_key(idx)))
 
         img = Image.open(img_bytes).convert("RGB")
 
@@ -121,5 +116,6 @@ def build_dataset(image_set, args):
         ann_file,
         transforms=make_coco_transforms(image_set),
         return_masks=args.masks,
+        cache_dir=args.get("cache_dir"),
     )
     return dataset
@@ -108,6 +108,7 @@ class DETRTrial(PyTorchTrial):
             collate_fn=unwrap_collate_fn,
             num_workers=self.hparams.num_workers,
             shuffle=True,
+            blob_prefetcher=dataset_train.blob_prefetcher(),
         )
 
     def build_validation_data_loader(self) -> DataLoader:
@@ -120,6 +121,7 @@ class DETRTrial(PyTorchTrial):
             collate_fn=unwrap_collate_fn,
             num_workers=self.hparams.num_workers,
             shuffle=False,
+            blob_prefetcher=dataset_val.blob_prefetcher(),
         )
 
     def train_batch(
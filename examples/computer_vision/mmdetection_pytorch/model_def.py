@@ -18,7 +18,7 @@ from mmdet.core import encode_mask_results
 from determined.pytorch import DataLoader, PyTorchTrial, LRScheduler
 import determined as det
 
-from utils.data import build_dataloader, sub_backend
+from utils.data import build_dataloader, make_file_client_args, sub_backend
 from utils.lr_schedulers import WarmupWrapper
 
 
@@ -37,8 +37,13 @@ class MMDetTrial(PyTorchTrial):
         self.cfg.data.val.test_mode = True
         self.cfg.data.workers_per_gpu = self.data_config["workers_per_gpu"]
 
+        self.file_client_args = None
         if self.data_config["backend"] in ["gcs", "fake"]:
-            sub_backend(self.data_config["backend"], self.cfg)
+            cache_dir = self.data_config.get("cache_dir")
+            sub_backend(self.data_config["backend"], self.cfg, cache_dir)
+            self.file_client_args = make_file_client_args(
+                self.data_config["backend"], cache_dir
+            )
 
         print(self.cfg)
 
@@ -128,6 +133,7 @@ class MMDetTrial(PyTorchTrial):
             self.context.distributed.get_size(),
             self.cfg.data.workers_per_gpu,
             True,
+            self.file_client_args,
         )
         self.model.CLASSES = dataset.CLASSES
         return dataloader
@@ -137,5 +143,7 @@ class MMDetTrial(PyTorchTrial):
         # if self.context.distributed.get_size() > 1:
         #    self.cfg.data.val.pipeline = replace_ImageToTensor(self.cfg.data.test.pipeline)
 
-        dataset, dataloader = build_dataloader(self.cfg.data.val, 1, 1, 8, False)
+        dataset, dataloader = build_dataloader(
+            self.cfg.data.val, 1, 1, 8, False, self.file_client_args
+        )
         return dataloader
@@ -1,40 +1,44 @@
 import math
+import os
 from functools import partial
 
 import numpy as np
 import torch
 from torch.utils.data import Sampler
 
-from google.cloud import storage
-
 from mmcv.fileio import BaseStorageBackend, FileClient
 from .collate import collate
 from mmcv.parallel.data_container import DataContainer
 from mmdet.datasets import build_dataset
 from mmcv.utils.config import Config, ConfigDict
 
-from determined.util import download_gcs_blob_with_backoff
-from determined.pytorch import DataLoader
+from determined.pytorch import BlobCache, BlobPrefetcher, DataLoader, GCSBlobBackend
 
 # from torch.utils.data import DataLoader
 
 
-class GCSBackend(BaseStorageBackend):
-    def __init__(self, bucket_name):
-        self._storage_client = storage.Client(project="determined-ai")
-        self._bucket = self._storage_client.bucket(bucket_name)
+def convert_filepath(filepath):
+    """Images are stored in the bucket as <image set directory>/<file name>."""
+    tokens = filepath.split("/")
+    directory = tokens[-2]
+    filename = tokens[-1]
+    return "{}/{}".format(directory, filename)
+
+
+def make_gcs_backend(bucket_name, cache_dir=None):
+    """
+    Images fetched from GCS are kept in a local cache across epochs if cache_dir is set.
+    """
+    cache = BlobCache(cache_dir) if cache_dir else None
+    return GCSBlobBackend(bucket_name, project="determined-ai", cache=cache)
+
 
-    def convert_filepath(self, filepath):
-        tokens = filepath.split("/")
-        directory = tokens[-2]
-        filename = tokens[-1]
-        return "{}/{}".format(directory, filename)
+class GCSBackend(BaseStorageBackend):
+    def __init__(self, bucket_name, cache_dir=None):
+        self._backend = make_gcs_backend(bucket_name, cache_dir)
 
     def get(self, filepath):
-        filepath = self.convert_filepath(filepath)
-        blob = self._bucket.blob(filepath)
-        img_str = download_gcs_blob_with_backoff(blob)
-        return img_str
+        return self._backend.get(convert_filepath(filepath))
 
     def get_text(self, filepath):
         return NotImplementedError
@@ -139,11 +143,41 @@ class MyGroupSampler(Sampler):
         return self.total_size
 
 
-def build_dataloader(cfg, num_samples_per_gpu, num_replicas, num_workers, shuffle):
+def build_blob_prefetcher(dataset, file_client_args):
+    """
+    Return a BlobPrefetcher which downloads the images of upcoming batches into the cache of
+    the GCS backend, or None if images are not read from GCS with a cache.
+    """
+    if file_client_args.get("backend") != "gcs" or not file_client_args.get("cache_dir"):
+        return None
+
+    def key(idx):
+        filename = dataset.data_infos[idx]["filename"]
+        if dataset.img_prefix is not None:
+            filename = os.path.join(dataset.img_prefix, filename)
+        return convert_filepath(filename)
+
+    backend = make_gcs_backend(
+        file_client_args["bucket_name"], file_client_args["cache_dir"]
+    )
+    return BlobPrefetcher(backend, key)
+
+
+def build_dataloader(
+    cfg,
+    num_samples_per_gpu,
+    num_replicas,
+    num_workers,
+    shuffle,
+    file_client_args=None,
+):
     dataset = build_dataset(cfg)
     sampler = (
         MyGroupSampler(dataset, num_samples_per_gpu, num_replicas) if shuffle else None
     )
+    blob_prefetcher = (
+        build_blob_prefetcher(dataset, file_client_args) if file_client_args else None
+    )
     # may need to look into collate_fn for distributed data and init_fn for seeding
     return dataset, DataLoader(
         dataset,
@@ -152,29 +186,37 @@ def build_dataloader(cfg, num_samples_per_gpu, num_replicas, num_workers, shuffl
         sampler=sampler,
         collate_fn=partial(collate, samples_per_gpu=num_samples_per_gpu),
         pin_memory=False,
+        blob_prefetcher=blob_prefetcher,
     )
 
 
-def sub_backend(backend, cfg):
+def make_file_client_args(backend, cache_dir=None):
+    backend_cfg = {
+        "gcs": {
+            "backend": "gcs",
+            "bucket_name": "determined-ai-coco-dataset",
+            "cache_dir": cache_dir,
+        },
+        "fake": {"backend": "fake"},
+    }
+    return backend_cfg[backend]
+
+
+def sub_backend(backend, cfg, cache_dir=None):
     """
     Replace default backend for getting files with GCSBackend which downloads
     a file from a GCS bucket.
     """
     if type(cfg) in [Config, ConfigDict]:
-        backend_cfg = {
-            "gcs": {"backend": "gcs", "bucket_name": "determined-ai-coco-dataset"},
-            "fake": {"backend": "fake"},
-        }
-
         if "type" in cfg and cfg["type"] == "LoadImageFromFile":
-            cfg["file_client_args"] = backend_cfg[backend]
+            cfg["file_client_args"] = make_file_client_args(backend, cache_dir)
         else:
             for k in cfg:
-                sub_backend(backend, cfg[k])
+                sub_backend(backend, cfg[k], cache_dir)
     else:
         if isinstance(cfg, list):
             for i in cfg:
-                sub_backend(backend, i)
+                sub_backend(backend, i, cache_dir)
 
 
 def decontainer(data):
@@ -194,7 +236,6 @@ if __name__ == "__main__":
     # Test backend
     backend = GCSBackend("determined-ai-coco-dataset")
     img_bytes = backend.get("annotations2017/instances_val2017.json")
-    import os
 
     with open("/tmp/instances_val2017.json", "wb") as f:
         f.write(img_bytes)
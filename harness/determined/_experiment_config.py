@@ -24,6 +24,12 @@ class ExperimentConfig(dict):
     def averaging_training_metrics_enabled(self) -> bool:
         return bool(self["optimizations"]["average_training_metrics"])
 
+    def prefetch_batches(self) -> int:
+        return int(self.get("optimizations", {}).get("prefetch_batches") or 0)
+
+    def sharded_checkpoints(self) -> bool:
+        return bool(self.get("optimizations", {}).get("sharded_checkpoints"))
+
     def slots_per_trial(self) -> int:
         return int(self["resources"]["slots_per_trial"])
 
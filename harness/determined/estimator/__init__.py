@@ -12,8 +12,12 @@ from determined.estimator._reducer import (
     _DistributedMetricMaker,
 )
 from determined.estimator._util import (
+    _StepMetrics,
     _cleanup_after_train_step,
     _cleanup_after_validation_step,
+    _get_summary_value_tensor,
+    _link_or_copy_tree,
+    _stage_checkpoint_directory,
     _update_checkpoint_path_in_state_file,
     _scan_checkpoint_directory,
 )
@@ -60,13 +60,17 @@ class DeterminedControlHook(estimator.RunHook):
 
         # step_metrics keeps track of the metrics associated with a step (see
         # DeterminedControlCallback). It is cleared in between training steps.
-        self.step_metrics = []  # type: List[Dict[str, Any]]
+        self.step_metrics = None  # type: Optional[estimator._StepMetrics]
         self.num_batches = None  # type: Optional[int]
 
         self._global_step_of_last_checkpoint = None  # type: Optional[int]
         self._session = None  # type: Optional[tf.Session]
         self._current_global_step = None  # type: Optional[int]
         self._saver = None  # type: Optional[tf.train.Saver]
+
+        # A copy of the user code, which is linked into every checkpoint.
+        self._user_code_dir = None  # type: Optional[pathlib.Path]
+
         self._writer = tf.compat.v1.summary.FileWriter(tensorboard.get_base_path({}))
 
         # Store the response_func for train_for_step workloads while we do the training.
@@ -77,15 +81,27 @@ class DeterminedControlHook(estimator.RunHook):
         # only for certain types of summaries. Other summary types,
         # are collected with a frequency of `save_summary_steps` set
         # in the RunConfig.
+        #
+        # The values of summaries with a constant tag are fetched directly, which
+        # avoids serializing them into a summary protobuf and parsing it again in
+        # Python on every batch; only the other summaries are merged.
         summary_types_collected_every_batch = {"ScalarSummary", "TensorSummary"}
         per_batch_summaries = []
+        self._summary_tensors = {}  # type: Dict[str, tf.Tensor]
         for summary in tf.compat.v1.get_collection(tf.compat.v1.GraphKeys.SUMMARIES):
-            if summary.op.type in summary_types_collected_every_batch:
-                per_batch_summaries.append(summary)
-                logging.debug(f"Collecting {summary} of type {summary.op.type} every batch.")
-            else:
+            if summary.op.type not in summary_types_collected_every_batch:
                 logging.debug(f"Not collecting {summary} of type {summary.op.type} every batch.")
-        self._summary_op = tf.compat.v1.summary.merge(per_batch_summaries)
+                continue
+            logging.debug(f"Collecting {summary} of type {summary.op.type} every batch.")
+            tagged_value = estimator._get_summary_value_tensor(summary)
+            if tagged_value is not None:
+                tag, value = tagged_value
+                self._summary_tensors[tag] = value
+            else:
+                per_batch_summaries.append(summary)
+        self._summary_op = (
+            tf.compat.v1.summary.merge(per_batch_summaries) if per_batch_summaries else None
+        )
         self._global_step_tensor = tf.compat.v1.train.get_global_step()
 
         # train_and_evaluate() is invoked before the trial controller receives
@@ -96,23 +112,27 @@ class DeterminedControlHook(estimator.RunHook):
     def before_run(
         self, run_context: tf.estimator.SessionRunContext
     ) -> tf.estimator.SessionRunArgs:
-        return tf.estimator.SessionRunArgs(
-            {"summary": self._summary_op, "global_step": self._global_step_tensor}
-        )
+        fetches = {"metrics": self._summary_tensors, "global_step": self._global_step_tensor}
+        if self._summary_op is not None:
+            fetches["summary"] = self._summary_op
+        return tf.estimator.SessionRunArgs(fetches)
 
     def _collect_batch_metrics(self, run_values: tf.estimator.SessionRunValues) -> None:
-        if "summary" not in run_values.results:
-            raise AssertionError("Expected 'summary' to be run_values, but it was not.")
-        summary = tf.compat.v1.summary.Summary()
-        summary.ParseFromString(run_values.results["summary"])
-        batch_metrics = {}  # type: Dict[str, Any]
-        for val in summary.value:
-            if val.HasField("simple_value"):
-                batch_metrics[val.tag] = val.simple_value
-            elif val.HasField("tensor"):
-                batch_metrics[val.tag] = tf.make_ndarray(val.tensor)
-
-        self.step_metrics.append(batch_metrics)
+        if "metrics" not in run_values.results:
+            raise AssertionError("Expected 'metrics' to be run_values, but it was not.")
+        batch_metrics = dict(run_values.results["metrics"])  # type: Dict[str, Any]
+        if "summary" in run_values.results:
+            summary = tf.compat.v1.summary.Summary()
+            summary.ParseFromString(run_values.results["summary"])
+            for val in summary.value:
+                if val.HasField("simple_value"):
+                    batch_metrics[val.tag] = val.simple_value
+                elif val.HasField("tensor"):
+                    batch_metrics[val.tag] = tf.make_ndarray(val.tensor)
+
+        if self.step_metrics is None:
+            self.step_metrics = estimator._StepMetrics(cast(int, self.num_batches))
+        self.step_metrics.add(batch_metrics)
 
     def after_run(
         self, run_context: tf.estimator.SessionRunContext, run_values: tf.estimator.SessionRunValues
@@ -138,16 +158,20 @@ class DeterminedControlHook(estimator.RunHook):
         # degrade performance due to an increase in communication.
 
         # Loss training metric is sometimes called `loss_1` instead of `loss`.
-        for step_metrics in self.step_metrics:
-            if "loss" not in step_metrics and "loss_1" in step_metrics:
-                step_metrics["loss"] = step_metrics["loss_1"]
+        step_metrics = cast(estimator._StepMetrics, self.step_metrics)
+        if "loss" not in step_metrics.columns and "loss_1" in step_metrics.columns:
+            step_metrics.columns["loss"] = step_metrics.columns["loss_1"]
 
         # Send the result of the training step back to the main process.
         check.is_not_none(self.train_response_func, "no response_func at end of train_for_step")
         self.train_response_func = cast(workload.ResponseFunc, self.train_response_func)
         if self.estimator_trial_controller.is_chief:
             response = {
-                "metrics": det.util.make_metrics(self.batches_processed_in_step, self.step_metrics),
+                "metrics": det.util.make_metrics_from_columns(
+                    self.batches_processed_in_step,
+                    self.batches_processed_in_step,
+                    step_metrics.columns,
+                ),
                 "stop_requested": self.estimator_trial_controller.context.get_stop_requested(),
             }
             self.train_response_func(response)
@@ -157,7 +181,7 @@ class DeterminedControlHook(estimator.RunHook):
         # Reset step counter and clear the step metrics from memory.
         self.train_response_func = None
         self.batches_processed_in_step = 0
-        self.step_metrics = []
+        self.step_metrics = None
 
         estimator._cleanup_after_train_step(self.estimator_trial_controller.estimator_dir)
 
@@ -205,8 +229,7 @@ class DeterminedControlHook(estimator.RunHook):
 
         self._copy_latest_checkpoint(checkpoint_path=checkpoint_path)
         self._save_serving_input_receiver_fns(checkpoint_path=str(checkpoint_path))
-
-        det.util.write_user_code(checkpoint_path)
+        self._write_user_code(checkpoint_path=checkpoint_path)
 
         for callback in self.estimator_trial_controller.train_hooks:
             if isinstance(callback, estimator.RunHook):
@@ -244,11 +267,24 @@ class DeterminedControlHook(estimator.RunHook):
         checkpoint_dir = os.path.dirname(
             self.estimator_trial_controller.estimator.latest_checkpoint()
         )
-        shutil.copytree(checkpoint_dir, str(checkpoint_path))
+        estimator._stage_checkpoint_directory(pathlib.Path(checkpoint_dir), checkpoint_path)
 
         # Calibrate the CheckpointState metadata file to the new location.
         estimator._update_checkpoint_path_in_state_file(checkpoint_path)
 
+    def _write_user_code(self, checkpoint_path: pathlib.Path) -> None:
+        # The user code does not change during a trial, so it is only copied for the first
+        # checkpoint and linked into later ones.
+        if self._user_code_dir is None:
+            self._user_code_dir = pathlib.Path(tempfile.mkdtemp())
+            det.util.write_user_code(self._user_code_dir)
+
+        # The code of a restored checkpoint is staged along with the rest of it.
+        code_path = checkpoint_path.joinpath("code")
+        if code_path.exists():
+            shutil.rmtree(str(code_path))
+        estimator._link_or_copy_tree(self._user_code_dir.joinpath("code"), code_path)
+
     def _save_serving_input_receiver_fns(self, checkpoint_path: str) -> None:
         for name, fn in self.estimator_trial_controller.serving_input_receiver_fns.items():
             logging.info(
@@ -720,8 +756,10 @@ class EstimatorTrialController(det.LoopTrialController):
     def _init_paths(self) -> None:
         """
         Create a unique model directory for each training process. If
-        a load path is provided, copy the checkpoint into the model
-        directory of each training process. This model directory will
+        a load path is provided, stage the checkpoint into the model
+        directory of each training process; the checkpoint data files are
+        linked rather than copied, so every process shares the data of
+        the checkpoint at the load path. This model directory will
         be used to initialize an Estimator. We also update the paths in
         the CheckpointState metadata file to the new directory location.
         """
@@ -740,8 +778,8 @@ class EstimatorTrialController(det.LoopTrialController):
         self.estimator_dir = pathlib.Path(tempfile.mkdtemp(suffix=suffix))
         if self.estimator_dir.exists():
             shutil.rmtree(str(self.estimator_dir))
-        logging.debug(f"Copying from {self.load_path} to {self.estimator_dir}.")
-        shutil.copytree(str(self.load_path), str(self.estimator_dir))
+        logging.debug(f"Staging from {self.load_path} to {self.estimator_dir}.")
+        estimator._stage_checkpoint_directory(self.load_path, self.estimator_dir)
 
         # Calibrate the CheckpointState metadata file to the new location.
         estimator._update_checkpoint_path_in_state_file(self.estimator_dir)
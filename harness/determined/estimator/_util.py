@@ -1,10 +1,13 @@
 import logging
 import os
 import pathlib
+import shutil
 from collections import defaultdict
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import tensorflow as tf
+from tensorflow.python.framework import tensor_util
 from tensorflow.python.training.checkpoint_state_pb2 import CheckpointState
 
 from determined import tensorboard
@@ -69,6 +72,44 @@ def split_checkpoint_filename(filename: str) -> Tuple[str, str]:
     return (cname, basename)
 
 
+def _is_checkpoint_data_file(filename: str) -> bool:
+    return bool(split_checkpoint_filename(filename)[0])
+
+
+def _link_or_copy_tree(
+    src: pathlib.Path, dst: pathlib.Path, should_link: Callable[[str], bool] = lambda _: True
+) -> None:
+    """
+    Recursively copy the directory `src` to `dst`, but hard link the files whose name satisfies
+    `should_link` instead of copying them. Files are copied if they cannot be linked, e.g., because
+    `src` and `dst` are on different file systems.
+
+    Only link files which are never modified in place: a linked file shares its contents with the
+    original, so writing to one would modify the other.
+    """
+
+    def link_or_copy(src_path: str, dst_path: str) -> None:
+        if should_link(os.path.basename(src_path)):
+            try:
+                os.link(src_path, dst_path)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src_path, dst_path)
+
+    shutil.copytree(str(src), str(dst), copy_function=link_or_copy)
+
+
+def _stage_checkpoint_directory(src: pathlib.Path, dst: pathlib.Path) -> None:
+    """
+    Copy the checkpoint directory `src` to `dst`, hard linking the checkpoint data files. These are
+    the bulk of a checkpoint, and TensorFlow never modifies them once they are written. Every other
+    file (e.g., checkpoint state files, or files written by a RunHook) may be rewritten in place
+    and is copied.
+    """
+    _link_or_copy_tree(src, dst, _is_checkpoint_data_file)
+
+
 def _scan_checkpoint_directory(checkpoint_dir: str) -> List[Checkpoint]:
     """
     Construct checkpoint metadata directly from a directory.
@@ -256,3 +297,59 @@ def _update_checkpoint_path_in_state_file(model_dir: pathlib.Path) -> None:
             all_model_checkpoint_timestamps=checkpoint.state.all_model_checkpoint_timestamps,
             last_preserved_timestamp=checkpoint.state.last_preserved_timestamp,
         )
+
+
+def _get_summary_value_tensor(summary: tf.Tensor) -> Optional[Tuple[str, tf.Tensor]]:
+    """
+    Return the tag of a scalar summary and the tensor of its value, so that the value can be
+    fetched directly instead of parsing it out of the serialized summary. Return None for other
+    summaries, or if the tag is not known before the graph runs.
+    """
+    op = summary.op
+    if op.type != "ScalarSummary":
+        return None
+    tag = tensor_util.constant_value(op.inputs[0])
+    if tag is None or np.ndim(tag) != 0:
+        return None
+    tag = tag.item()
+    return tag.decode("utf-8") if isinstance(tag, bytes) else str(tag), op.inputs[1]
+
+
+class _StepMetrics:
+    """
+    Accumulate the training metrics of every batch of a step. Numeric scalar metrics are written
+    into arrays allocated for the whole step; other values are kept in a list.
+    """
+
+    def __init__(self, num_batches: int) -> None:
+        self.num_batches = num_batches
+        self.num_collected = 0
+        self.columns = {}  # type: Dict[str, Any]
+
+    def _new_column(self, value: Any) -> Any:
+        if np.ndim(value) == 0 and np.asarray(value).dtype.kind in "biuf":
+            return np.empty(self.num_batches, dtype=np.asarray(value).dtype)
+        return [None] * self.num_batches
+
+    def add(self, batch_metrics: Dict[str, Any]) -> None:
+        index = self.num_collected
+        check.lt(index, self.num_batches, "Collected more batches than expected in the step")
+        if index == 0:
+            self.columns = {name: self._new_column(v) for name, v in batch_metrics.items()}
+        else:
+            check.eq(
+                set(self.columns),
+                batch_metrics.keys(),
+                "inconsistent training metrics: index: {}".format(index),
+            )
+
+        for name, value in batch_metrics.items():
+            column = self.columns[name]
+            if isinstance(column, np.ndarray) and not (
+                np.ndim(value) == 0 and np.asarray(value).dtype.kind in "biuf"
+            ):
+                # E.g., a tensor whose shape is only known when the graph runs.
+                column = column[:index].tolist() + [None] * (self.num_batches - index)
+                self.columns[name] = column
+            column[index] = value
+        self.num_collected += 1
@@ -66,7 +66,8 @@ def maybe_load_checkpoint(
 ) -> Iterator[Optional[pathlib.Path]]:
     """
     Either wrap a storage_mgr.restore_path() context manager, or be a noop
-    context manager if there is no checkpoint to load.
+    context manager if there is no checkpoint to load. If a node-local checkpoint cache is
+    configured, the checkpoint is restored through the cache.
     """
 
     if checkpoint is None:
@@ -76,8 +77,13 @@ def maybe_load_checkpoint(
         metadata = storage.StorageMetadata.from_json(checkpoint)
         logging.info("Restoring trial from checkpoint {}".format(metadata.storage_id))
 
-        with storage_mgr.restore_path(metadata) as path:
-            yield pathlib.Path(path)
+        cache = storage.CheckpointCache.from_env()
+        if cache is not None:
+            with cache.restore_path(storage_mgr, metadata) as path:
+                yield pathlib.Path(path)
+        else:
+            with storage_mgr.restore_path(metadata) as path:
+                yield pathlib.Path(path)
 
 
 def build_and_run_training_pipeline(env: det.EnvContext) -> None:
@@ -1,7 +1,9 @@
+import abc
 import csv
 import logging
 import subprocess
-from typing import List, NamedTuple, Optional, Tuple
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import determined as det
 from determined_common import check
@@ -22,12 +24,37 @@ class GPU(NamedTuple):
     memoryUtil: float
 
 
+def _parse_gpu(field_list: List[str]) -> Optional[GPU]:
+    """Parse a line of nvidia-smi output, or return None if it is malformed."""
+    if len(field_list) != len(gpu_fields):
+        logging.warning(f"Ignoring unexpected nvidia-smi output: {field_list}")
+        return None
+    fields = dict(zip(gpu_fields, field_list))
+    try:
+        return GPU(
+            id=int(fields["index"]),
+            uuid=fields["uuid"].strip(),
+            load=float(fields["utilization.gpu"]) / 100,
+            memoryUtil=float(fields["memory.used"]) / float(fields["memory.total"]),
+        )
+    except ValueError:
+        logging.warning(f"Ignoring unexpected nvidia-smi output: {fields}")
+        return None
+
+
+def _nvidia_smi_command(*args: str) -> List[str]:
+    return [
+        "nvidia-smi",
+        "--query-gpu=" + ",".join(gpu_fields),
+        "--format=csv,noheader,nounits",
+        *args,
+    ]
+
+
 def get_gpus() -> List[GPU]:
     try:
         proc = subprocess.Popen(
-            ["nvidia-smi", "--query-gpu=" + ",".join(gpu_fields), "--format=csv,noheader,nounits"],
-            stdout=subprocess.PIPE,
-            universal_newlines=True,
+            _nvidia_smi_command(), stdout=subprocess.PIPE, universal_newlines=True
         )
     except FileNotFoundError:
         # This case is expected if NVIDIA drivers are not available.
@@ -39,26 +66,138 @@ def get_gpus() -> List[GPU]:
     gpus = []
     with proc:
         for field_list in csv.reader(proc.stdout):  # type: ignore
-            if len(field_list) != len(gpu_fields):
-                logging.warning(f"Ignoring unexpected nvidia-smi output: {field_list}")
-                continue
-            fields = dict(zip(gpu_fields, field_list))
-            try:
-                gpus.append(
-                    GPU(
-                        id=int(fields["index"]),
-                        uuid=fields["uuid"].strip(),
-                        load=float(fields["utilization.gpu"]) / 100,
-                        memoryUtil=float(fields["memory.used"]) / float(fields["memory.total"]),
-                    )
-                )
-            except ValueError:
-                logging.warning(f"Ignoring unexpected nvidia-smi output: {fields}")
+            gpu = _parse_gpu(field_list)
+            if gpu is not None:
+                gpus.append(gpu)
     if proc.returncode:
         logging.warning(f"`nvidia-smi` exited with failure status code {proc.returncode}")
     return gpus
 
 
+class GPUSampler(metaclass=abc.ABCMeta):
+    """
+    GPUSampler is the base class of the sources of GPU utilization which are polled by
+    HarnessProfiler. sample() returns the latest utilization of every GPU, and should be cheap
+    enough to call several times a second.
+    """
+
+    @abc.abstractmethod
+    def sample(self) -> List[GPU]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class NVMLSampler(GPUSampler):
+    """
+    Query the GPUs in-process through NVML, with the `pynvml` bindings. Raises an exception if
+    `pynvml` is not installed or NVML cannot be initialized.
+    """
+
+    def __init__(self) -> None:
+        import pynvml
+
+        pynvml.nvmlInit()
+        self._nvml = pynvml
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+        self._uuids = []  # type: List[str]
+        for handle in self._handles:
+            uuid = pynvml.nvmlDeviceGetUUID(handle)
+            # Older versions of pynvml return bytes.
+            self._uuids.append(uuid.decode() if isinstance(uuid, bytes) else uuid)
+
+    def sample(self) -> List[GPU]:
+        gpus = []
+        for index, (handle, uuid) in enumerate(zip(self._handles, self._uuids)):
+            utilization = self._nvml.nvmlDeviceGetUtilizationRates(handle)
+            memory = self._nvml.nvmlDeviceGetMemoryInfo(handle)
+            gpus.append(
+                GPU(
+                    id=index,
+                    uuid=uuid,
+                    load=utilization.gpu / 100,
+                    memoryUtil=memory.used / memory.total,
+                )
+            )
+        return gpus
+
+    def close(self) -> None:
+        self._nvml.nvmlShutdown()
+
+
+class NvidiaSMISampler(GPUSampler):
+    """
+    Run a single `nvidia-smi` process which reports the GPUs every `interval` seconds, and keep
+    the latest report of every GPU, instead of running `nvidia-smi` for every sample.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._latest = {}  # type: Dict[int, GPU]
+        self._lock = threading.Lock()
+        self._closed = False
+        loop_ms = max(int(interval * 1000), 1)
+        self._proc = subprocess.Popen(
+            _nvidia_smi_command(f"--loop-ms={loop_ms}"),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        self._thread = threading.Thread(
+            target=self._read, name="DeterminedNvidiaSMIReader", daemon=True
+        )
+        self._thread.start()
+
+    def _read(self) -> None:
+        for field_list in csv.reader(self._proc.stdout):  # type: ignore
+            gpu = _parse_gpu(field_list)
+            if gpu is not None:
+                with self._lock:
+                    self._latest[gpu.id] = gpu
+
+        returncode = self._proc.wait()
+        if returncode and not self._closed:
+            logging.warning(f"`nvidia-smi` exited with failure status code {returncode}")
+
+    def sample(self) -> List[GPU]:
+        with self._lock:
+            return [self._latest[i] for i in sorted(self._latest)]
+
+    def close(self) -> None:
+        self._closed = True
+        self._proc.terminate()
+        self._thread.join()
+        self._proc.stdout.close()  # type: ignore
+
+
+class NoGPUSampler(GPUSampler):
+    """Report no GPUs; used on machines where GPUs cannot be queried."""
+
+    def sample(self) -> List[GPU]:
+        return []
+
+
+def make_gpu_sampler(interval: float) -> GPUSampler:
+    """
+    Return the cheapest GPUSampler available: NVML if `pynvml` is installed, a streaming
+    `nvidia-smi` process otherwise, and a sampler without GPUs if neither is available.
+    """
+    try:
+        return NVMLSampler()
+    except Exception as e:
+        logging.debug(f"Couldn't query GPUs with NVML; falling back to `nvidia-smi`: {e}")
+
+    try:
+        return NvidiaSMISampler(interval)
+    except FileNotFoundError:
+        # This case is expected if NVIDIA drivers are not available.
+        pass
+    except Exception as e:
+        logging.warning(f"Couldn't query GPUs with `nvidia-smi`; assuming there are none: {e}")
+    return NoGPUSampler()
+
+
 def get_gpu_ids_and_uuids() -> Tuple[List[int], List[str]]:
     gpus = get_gpus()
     return [gpu.id for gpu in gpus], [gpu.uuid for gpu in gpus]
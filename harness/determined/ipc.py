@@ -1,6 +1,10 @@
+import copyreg
+import io
+import pickle
 import time
-from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, cast
 
+import numpy as np
 import zmq
 from zmq.error import ZMQBindError, ZMQError
 
@@ -60,6 +64,100 @@ class _ExceptionMessage:
     pass
 
 
+# NumPy arrays smaller than this are pickled inline; copying them is cheaper than sending an
+# extra frame. This matches the size below which ZMQ copies frames anyway (zmq.COPY_THRESHOLD).
+_OUT_OF_BAND_MIN_BYTES = 64 * 1024
+
+
+def _load_out_of_band(index: int, dtype: np.dtype, shape: Tuple[int, ...]) -> np.ndarray:
+    """Placeholder for out-of-band arrays; _OutOfBandUnpickler substitutes its own loader."""
+    raise AssertionError("Out-of-band arrays can only be loaded by _loads_multipart()")
+
+
+class _OutOfBandPickler(pickle.Pickler):
+    """
+    _OutOfBandPickler pickles an object graph while leaving the data of large NumPy arrays out of
+    the pickle. The arrays are collected in `buffers` so that they can be sent as separate,
+    zero-copy ZMQ frames.
+    """
+
+    def __init__(self, file: io.BytesIO) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        buffers = []  # type: List[memoryview]
+
+        # The reducer closes over `buffers` rather than being a method, because a reference cycle
+        # through self.dispatch_table would keep every pickler alive until the next garbage
+        # collection.
+        def reduce_ndarray(obj: np.ndarray) -> Any:
+            if obj.dtype.hasobject or obj.nbytes < _OUT_OF_BAND_MIN_BYTES:
+                return obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+            # Not every dtype supports the buffer protocol (e.g., datetime64), but a byte view does.
+            buffers.append(memoryview(np.ascontiguousarray(obj).reshape(-1).view(np.uint8)))
+            return _load_out_of_band, (len(buffers) - 1, obj.dtype, obj.shape)
+
+        # Only NumPy arrays go through Python code; everything else is pickled as usual.
+        dispatch_table = dict(copyreg.dispatch_table)  # type: ignore
+        dispatch_table[np.ndarray] = reduce_ndarray
+        self.dispatch_table = dispatch_table
+        self.buffers = buffers
+
+
+class _OutOfBandUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, buffers: Sequence[Any]) -> None:
+        super().__init__(file)
+
+        # Like _OutOfBandPickler, avoid a reference cycle through the unpickler's memo.
+        def load_out_of_band(index: int, dtype: np.dtype, shape: Tuple[int, ...]) -> np.ndarray:
+            return np.frombuffer(buffers[index], dtype=dtype).reshape(shape)
+
+        self._load_out_of_band = load_out_of_band
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name == _load_out_of_band.__name__:
+            return self._load_out_of_band
+        return super().find_class(module, name)
+
+
+def _dumps_multipart(obj: Any) -> List[Any]:
+    """
+    Serialize an object into a list of ZMQ frames: a pickle of the object followed by the raw
+    data of every large NumPy array it contains.
+    """
+    f = io.BytesIO()
+    pickler = _OutOfBandPickler(f)
+    pickler.dump(obj)
+    return [f.getbuffer(), *pickler.buffers]
+
+
+def _loads_multipart(frames: Sequence[Any]) -> Any:
+    """
+    Deserialize the frames created by _dumps_multipart(). NumPy arrays which were sent out of band
+    are read-only views of the received frames.
+    """
+    buffers = [frame.buffer if isinstance(frame, zmq.Frame) else frame for frame in frames]
+    if len(buffers) == 1:
+        # Nothing was sent out of band.
+        return pickle.loads(buffers[0])
+    return _OutOfBandUnpickler(io.BytesIO(buffers[0]), buffers[1:]).load()
+
+
+def _send_multipart(socket: zmq.Socket, obj: Any) -> None:
+    frames = _dumps_multipart(obj)
+    if len(frames) == 1:
+        socket.send(frames[0])
+    else:
+        socket.send_multipart(frames, copy=False)
+
+
+def _recv_multipart(socket: zmq.Socket) -> Any:
+    # Only the out-of-band frames are received without copying; tracking zero-copy frames costs
+    # more than copying small messages.
+    frames = [socket.recv()]  # type: List[Any]
+    while socket.getsockopt(zmq.RCVMORE):
+        frames.append(socket.recv(copy=False))
+    return _loads_multipart(frames)
+
+
 class ZMQBroadcastServer:
     """
     Similar to ZMQServer except with broadcast/gather semantics on exactly two ports.
@@ -85,6 +183,10 @@ class ZMQBroadcastServer:
     PUB (since sub_socket used bind() instead of connect()) and the server's SUB socket will
     usually miss the first message sent by the client's PUB socket.
 
+    Messages are sent as multipart ZMQ messages: the pickled message is followed by the data of
+    any large NumPy arrays it contains, which is sent without copying or pickling it (see
+    _dumps_multipart()).
+
     See ZMQ documentation for a related discussion on PUB-SUB sockets:
     http://zguide.zeromq.org/page:all#Getting-the-Message-Out (look for "one more important thing")
     http://zguide.zeromq.org/page:all#Node-Coordination
@@ -134,7 +236,7 @@ class ZMQBroadcastServer:
         Broadcast a message object to each connection.
         """
 
-        self._pub_socket.send_pyobj(_SerialMessage(self._send_serial, obj))
+        _send_multipart(self._pub_socket, _SerialMessage(self._send_serial, obj))
         self._send_serial += 1
 
     def gather_with_polling(self, health_check: Callable[[], None]) -> Tuple[List[Any], bool]:
@@ -165,7 +267,7 @@ class ZMQBroadcastServer:
         Receive one _SerialMessage from the socket and confirm that it is in-order.
         """
 
-        obj = self._pull_socket.recv_pyobj()
+        obj = _recv_multipart(self._pull_socket)
 
         if isinstance(obj, _ExceptionMessage):
             return None, _ExceptionMessage
@@ -205,15 +307,15 @@ class ZMQBroadcastClient:
     def send(self, obj: Any) -> None:
         message = _SerialMessage(self._send_serial, obj)
         self._send_serial += 1
-        self._push_socket.send_pyobj(message)
+        _send_multipart(self._push_socket, message)
 
     def send_exception_message(self) -> None:
         message = _ExceptionMessage()
-        self._push_socket.send_pyobj(message)
+        _send_multipart(self._push_socket, message)
 
     def recv(self) -> Any:
 
-        obj = self._sub_socket.recv_pyobj()
+        obj = _recv_multipart(self._sub_socket)
 
         if isinstance(obj, _SerialMessage):
             check.eq(obj.serial, self._recv_serial, "Out-of-order server message detected")
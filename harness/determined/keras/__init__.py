@@ -7,7 +7,12 @@ from determined.keras._data import (
     SequenceAdapter,
     InputData,
 )
-from determined.keras._enqueuer import _Enqueuer, _Sampler, _build_enqueuer
+from determined.keras._enqueuer import (
+    _Enqueuer,
+    _Sampler,
+    _SharedMemoryEnqueuer,
+    _build_enqueuer,
+)
 from determined.keras._tensorboard_callback import TFKerasTensorBoard
 from determined.keras._tf_keras_context import (
     TFKerasNativeContext,
@@ -1,4 +1,6 @@
 import math
+import multiprocessing.sharedctypes
+import pathlib
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
@@ -13,6 +15,20 @@ ArrayLike = Union[np.ndarray, List[np.ndarray], Dict[str, np.ndarray]]
 InputData = Union[tf.keras.utils.Sequence, tf.data.Dataset, "SequenceAdapter", tuple]
 
 
+def _load_npy_files(data: Any) -> Any:
+    """
+    Open paths to .npy files, in place of arrays or in a list or dict of arrays, as memory-mapped
+    arrays, so that datasets larger than memory are only read from disk as batches are gathered.
+    """
+    if isinstance(data, (str, pathlib.Path)):
+        return np.load(str(data), mmap_mode="r")
+    if isinstance(data, (list, tuple)):
+        return [_load_npy_files(d) for d in data]
+    if isinstance(data, dict):
+        return {k: _load_npy_files(v) for k, v in data.items()}
+    return data
+
+
 def _is_list_of_numpy_array(x: Any) -> bool:
     return isinstance(x, (list, tuple)) and all(isinstance(v, np.ndarray) for v in x)
 
@@ -32,13 +48,17 @@ def _length_of_multi_arraylike(data: ArrayLike) -> int:
         raise det.errors.InternalException(f"Unsupported data type: {type(data)}.")
 
 
-def _get_elements_in_multi_arraylike(data: ArrayLike, start: int, end: int) -> Any:
+def _get_elements_in_multi_arraylike(data: ArrayLike, elements: Union[slice, np.ndarray]) -> Any:
+    """
+    Get the elements of every array for either a slice, which returns views of the arrays, or an
+    array of indices, which gathers the elements into new arrays.
+    """
     if isinstance(data, np.ndarray):
-        return data[start:end]
+        return data[elements]
     elif isinstance(data, (list, tuple)):
-        return [arraylike[start:end] for arraylike in data]
+        return [arraylike[elements] for arraylike in data]
     elif isinstance(data, dict):
-        return {name: data[name][start:end] for name in data}
+        return {name: data[name][elements] for name in data}
     else:
         raise det.errors.InternalException(f"Unsupported data type: {type(data)}.")
 
@@ -66,6 +86,7 @@ class _ArrayLikeAdapter(tf.keras.utils.Sequence):  # type: ignore
                 has multiple inputs).
                 2) A dict mapping input names to the corresponding array, if the model
                 has named inputs.
+                Any array may be replaced by the path to a .npy file, which is memory-mapped.
 
             y: Target data. Like the input data x, it could be either Numpy array(s).
 
@@ -76,6 +97,9 @@ class _ArrayLikeAdapter(tf.keras.utils.Sequence):  # type: ignore
             drop_leftovers: If True, drop the data that cannot complete the last batch. This
                 argument is ignored if x is a Sequence or a Dataset.
         """
+        x = _load_npy_files(x)
+        y = _load_npy_files(y)
+        sample_weights = _load_npy_files(sample_weights)
 
         if not (
             isinstance(x, np.ndarray) or _is_list_of_numpy_array(x) or _is_dict_of_numpy_array(x)
@@ -115,6 +139,36 @@ class _ArrayLikeAdapter(tf.keras.utils.Sequence):  # type: ignore
         self.batch_size = batch_size
         self.drop_leftovers = drop_leftovers
 
+        # Shuffling is enabled with _shuffle_samples(). The epoch is in shared memory, so that
+        # on_epoch_end() in the main process also changes the permutation of dataloader workers.
+        self.shuffle_seed = None  # type: Optional[int]
+        self._epoch = multiprocessing.sharedctypes.RawValue("q", 0)
+        self._permutation = None  # type: Optional[Tuple[int, np.ndarray]]
+
+    def _shuffle_samples(self, shuffle_seed: int, epoch: int) -> None:
+        """
+        Shuffle the samples, not just the order of the batches, every epoch. The permutation of
+        each epoch depends only on the seed and the epoch, starting with the given epoch.
+        """
+        self.shuffle_seed = shuffle_seed
+        self._epoch.value = epoch
+
+    def on_epoch_end(self) -> None:
+        self._epoch.value += 1
+
+    def _elements(self, start: int, end: int) -> Union[slice, np.ndarray]:
+        if self.shuffle_seed is None:
+            return slice(start, end)
+        epoch = self._epoch.value
+        if self._permutation is None or self._permutation[0] != epoch:
+            permutation = np.random.RandomState([self.shuffle_seed, epoch]).permutation(
+                self._x_length
+            )
+            self._permutation = (epoch, permutation)
+        # Gather the elements of each batch in order, which reads memory-mapped arrays
+        # sequentially instead of at random.
+        return np.sort(self._permutation[1][start:end])
+
     def __len__(self) -> int:
         # Returns number of batches (keeps last partial batch).
         if self.drop_leftovers:
@@ -130,17 +184,18 @@ class _ArrayLikeAdapter(tf.keras.utils.Sequence):  # type: ignore
         # The end is not `(index + 1) * self.batch_size` if the
         # last batch is not a full `self.batch_size`
         end = min((index + 1) * self.batch_size, self._x_length)
+        elements = self._elements(start, end)
 
         if self.sample_weight is None:
             return (
-                _get_elements_in_multi_arraylike(self.x, start, end),
-                _get_elements_in_multi_arraylike(self.y, start, end),
+                _get_elements_in_multi_arraylike(self.x, elements),
+                _get_elements_in_multi_arraylike(self.y, elements),
             )
         else:
             return (
-                _get_elements_in_multi_arraylike(self.x, start, end),
-                _get_elements_in_multi_arraylike(self.y, start, end),
-                self.sample_weight[start:end],
+                _get_elements_in_multi_arraylike(self.x, elements),
+                _get_elements_in_multi_arraylike(self.y, elements),
+                self.sample_weight[elements],
             )
 
 
@@ -2,13 +2,30 @@ import abc
 import collections
 import multiprocessing
 import multiprocessing.queues
+import os
 import queue
+import shutil
+import tempfile
 import threading
-from typing import Any, Deque, Dict, Iterator, Optional, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 import numpy as np
 import tensorflow as tf
 
+from determined.keras._data import _ArrayLikeAdapter
 from determined_common import check
 
 Queue = Union[queue.Queue, multiprocessing.Queue]
@@ -35,7 +52,7 @@ class _Sampler:
         shuffle_seed: int,
         prior_batches_trained: int,
     ) -> None:
-        self.indices = list(range(length))
+        self.length = length
         self.num_shards = num_shards
         self.shuffle = shuffle
 
@@ -46,48 +63,43 @@ class _Sampler:
             "used for training",
         )
 
-        # Each shard has a certain offset from which it yields data.  When the dataset length is
-        # not evenly divisible by the shard size, that offset will change every epoch.
+        if self.shuffle:
+            assert shuffle_seed is not None
+        self.shuffle_seed = shuffle_seed
+
+        # All shards together read one stream of indices: the (shuffled) indices of every epoch,
+        # one epoch after another.  Each shard yields every num_shards'th element of that stream,
+        # starting at shard_rank.  When the dataset length is not evenly divisible by the shard
+        # size, the offset at which a shard starts within an epoch changes every epoch.
         # Example:
         #   let length=10, shard_rank=0, and num_shards=3:
         #   epoch 1: 0, 3, 6, 9
         #   epoch 2: 2, 5, 8
         #   epoch 3: 1, 4, 7
         #   epoch 4: (same as epoch 1)
-        # In this example, the offset in the first three epochs is 0, then 2, then 1.
-        # The initial offset is always shard_rank, and the offest is recalculated in _end_epoch().
-        self.offset = shard_rank
+        # self.position is the position in the stream of the next index this shard yields, so
+        # resuming after any number of batches does not need to replay the earlier epochs.
+        self.position = shard_rank + num_shards * prior_batches_trained
 
-        if self.shuffle:
-            assert shuffle_seed is not None
-            self.rng = np.random.RandomState(shuffle_seed)
-            self.rng.shuffle(self.indices)
-
-        # Start in the correct epoch of shuffle.
-        batches_to_skip = prior_batches_trained
-        while len(self._this_epoch_indices()) <= batches_to_skip:
-            batches_to_skip -= len(self._this_epoch_indices())
-            self._end_epoch()
-
-        self.offset += self.num_shards * batches_to_skip
-
-    def _this_epoch_indices(self) -> range:
-        return range(self.offset, len(self.indices), self.num_shards)
-
-    def _end_epoch(self) -> None:
-        """
-        The _Sampler is stateful, and _epoch_end is where it modifies it state after each epoch.
-        """
-        # Recalculate this shard's offset.
-        self.offset = (self.offset - len(self.indices)) % self.num_shards
-        # Reshuffle indices.
-        if self.shuffle:
-            self.rng.shuffle(self.indices)
+    @property
+    def epoch(self) -> int:
+        return self.position // self.length
+
+    def _epoch_indices(self, epoch: int) -> Sequence[int]:
+        if not self.shuffle:
+            return range(self.length)
+        # Each epoch's permutation depends only on the seed and the epoch.
+        permutation = np.random.RandomState([self.shuffle_seed, epoch]).permutation(self.length)
+        return cast(List[int], permutation.tolist())
 
     def yield_epoch(self) -> Iterator:
-        for i in self._this_epoch_indices():
-            yield self.indices[i]
-        self._end_epoch()
+        epoch, offset = divmod(self.position, self.length)
+        indices = self._epoch_indices(epoch)
+        this_epoch = range(offset, self.length, self.num_shards)
+        for i in this_epoch:
+            yield indices[i]
+        # The _Sampler is stateful; move to this shard's first index in the next epoch.
+        self.position += self.num_shards * len(this_epoch)
 
 
 class _Enqueuer(metaclass=abc.ABCMeta):
@@ -221,7 +233,7 @@ class _ParallelEnqueuer(_Enqueuer):
         self.answers = self.queue_class()()
 
         self.workers = [
-            self.worker_class()(target=_worker, args=(self.sequence, self.queries, self.answers))
+            self.worker_class()(target=self.worker_target(), args=self.worker_args())
             for _ in range(workers)
         ]
 
@@ -258,7 +270,7 @@ class _ParallelEnqueuer(_Enqueuer):
             except StopIteration:
                 self.index_iter = None
                 return
-            puttable = (i, self.order)
+            puttable = self.make_query(i, self.order)
             self.queries.put(puttable)
             self.requested.append(self.order)
             self.order += 1
@@ -277,9 +289,22 @@ class _ParallelEnqueuer(_Enqueuer):
                 self.received[order] = data
             data = self.received.pop(target)
             self.fill_requests()
-            yield data
+            yield self.unpack(target, data)
         self.sequence.on_epoch_end()
 
+    def worker_target(self) -> Callable:
+        return _worker
+
+    def worker_args(self) -> Tuple:
+        return (self.sequence, self.queries, self.answers)
+
+    def make_query(self, i: int, order: int) -> Any:
+        return (i, order)
+
+    def unpack(self, order: int, data: Any) -> Any:
+        """Convert the data received from a worker into the batch to yield."""
+        return data
+
     @abc.abstractmethod
     def queue_class(self) -> Type[Queue]:
         pass
@@ -329,6 +354,117 @@ class _MultiprocessingEnqueuer(_ParallelEnqueuer):
                 raise ValueError("data loading worker died unexpectedly")
 
 
+class _SharedBatch:
+    """
+    A batch which a worker wrote into a shared memory slot.  `structure` is the batch with every
+    array replaced by None, and `arrays` holds the (dtype, shape) of each array, in the order the
+    arrays were written to the slot.
+    """
+
+    def __init__(self, slot: int, structure: Any, arrays: List[Tuple[str, Tuple]]) -> None:
+        self.slot = slot
+        self.structure = structure
+        self.arrays = arrays
+
+
+def _is_shareable(data: Any) -> bool:
+    """Return True if every element of a batch is a NumPy array without Python objects."""
+    return all(
+        isinstance(array, np.ndarray) and not array.dtype.hasobject
+        for array in tf.nest.flatten(data)
+    )
+
+
+def _shared_memory_worker(
+    sequence: tf.keras.utils.Sequence, queries: Queue, answers: Queue, slots: List[str]
+) -> None:
+    """
+    _shared_memory_worker is _worker for a _SharedMemoryEnqueuer: each query also names the slot
+    to write the data into.  Batches which are not made of NumPy arrays are sent through the
+    answers queue instead.
+    """
+    try:
+        while True:
+            query = queries.get()
+            if query is None:
+                return
+            i, order, slot = query
+            data = sequence[i]
+            if not _is_shareable(data):
+                answers.put((data, order))
+                continue
+            arrays = []
+            with open(slots[slot], "wb") as f:
+                for array in tf.nest.flatten(data):
+                    f.write(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+                    arrays.append((array.dtype.str, array.shape))
+            structure = tf.nest.pack_sequence_as(data, [None] * len(arrays))
+            answers.put((_SharedBatch(slot, structure, arrays), order))
+    finally:
+        answers.put(None)
+
+
+class _SharedMemoryEnqueuer(_MultiprocessingEnqueuer):
+    """
+    _SharedMemoryEnqueuer is a _MultiprocessingEnqueuer which passes batches of NumPy arrays from
+    the worker processes through a ring of slot files in shared memory (/dev/shm, where it exists)
+    rather than pickling them through the answers queue.
+
+    Every query is assigned a free slot, which the worker writes the arrays of the batch into; only
+    their dtypes and shapes go through the answers queue.  The main process reads the arrays out of
+    the slot into new arrays, which is a single copy, and frees the slot right away.  The batches it
+    yields are therefore never overwritten, which matters because Keras data adapters prefetch
+    batches before the model uses them.
+
+    Slots grow with the batches written into them, so batches of any size can be shared.  Batches
+    that are not made of NumPy arrays are sent through the answers queue as usual.
+    """
+
+    def __init__(
+        self,
+        sequence: tf.keras.utils.Sequence,
+        sampler: _Sampler,
+        repeat: bool,
+        workers: int,
+        max_queue_size: int,
+    ):
+        self.slot_dir = tempfile.mkdtemp(
+            prefix="determined-enqueuer-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None
+        )
+        # One slot per request in flight, plus the slot of the batch being unpacked.
+        self.slots = [os.path.join(self.slot_dir, str(slot)) for slot in range(max_queue_size + 1)]
+        self.free_slots = list(range(len(self.slots)))
+        self.slot_of = {}  # type: Dict[int, int]
+        super().__init__(sequence, sampler, repeat, workers, max_queue_size)
+
+    def stop(self) -> None:
+        super().stop()
+        shutil.rmtree(self.slot_dir, ignore_errors=True)
+
+    def worker_target(self) -> Callable:
+        return _shared_memory_worker
+
+    def worker_args(self) -> Tuple:
+        return (self.sequence, self.queries, self.answers, self.slots)
+
+    def make_query(self, i: int, order: int) -> Any:
+        slot = self.free_slots.pop()
+        self.slot_of[order] = slot
+        return (i, order, slot)
+
+    def unpack(self, order: int, data: Any) -> Any:
+        self.free_slots.append(self.slot_of.pop(order))
+        if not isinstance(data, _SharedBatch):
+            return data
+        arrays = []
+        with open(self.slots[data.slot], "rb") as f:
+            for dtype, shape in data.arrays:
+                array = np.empty(shape, dtype)
+                f.readinto(array.reshape(-1).view(np.uint8))  # type: ignore
+                arrays.append(array)
+        return tf.nest.pack_sequence_as(data.structure, arrays)
+
+
 def _build_enqueuer(
     sequence: tf.keras.utils.Sequence,
     workers: int,
@@ -340,6 +476,8 @@ def _build_enqueuer(
     shuffle: bool,
     shuffle_seed: int,
     prior_batches_trained: int,
+    use_shared_memory: bool = False,
+    shuffle_samples: bool = False,
 ) -> _Enqueuer:
     sampler = _Sampler(
         len(sequence),
@@ -349,7 +487,15 @@ def _build_enqueuer(
         shuffle_seed,
         prior_batches_trained,
     )
+    if shuffle and shuffle_samples and isinstance(sequence, _ArrayLikeAdapter):
+        # Shuffle the samples of in-memory arrays too, starting from the epoch of the sampler.
+        sequence._shuffle_samples(shuffle_seed, sampler.epoch)
     if workers < 1:
         return _WorkerlessEnqueuer(sequence, sampler, repeat)
-    enqueuer_cls = _MultiprocessingEnqueuer if use_multiprocessing else _ThreadingEnqueuer
+    if use_multiprocessing:
+        enqueuer_cls = (
+            _SharedMemoryEnqueuer if use_shared_memory else _MultiprocessingEnqueuer
+        )  # type: Type[_ParallelEnqueuer]
+    else:
+        enqueuer_cls = _ThreadingEnqueuer
     return enqueuer_cls(sequence, sampler, repeat, workers, max_queue_size)
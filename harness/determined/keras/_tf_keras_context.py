@@ -56,7 +56,9 @@ class TFKerasContext:
         self._fit_workers = 1
         self._fit_use_multiprocessing = False
         self._fit_max_queue_size = 10
+        self._fit_use_shared_memory = False
         self._fit_shuffle = True
+        self._fit_shuffle_samples = False
         self._fit_validation_steps = None
 
     def configure_fit(
@@ -68,11 +70,23 @@ class TFKerasContext:
         max_queue_size: Optional[bool] = None,
         shuffle: Optional[bool] = None,
         validation_steps: Any = _arg_not_provided,
+        use_shared_memory: Optional[bool] = None,
+        shuffle_samples: Optional[bool] = None,
     ) -> None:
         """
         Configure parameters of ``model.fit()``.  See the `Keras documentation
         <https://keras.io/api/>`__ for the meaning of each parameter.
 
+        ``use_shared_memory`` is specific to Determined.  When it is set along with
+        ``use_multiprocessing=True``, worker processes write batches of NumPy arrays from a
+        ``tf.keras.utils.Sequence`` into a set of shared memory buffers instead of pickling them
+        through a queue to the training process, which copies each batch out of its buffer once.
+
+        ``shuffle_samples`` is specific to Determined.  When it is set along with ``shuffle=True``
+        and the training data is a tuple of NumPy arrays, the samples are shuffled across batches
+        every epoch, rather than only the order of the batches.  Batches are then gathered from
+        the shuffled samples instead of being slices of the arrays.
+
         Note that the output of ``verbose=True`` will be visually different in Determined than with
         Keras, for better rendering in trial logs.
 
@@ -106,6 +120,10 @@ class TFKerasContext:
             self._fit_shuffle = shuffle
         if not isinstance(validation_steps, _ArgNotProvided):
             self._fit_validation_steps = validation_steps
+        if use_shared_memory is not None:
+            self._fit_use_shared_memory = use_shared_memory
+        if shuffle_samples is not None:
+            self._fit_shuffle_samples = shuffle_samples
 
     def _wrap_model_with_train_fn(self, model: Any, train_fn: Optional[Callable]) -> Any:
         class _WrappedModel(type(model)):  # type: ignore
@@ -679,6 +679,8 @@ class TFKerasTrialController(det.LoopTrialController):
                 shuffle=self.context._fit_shuffle,
                 shuffle_seed=self.context.get_trial_seed(),
                 prior_batches_trained=self.context.env.initial_workload.total_batches_processed,
+                use_shared_memory=self.context._fit_use_shared_memory,
+                shuffle_samples=self.context._fit_shuffle_samples,
             )
             enqueuer.start()
             self.enqueuers.append(enqueuer)
@@ -733,6 +735,7 @@ class TFKerasTrialController(det.LoopTrialController):
                 shuffle=False,
                 shuffle_seed=0,
                 prior_batches_trained=0,
+                use_shared_memory=self.context._fit_use_shared_memory,
             )
             enqueuer.start()
             self.enqueuers.append(enqueuer)
@@ -995,7 +998,8 @@ class TFKerasTrial(det.Trial):
             1) A tuple ``(x_train, y_train)``, where ``x_train`` is a NumPy array
             (or array-like), a list of arrays (in case the model has multiple inputs), or
             a dict mapping input names to the corresponding array, if the model has named inputs.
-            ``y_train`` should be a NumPy array.
+            ``y_train`` should be a NumPy array. Any of the arrays may be replaced by the path to a
+            ``.npy`` file, which is memory-mapped rather than loaded into memory.
 
             2) A tuple ``(x_train, y_train, sample_weights)``
             of NumPy arrays.
@@ -1030,7 +1034,8 @@ class TFKerasTrial(det.Trial):
             1) A tuple ``(x_val, y_val)``, where ``x_val`` is a NumPy array
             (or array-like), a list of arrays (in case the model has multiple inputs), or
             a dict mapping input names to the corresponding array, if the model has named inputs.
-            ``y_val`` should be a NumPy array.
+            ``y_val`` should be a NumPy array. Any of the arrays may be replaced by the path to a
+            ``.npy`` file, which is memory-mapped rather than loaded into memory.
 
             2) A tuple ``(x_val, y_val, sample_weights)``
             of NumPy arrays.
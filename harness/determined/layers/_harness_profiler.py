@@ -1,6 +1,7 @@
+import logging
 import threading
 import time
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import matplotlib.pyplot as plt
 import psutil
@@ -53,11 +54,23 @@ class ThroughputMeasurement(Measurement):
 
 
 class HarnessProfiler(object):
-    """Monitors utilization of the process in a seperate thread."""
+    """
+    Monitors utilization of the process in a seperate thread.
+
+    GPU utilization is read from `gpu_sampler` if it is given; otherwise, from the cheapest
+    sampler available (see determined.gpu.make_gpu_sampler). The profiler closes the sampler
+    when it stops, or as soon as sampling fails, after which it no longer measures the GPUs.
+    """
 
-    def __init__(self, interval: float = 0.1, use_gpu: bool = False) -> None:
+    def __init__(
+        self,
+        interval: float = 0.1,
+        use_gpu: bool = False,
+        gpu_sampler: Optional[determined.gpu.GPUSampler] = None,
+    ) -> None:
         self._use_gpu = use_gpu
         self._interval = interval
+        self._gpu_sampler = gpu_sampler
         self._stop_signal = threading.Event()
         self._process = psutil.Process()
         self._monitor_thread = threading.Thread(
@@ -98,15 +111,45 @@ class HarnessProfiler(object):
             "Process Write (char/s)", process_io_stats.write_chars
         )
 
-        if self._use_gpu:
-            gpu_list = determined.gpu.get_gpus()
-            self._gpu_loads = {g.id: Measurement("GPU {} Load (%)".format(g.id)) for g in gpu_list}
-            self._gpu_utilizations = {
-                g.id: Measurement("GPU {} Memory Utilization (%)".format(g.id)) for g in gpu_list
-            }
+        # GPU measurements are added as the sampler reports each GPU, since a streaming sampler
+        # may not have reported any GPU yet.
+        self._gpu_loads = {}  # type: Dict[int, Measurement]
+        self._gpu_utilizations = {}  # type: Dict[int, Measurement]
+        if self._use_gpu and self._gpu_sampler is None:
+            self._gpu_sampler = determined.gpu.make_gpu_sampler(self._interval)
+
+    def _add_gpu_measurements(self, gpu_sampler: determined.gpu.GPUSampler) -> None:
+        for g in gpu_sampler.sample():
+            if g.id not in self._gpu_loads:
+                self._gpu_loads[g.id] = Measurement("GPU {} Load (%)".format(g.id))
+                self._gpu_utilizations[g.id] = Measurement(
+                    "GPU {} Memory Utilization (%)".format(g.id)
+                )
+            self._gpu_loads[g.id].add_measurement(g.load)
+            self._gpu_utilizations[g.id].add_measurement(g.memoryUtil)
+
+    def _sample_gpus(self) -> None:
+        gpu_sampler = cast(determined.gpu.GPUSampler, self._gpu_sampler)
+        try:
+            self._add_gpu_measurements(gpu_sampler)
+        except Exception as e:
+            # Keep monitoring everything else; the GPU measurements so far are kept.
+            logging.warning(f"Failed to sample GPU utilization; no longer sampling GPUs: {e}")
+            self._gpu_sampler = determined.gpu.NoGPUSampler()
+            try:
+                gpu_sampler.close()
+            except Exception as e:
+                logging.warning(f"Failed to close GPU sampler: {e}")
 
     def _monitor(self) -> None:
         self._initialize_measurements()
+        try:
+            self._monitor_loop()
+        finally:
+            if self._gpu_sampler is not None:
+                self._gpu_sampler.close()
+
+    def _monitor_loop(self) -> None:
         while not self._stop_signal.is_set():
             time.sleep(self._interval)
 
@@ -128,9 +171,7 @@ class HarnessProfiler(object):
             self._process_write_chars.add_measurement(process_io_stats.write_chars)
 
             if self._use_gpu:
-                for g in determined.gpu.get_gpus():
-                    self._gpu_loads[g.id].add_measurement(g.load)
-                    self._gpu_utilizations[g.id].add_measurement(g.memoryUtil)
+                self._sample_gpus()
 
     def start(self) -> None:
         self._monitor_thread.start()
@@ -154,8 +195,8 @@ class HarnessProfiler(object):
         ]
 
         if self._use_gpu:
-            measurements.extend(self._gpu_loads.values())
-            measurements.extend(self._gpu_utilizations.values())
+            measurements.extend(self._gpu_loads[i] for i in sorted(self._gpu_loads))
+            measurements.extend(self._gpu_utilizations[i] for i in sorted(self._gpu_utilizations))
 
         return {m.display_name(): m.history() for m in measurements}
 
@@ -1,12 +1,13 @@
 import logging
 import math
 import pathlib
+import threading
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, cast
 
 import determined as det
 from determined import tensorboard, workload
-from determined_common import storage
+from determined_common import storage, util
 from determined_common.check import (
     check_eq,
     check_len,
@@ -15,12 +16,87 @@ from determined_common.check import (
     check_not_none,
 )
 
+# TensorBoard event files are synced to persistent storage at most this often during training.
+TENSORBOARD_SYNC_INTERVAL_SECONDS = 10.0
+
 
 def _current_timestamp() -> datetime:
     """Returns the current time as a datetime object in the UTC timezone."""
     return datetime.now(timezone.utc)
 
 
+class _TensorboardSyncer:
+    """
+    _TensorboardSyncer syncs TensorBoard event files in a background thread so that workload
+    responses do not wait for event files to be uploaded. Requests are debounced: however often a
+    sync is requested, the event files are synced at most once every `interval` seconds.
+
+    Errors from background syncs are re-raised on the calling thread by the next call to
+    request(), check(), or flush(). The thread is only started by the first request().
+
+    Every sync runs with a fork of the random state, so that random numbers drawn by uploads (e.g.,
+    for retry jitter) do not change the random state of the trial.
+    """
+
+    def __init__(self, tensorboard_mgr: tensorboard.TensorboardManager, interval: float) -> None:
+        self.tensorboard_mgr = tensorboard_mgr
+        self.interval = interval
+        # Serializes background syncs with flush().
+        self._lock = threading.Lock()
+        self._requested = threading.Event()
+        self._closed = threading.Event()
+        self._error = None  # type: Optional[BaseException]
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def _sync(self) -> None:
+        with self._lock:
+            util.preserve_random_state(self.tensorboard_mgr.sync)()
+
+    def _run(self) -> None:
+        while True:
+            self._requested.wait()
+            if self._closed.is_set():
+                return
+            self._requested.clear()
+            try:
+                self._sync()
+            except Exception as e:
+                logging.warning("Failed to sync TensorBoard event files: {}".format(e))
+                self._error = e
+            # Requests made in the meantime are handled together, after the interval.
+            if self._closed.wait(self.interval):
+                return
+
+    def check(self) -> None:
+        """Re-raise the error of a background sync which has failed."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def request(self) -> None:
+        """Sync the event files in the background."""
+        self.check()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="tensorboard-syncer", daemon=True
+            )
+            self._thread.start()
+        self._requested.set()
+
+    def flush(self) -> None:
+        """Sync every event file written so far before returning."""
+        self.check()
+        self._requested.clear()
+        self._sync()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._closed.set()
+        self._requested.set()
+        self._thread.join()
+
+
 class WorkloadManager(workload.Source):
     """
     WorkloadManager handles workload messages after they are received on the
@@ -82,26 +158,38 @@ class _TrialWorkloadManager(WorkloadManager):
         )
         self.workload = None  # type: Optional[workload.Workload]
 
+        self.tensorboard_syncer = _TensorboardSyncer(
+            self.tensorboard_mgr, TENSORBOARD_SYNC_INTERVAL_SECONDS
+        )
+
     def __iter__(self) -> workload.Stream:
-        for w, _, response_func in self.workloads:
-            if self.rendezvous_info.get_rank() == 0:
-                logging.info("Running workload {}".format(w))
-            else:
-                logging.debug("Running workload {}".format(w))
-            self.check_sane_workload(w)
-
-            self.workload = w
-
-            if w.kind == workload.Workload.Kind.RUN_STEP:
-                yield from self.yield_train_for_step(w, response_func)
-            elif w.kind == workload.Workload.Kind.COMPUTE_VALIDATION_METRICS:
-                yield from self.yield_compute_validation_metrics(w, response_func)
-            elif w.kind == workload.Workload.Kind.CHECKPOINT_MODEL:
-                yield from self.yield_checkpoint_model(w, response_func)
-            elif w.kind == workload.Workload.Kind.TERMINATE:
-                yield from self.yield_terminate(w, response_func)
-            else:
-                raise AssertionError("Unexpected workload: {}".format(w.kind))
+        try:
+            for w, _, response_func in self.workloads:
+                if self.rendezvous_info.get_rank() == 0:
+                    logging.info("Running workload {}".format(w))
+                else:
+                    logging.debug("Running workload {}".format(w))
+                self.check_sane_workload(w)
+
+                self.workload = w
+
+                # Surface failed background syncs as soon as possible.
+                self.tensorboard_syncer.check()
+
+                if w.kind == workload.Workload.Kind.RUN_STEP:
+                    yield from self.yield_train_for_step(w, response_func)
+                elif w.kind == workload.Workload.Kind.COMPUTE_VALIDATION_METRICS:
+                    yield from self.yield_compute_validation_metrics(w, response_func)
+                elif w.kind == workload.Workload.Kind.CHECKPOINT_MODEL:
+                    yield from self.yield_checkpoint_model(w, response_func)
+                elif w.kind == workload.Workload.Kind.TERMINATE:
+                    yield from self.yield_terminate(w, response_func)
+                else:
+                    raise AssertionError("Unexpected workload: {}".format(w.kind))
+
+            self.tensorboard_syncer.flush()
+        finally:
+            self.tensorboard_syncer.close()
 
     def check_sane_workload(self, new_workload: workload.Workload) -> None:
         # If this is the initial workload, we don't expect to start with
@@ -155,7 +243,7 @@ class _TrialWorkloadManager(WorkloadManager):
                     wkld.step_id, wkld.num_batches, wkld.total_batches_processed, metrics
                 )
 
-            self.tensorboard_mgr.sync()
+            self.tensorboard_syncer.request()
 
             out_response = {
                 "type": "WORKLOAD_COMPLETED",
@@ -196,7 +284,7 @@ class _TrialWorkloadManager(WorkloadManager):
                     wkld.step_id, wkld.total_batches_processed, v_metrics
                 )
 
-            self.tensorboard_mgr.sync()
+            self.tensorboard_syncer.request()
 
             # Check that the validation metrics computed by the model code
             # includes the metric used by the search method.
@@ -293,7 +381,7 @@ class _TrialWorkloadManager(WorkloadManager):
             )
 
             logging.info("Saved trial to checkpoint {}".format(metadata.storage_id))
-            self.tensorboard_mgr.sync()
+            self.tensorboard_syncer.request()
 
             nonlocal message
             message = {
@@ -317,6 +405,8 @@ class _TrialWorkloadManager(WorkloadManager):
         self, wkld: workload.Workload, respond: workload.ResponseFunc
     ) -> workload.Stream:
 
+        self.tensorboard_syncer.flush()
+
         # The master can't actually handle WORKLOAD_COMPLETED messages for TERMINATE workloads.
         def _respond(_: workload.Response) -> None:
             respond(workload.Skipped())
@@ -1,3 +1,11 @@
+from determined.pytorch._blob import (
+    BlobBackend,
+    BlobCache,
+    BlobPrefetcher,
+    GCSBlobBackend,
+    LocalBlobBackend,
+    _PrefetchBatchSampler,
+)
 from determined.pytorch._data import (
     DataLoader,
     DistributedBatchSampler,
@@ -11,7 +19,15 @@ from determined.pytorch._data import (
 )
 from determined.pytorch._callback import PyTorchCallback, ClipGradsL2Norm, ClipGradsL2Value
 from determined.pytorch._lr_scheduler import LRScheduler
-from determined.pytorch._reducer import MetricReducer, _SimpleReducer, Reducer, _reduce_metrics
+from determined.pytorch._metrics import _DeviceMetricAccumulator
+from determined.pytorch._prefetch import _BatchPrefetcher
+from determined.pytorch._reducer import (
+    MetricReducer,
+    _SimpleReducer,
+    Reducer,
+    _allreduce_metrics,
+    _reduce_metrics,
+)
 from determined.pytorch._experimental import PyTorchExperimentalContext
 from determined.pytorch._pytorch_context import PyTorchTrialContext
 from determined.pytorch._pytorch_trial import PyTorchTrial, PyTorchTrialController, reset_parameters
@@ -0,0 +1,315 @@
+"""
+Backends for datasets which read every sample from an object store (e.g., one image per blob in a
+GCS bucket), with an optional on-disk read-through cache so that blobs are only downloaded once
+across epochs, and a prefetcher which downloads the blobs of upcoming batches in the background.
+"""
+import abc
+import collections
+import contextlib
+import hashlib
+import itertools
+import logging
+import os
+import pathlib
+import threading
+import uuid
+from concurrent import futures
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple, cast
+
+import torch
+
+from determined import util
+from determined_common import check
+
+DEFAULT_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+# After an eviction, the cache holds at most this fraction of its maximum size, so that it does
+# not have to scan the cache directory again for every new blob.
+_EVICTION_TARGET = 0.9
+
+_TMP_PREFIX = ".tmp-"
+
+
+class BlobCache:
+    """
+    BlobCache keeps blobs in a node-local directory, up to approximately `max_size` bytes in
+    total; the least recently used blobs are evicted first.
+
+    The cache directory may be shared by several processes (e.g., the worker processes of a
+    DataLoader or the trials on the same agent). Blobs are written to a temporary file which is
+    renamed into place, so a blob is either fully cached or not at all.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_CACHE_MAX_SIZE) -> None:
+        check.gt(len(cache_dir), 0, "cache_dir must not be empty")
+        check.gt(max_size, 0, "max_size must be greater than 0")
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        # The size of the cache as of the last scan plus the blobs this process has added since;
+        # other processes sharing the cache directory are only accounted for by the next scan.
+        self._size = None  # type: Optional[int]
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached blob for `key`, or None if it is not cached."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Record the use for LRU eviction; the blob may have been evicted in the meantime.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Add a blob to the cache, evicting the least recently used blobs if the cache is full."""
+        if len(data) > self.max_size:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), "{}{}".format(_TMP_PREFIX, uuid.uuid4()))
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                size = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                size = self._size + len(data)
+            self._size = size
+            if size > self.max_size:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Return (last use time, size, path) for every cached blob."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.startswith(_TMP_PREFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size * _EVICTION_TARGET:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+        self._size = total
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class BlobBackend(metaclass=abc.ABCMeta):
+    """
+    BlobBackend is the base class of backends which fetch blobs by key. Subclasses implement
+    _fetch(). If a :class:`BlobCache` is given, get() reads through it, so every blob is only
+    fetched once as long as it stays in the cache.
+
+    Backends are passed to the worker processes of a DataLoader along with the dataset; any
+    client of a remote store should be created lazily, in the process which uses it.
+    """
+
+    def __init__(self, cache: Optional[BlobCache] = None) -> None:
+        self.cache = cache
+
+    @abc.abstractmethod
+    def _fetch(self, key: str) -> bytes:
+        """Fetch the blob for `key` from the store, bypassing the cache."""
+        pass
+
+    def get(self, key: str) -> bytes:
+        """Return the blob for `key`."""
+        if self.cache is None:
+            return self._fetch(key)
+
+        data = self.cache.get(key)
+        if data is None:
+            data = self._fetch(key)
+            self.cache.put(key, data)
+        return data
+
+    def prefetch(self, key: str) -> None:
+        """Fetch the blob for `key` into the cache, unless it is cached already."""
+        check.is_not_none(self.cache, "Prefetching blobs requires a BlobCache")
+        cache = cast(BlobCache, self.cache)
+        if key not in cache:
+            cache.put(key, self._fetch(key))
+
+
+class GCSBlobBackend(BlobBackend):
+    """Fetch blobs from a Google Cloud Storage bucket, retrying with exponential backoff."""
+
+    def __init__(
+        self, bucket_name: str, project: Optional[str] = None, cache: Optional[BlobCache] = None
+    ) -> None:
+        super().__init__(cache)
+        self.bucket_name = bucket_name
+        self.project = project
+        self._bucket = None  # type: Any
+        self._pid = None  # type: Optional[int]
+
+    def _get_bucket(self) -> Any:
+        # Clients cannot be shared with forked processes; create one per process.
+        if self._bucket is None or self._pid != os.getpid():
+            from google.cloud import storage
+
+            self._bucket = storage.Client(project=self.project).bucket(self.bucket_name)
+            self._pid = os.getpid()
+        return self._bucket
+
+    def _fetch(self, key: str) -> bytes:
+        return cast(bytes, util.download_gcs_blob_with_backoff(self._get_bucket().blob(key)))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_bucket"] = None
+        state["_pid"] = None
+        return state
+
+
+class LocalBlobBackend(BlobBackend):
+    """Read blobs from files under a local directory; the key is the path of the file."""
+
+    def __init__(self, root: str, cache: Optional[BlobCache] = None) -> None:
+        super().__init__(cache)
+        check.true(os.path.isdir(root), "{} is not a directory".format(root))
+        self.root = root
+
+    def _fetch(self, key: str) -> bytes:
+        return pathlib.Path(self.root).joinpath(key).read_bytes()
+
+
+class BlobPrefetcher:
+    """
+    BlobPrefetcher downloads the blobs of the next `lookahead` batches into the cache of a
+    :class:`BlobBackend` with `num_threads` threads, while the current batches are loaded.
+
+    Pass it to :class:`determined.pytorch.DataLoader` as ``blob_prefetcher``; `keys` maps the
+    index of a sample in the dataset to the key of its blob. Batches are prefetched in the
+    process which samples them, so the cache must be shared with the DataLoader workers.
+    """
+
+    def __init__(
+        self,
+        backend: BlobBackend,
+        keys: Callable[[int], str],
+        lookahead: int = 2,
+        num_threads: int = 8,
+    ) -> None:
+        check.is_not_none(backend.cache, "Prefetching blobs requires a BlobCache")
+        check.gt(lookahead, 0, "lookahead must be greater than 0")
+        check.gt(num_threads, 0, "num_threads must be greater than 0")
+        self.backend = backend
+        self.keys = keys
+        self.lookahead = lookahead
+        self.num_threads = num_threads
+
+        # The keys which are being prefetched, so that a blob which is in several upcoming
+        # batches is only downloaded once.
+        self._in_flight = set()  # type: Set[str]
+        self._lock = threading.Lock()
+
+    def _prefetch(self, key: str) -> None:
+        try:
+            self.backend.prefetch(key)
+        except Exception as e:
+            # The blob is fetched again when its sample is loaded, which will surface the error.
+            logging.warning("Failed to prefetch blob {}: {}".format(key, e))
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def _submit(self, pool: futures.ThreadPoolExecutor, index: int) -> None:
+        """Prefetch the blob of a sample in `pool`, unless it is being prefetched already."""
+        key = self.keys(index)
+        with self._lock:
+            if key in self._in_flight:
+                return
+            self._in_flight.add(key)
+        pool.submit(self._prefetch, key)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_in_flight"] = set()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def wrap(self, batch_sampler: torch.utils.data.BatchSampler) -> "_PrefetchBatchSampler":
+        return _PrefetchBatchSampler(batch_sampler, self)
+
+
+class _PrefetchBatchSampler(torch.utils.data.BatchSampler):
+    """
+    Yield the batches of a batch sampler unchanged, while the blobs of the following batches are
+    prefetched. This wraps the batch sampler after it has been adapted for repeating, skipping,
+    and sharding, so only the batches of this process are prefetched.
+    """
+
+    def __init__(
+        self, batch_sampler: torch.utils.data.BatchSampler, prefetcher: BlobPrefetcher
+    ) -> None:
+        self.batch_sampler = batch_sampler
+        self.prefetcher = prefetcher
+
+    def __len__(self) -> int:
+        return len(self.batch_sampler)
+
+    def __iter__(self) -> Iterator:
+        batches = iter(self.batch_sampler)
+        with futures.ThreadPoolExecutor(self.prefetcher.num_threads) as pool:
+
+            def submit(batch: List[int]) -> None:
+                for index in batch:
+                    self.prefetcher._submit(pool, index)
+
+            window = collections.deque(
+                itertools.islice(batches, self.prefetcher.lookahead + 1)
+            )  # type: Deque[List[int]]
+            # The first batch is about to be loaded; prefetching it would only download it twice.
+            for batch in itertools.islice(window, 1, None):
+                submit(batch)
+
+            while window:
+                yield window.popleft()
+                for batch in itertools.islice(batches, 1):
+                    window.append(batch)
+                    submit(batch)
@@ -0,0 +1,225 @@
+"""
+A sharded checkpoint format for PyTorchTrial which avoids holding a second copy of every tensor
+in host memory when saving or restoring a checkpoint.
+
+Every state dict of the checkpoint is written to its own pair of files in a ``state_dict``
+directory: ``<name>.bin`` holds the raw data of each tensor, one after another, and ``<name>.pkl``
+holds everything else, pickled with cloudpickle, with each tensor replaced by a reference to its
+entry in ``index.json``. Tensors are copied to the host and written one at a time when saving, and
+are memory-mapped from ``<name>.bin`` when loading, so they are only read from disk as they are
+copied into the model, optimizer, etc., or to the device they are loaded onto. The index is written
+last; a directory without one is not a complete checkpoint.
+"""
+import json
+import pathlib
+import pickle
+from typing import Any, BinaryIO, Dict, List, Optional, cast
+
+import cloudpickle
+import numpy as np
+import torch
+
+from determined_common import check
+
+SHARDED_CHECKPOINT_DIR = "state_dict"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# Tensor data is aligned to this many bytes in the data files.
+ALIGNMENT = 64
+
+
+def _can_shard(obj: Any) -> bool:
+    # Other tensor types (e.g., parameters, sparse tensors, or tensors that require gradients)
+    # are pickled as usual; so are dtypes which NumPy cannot represent.
+    return (
+        type(obj) is torch.Tensor
+        and obj.layout == torch.strided
+        and not obj.requires_grad
+        and not obj.is_quantized
+        and obj.dtype
+        in (
+            torch.bool,
+            torch.uint8,
+            torch.int8,
+            torch.int16,
+            torch.int32,
+            torch.int64,
+            torch.float16,
+            torch.float32,
+            torch.float64,
+        )
+    )
+
+
+class _ShardPickler(cloudpickle.CloudPickler):  # type: ignore
+    def __init__(self, f: BinaryIO, data: BinaryIO) -> None:
+        super().__init__(f)
+        self.data = data
+        self.tensors = []  # type: List[Dict[str, Any]]
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        if not _can_shard(obj):
+            return None
+
+        offset = self.data.tell()
+        padding = -offset % ALIGNMENT
+        self.data.write(b"\0" * padding)
+        array = obj.detach().cpu().contiguous().numpy()
+        self.data.write(memoryview(array.reshape(-1)).cast("B"))
+        self.tensors.append(
+            {
+                "offset": offset + padding,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "location": torch.serialization.location_tag(obj.storage()),  # type: ignore
+            }
+        )
+        return len(self.tensors) - 1
+
+
+def _restore_location(tensor: torch.Tensor, location: str, map_location: Any) -> torch.Tensor:
+    """
+    Move a tensor which was saved on the device `location` and loaded on the CPU to where
+    torch.load() would load it with the given `map_location`.
+    """
+    if map_location is None:
+        return tensor.to(location)
+    if isinstance(map_location, (str, torch.device)):
+        return tensor.to(map_location)
+    if isinstance(map_location, dict):
+        return tensor.to(map_location.get(location, location))
+    if callable(map_location):
+        storage = map_location(tensor.storage(), location)
+        if storage is None:
+            return tensor.to(location)
+        return torch.tensor([], dtype=tensor.dtype, device=storage.device).set_(
+            storage, 0, tensor.size(), tensor.stride()
+        )
+    raise TypeError(
+        "map_location must be a string, torch.device, dict, or callable, not {}".format(
+            type(map_location).__name__
+        )
+    )
+
+
+class _ShardUnpickler(pickle.Unpickler):
+    def __init__(
+        self,
+        f: BinaryIO,
+        data: Optional[np.memmap],
+        tensors: List[Dict[str, Any]],
+        map_location: Any,
+    ) -> None:
+        super().__init__(f)
+        self.data = data
+        self.tensors = tensors
+        self.map_location = map_location
+
+    def persistent_load(self, pid: Any) -> torch.Tensor:
+        info = self.tensors[pid]
+        dtype = np.dtype(info["dtype"])
+        nbytes = int(np.prod(info["shape"], dtype=np.int64)) * dtype.itemsize
+        check.is_not_none(self.data, "Missing tensor data in sharded checkpoint")
+        data = cast(np.memmap, self.data)
+        offset = info["offset"]
+        array = data[offset : offset + nbytes].view(dtype).reshape(info["shape"])
+        # Checkpoints without locations were loaded on the CPU by default.
+        return _restore_location(
+            torch.from_numpy(array), info.get("location", "cpu"), self.map_location
+        )
+
+
+def _save_shard(obj: Any, path: pathlib.Path, name: str) -> Dict[str, Any]:
+    with path.joinpath(name + ".pkl").open("wb") as f, path.joinpath(name + ".bin").open(
+        "wb"
+    ) as data:
+        pickler = _ShardPickler(f, data)
+        pickler.dump(obj)
+    return {"tensors": pickler.tensors}
+
+
+def _load_shard(
+    path: pathlib.Path,
+    name: str,
+    shard: Dict[str, Any],
+    map_location: Any,
+) -> Any:
+    data = None
+    if path.joinpath(name + ".bin").stat().st_size > 0:
+        # Copy-on-write, so that the tensors are writable without modifying the checkpoint.
+        data = np.memmap(str(path.joinpath(name + ".bin")), dtype=np.uint8, mode="c")
+    with path.joinpath(name + ".pkl").open("rb") as f:
+        return _ShardUnpickler(f, data, shard["tensors"], map_location).load()
+
+
+def save_sharded_checkpoint(checkpoint: Dict[str, Any], path: pathlib.Path) -> None:
+    """
+    Save a checkpoint dictionary into the ``state_dict`` directory under `path`. Every list
+    element of the dictionary (e.g., the state dict of each model) is stored in its own shard.
+    """
+    path = path.joinpath(SHARDED_CHECKPOINT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+
+    entries = {}  # type: Dict[str, Any]
+    shards = {}  # type: Dict[str, Any]
+    for key, value in checkpoint.items():
+        if isinstance(value, list):
+            entries[key] = ["{}.{}".format(key, i) for i in range(len(value))]
+            for name, element in zip(entries[key], value):
+                shards[name] = _save_shard(element, path, name)
+        else:
+            entries[key] = key
+            shards[key] = _save_shard(value, path, key)
+
+    with path.joinpath(INDEX_FILE).open("w") as f:
+        json.dump({"version": INDEX_VERSION, "entries": entries, "shards": shards}, f)
+
+
+def load_sharded_checkpoint(path: pathlib.Path, map_location: Any = None) -> Dict[str, Any]:
+    """
+    Load a checkpoint saved by save_sharded_checkpoint() from the ``state_dict`` directory under
+    `path`. Like torch.load(), tensors are loaded on the device they were saved on, unless
+    `map_location` (a string, torch.device, dict, or callable) maps them elsewhere. Tensors loaded
+    on the CPU are memory-mapped from the checkpoint.
+    """
+    path = path.joinpath(SHARDED_CHECKPOINT_DIR)
+    with path.joinpath(INDEX_FILE).open() as f:
+        index = json.load(f)
+    check.eq(index["version"], INDEX_VERSION, "Unsupported sharded checkpoint version")
+
+    checkpoint = {}  # type: Dict[str, Any]
+    for key, names in index["entries"].items():
+        if isinstance(names, list):
+            checkpoint[key] = [
+                _load_shard(path, name, index["shards"][name], map_location) for name in names
+            ]
+        else:
+            checkpoint[key] = _load_shard(path, names, index["shards"][names], map_location)
+    return checkpoint
+
+
+def load_checkpoint(path: pathlib.Path, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Load the checkpoint dictionary of a PyTorchTrial checkpoint directory in any format. `kwargs`
+    are passed to torch.load(); only `map_location` applies to sharded checkpoints.
+    """
+    # Backwards compat with older checkpoint formats. List is newest to
+    # oldest known state_dict locations.
+    potential_paths = [
+        [SHARDED_CHECKPOINT_DIR, INDEX_FILE],
+        ["state_dict.pth"],
+        ["determined", "state_dict.pth"],
+        ["pedl", "state_dict.pth"],
+        ["checkpoint.pt"],
+    ]
+
+    for ckpt_path in potential_paths:
+        maybe_ckpt = path.joinpath(*ckpt_path)
+        if not maybe_ckpt.exists():
+            continue
+        if ckpt_path[0] == SHARDED_CHECKPOINT_DIR:
+            return load_sharded_checkpoint(path, kwargs.get("map_location"))
+        return torch.load(str(maybe_ckpt), **kwargs)  # type: ignore
+
+    raise FileNotFoundError("No PyTorch checkpoint found in {}".format(path))
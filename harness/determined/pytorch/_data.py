@@ -1,3 +1,4 @@
+import itertools
 import logging
 from typing import (
     Any,
@@ -19,13 +20,13 @@ import numpy as np
 import torch
 
 # from torch.utils.data.dataloader import _InfiniteConstantSampler
+from determined.pytorch._blob import BlobPrefetcher
 from determined_common.check import check_gt, check_lt
 
 # TODO(DET-1524): Uncomment inports.
 from torch.utils.data import (  # _DatasetKind,; IterableDataset,
     BatchSampler,
     Dataset,
-    RandomSampler,
     Sampler,
     SequentialSampler,
     _utils,
@@ -85,6 +86,9 @@ class DataLoader:
         worker_init_fn (callable, optional): If not ``None``, this will be called on each
             worker subprocess with the worker id (an int in ``[0, num_workers - 1]``) as
             input, after seeding and before data loading. (default: ``None``)
+        blob_prefetcher (BlobPrefetcher, optional): if set, the blobs of the samples of
+            upcoming batches are downloaded into the cache of its backend in the background.
+            See :class:`determined.pytorch.BlobPrefetcher`. (default: ``None``)
     """
 
     def __init__(
@@ -100,6 +104,7 @@ class DataLoader:
         drop_last: bool = False,
         timeout: float = 0,
         worker_init_fn: _worker_init_fn_t = None,
+        blob_prefetcher: Optional[BlobPrefetcher] = None,
     ):
 
         # BEGIN VENDORED CODE FROM PYTORCH
@@ -158,7 +163,7 @@ class DataLoader:
             #    else:
             #        sampler = SequentialSampler(dataset)
             if shuffle:
-                sampler = RandomSampler(dataset)
+                sampler = _EpochRandomSampler(dataset)
             else:
                 sampler = SequentialSampler(dataset)
 
@@ -180,6 +185,8 @@ class DataLoader:
         self.collate_fn = collate_fn
         # END VENDORED CODE FROM PYTORCH
 
+        self.blob_prefetcher = blob_prefetcher
+
     # BEGIN VENDORED CODE FROM PYTORCH
     # https://github.com/pytorch/pytorch/blob/v1.3.1/torch/utils/data/dataloader.py#L280
     @property
@@ -195,6 +202,8 @@ class DataLoader:
         batch_sampler = adapt_batch_sampler(
             batch_sampler, repeat=repeat, skip=skip, num_replicas=num_replicas, rank=rank
         )
+        if self.blob_prefetcher is not None:
+            batch_sampler = self.blob_prefetcher.wrap(batch_sampler)
         return torch.utils.data.DataLoader(
             self.dataset,
             batch_sampler=batch_sampler,
@@ -333,14 +342,91 @@ class SkipBatchSampler(torch.utils.data.BatchSampler):
     def __len__(self) -> int:
         return self.length
 
-    def __iter__(self) -> Generator:
-        iterator = iter(self.batch_sampler)
-        for _ in range(self.skip):
-            try:
-                next(iterator)
-            except StopIteration:
-                return
-        yield from iterator
+    def __iter__(self) -> Iterator:
+        return _skip_batches(self.batch_sampler, self.skip)
+
+
+class _EpochRandomSampler(torch.utils.data.Sampler):
+    """
+    _EpochRandomSampler samples elements in a random order, like torch.utils.data.RandomSampler,
+    but the permutation of each epoch is a function of a seed and the epoch number. This makes it
+    possible to start from any epoch without drawing the permutations of the earlier epochs.
+
+    Every iteration over the sampler is a new epoch. By default, the seed is drawn from the torch
+    random number generator, so the permutations are reproducible given the trial seed.
+    """
+
+    def __init__(self, data_source: Dataset, seed: Optional[int] = None) -> None:
+        self.data_source = data_source
+        if seed is None:
+            seed = int(torch.randint(2 ** 31, ()).item())
+        self.seed = seed
+        self.epoch = 0
+
+    def permutation(self, epoch: int) -> List[int]:
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + epoch)  # type: ignore
+        return cast(List[int], torch.randperm(len(self), generator=generator).tolist())
+
+    def __iter__(self) -> Iterator:
+        indices = self.permutation(self.epoch)
+        self.epoch += 1
+        return iter(indices)
+
+    def __len__(self) -> int:
+        return len(self.data_source)
+
+
+def _is_seekable(batch_sampler: Any) -> bool:
+    # Only the default batch samplers of a DataLoader are known not to depend on any state other
+    # than the epoch. Subclasses and custom samplers may, so they are always iterated.
+    return type(batch_sampler) is BatchSampler and type(batch_sampler.sampler) in (
+        SequentialSampler,
+        _EpochRandomSampler,
+    )
+
+
+def _skip_epoch_batches(batch_sampler: Any, skip: int) -> Generator:
+    """
+    Yield one epoch of batches from a seekable BatchSampler, starting at the skip'th batch,
+    without building the batches before it.
+    """
+    indices = list(batch_sampler.sampler)
+    batch_size = batch_sampler.batch_size
+    for start in range(skip * batch_size, len(indices), batch_size):
+        batch = indices[start : start + batch_size]
+        if len(batch) < batch_size and batch_sampler.drop_last:
+            return
+        yield batch
+
+
+def _skip_batches(batch_sampler: torch.utils.data.BatchSampler, skip: int) -> Iterator:
+    """
+    Iterate over a BatchSampler starting at the skip'th batch. When the BatchSampler is built from
+    a RepeatBatchSampler and DistributedBatchSampler over a seekable BatchSampler, the start
+    position is computed directly, so skipping costs the same no matter how far training is.
+    Otherwise, the skipped batches are iterated over and discarded.
+    """
+    if isinstance(batch_sampler, DistributedBatchSampler):
+        # The DistributedBatchSampler yields every num_replicas'th batch starting at rank.
+        return itertools.islice(
+            _skip_batches(
+                batch_sampler.batch_sampler,
+                batch_sampler.rank + skip * batch_sampler.num_replicas,
+            ),
+            None,
+            None,
+            batch_sampler.num_replicas,
+        )
+
+    if isinstance(batch_sampler, RepeatBatchSampler) and _is_seekable(batch_sampler.batch_sampler):
+        base = cast(Any, batch_sampler.batch_sampler)
+        epochs, skip = divmod(skip, len(base))
+        if isinstance(base.sampler, _EpochRandomSampler):
+            base.sampler.epoch += epochs
+        return itertools.chain(_skip_epoch_batches(base, skip), batch_sampler)
+
+    return itertools.islice(batch_sampler, skip, None)
 
 
 def data_length(data: _Data) -> int:
@@ -378,7 +464,10 @@ def data_length(data: _Data) -> int:
 
 
 def to_device(
-    data: _Data, device: torch.device, warned_types: Optional[Set[Type]] = None
+    data: _Data,
+    device: torch.device,
+    warned_types: Optional[Set[Type]] = None,
+    non_blocking: bool = False,
 ) -> TorchData:
     """
     Accept np.ndarray, torch.Tensor, list, or dictionary. Recursively convert any ndarrays to
@@ -386,20 +475,25 @@ def to_device(
     defined via a callable to() attribute.
 
     If the data cannot be moved to device, log a warning (only once per type) and return the
-    original data.
+    original data. If `non_blocking` is set, tensors are copied asynchronously when possible.
     """
     # Never print errors recursively.
     if warned_types is None:
         warned_types = set()
 
     if isinstance(data, dict):
-        return {k: to_device(v, device, warned_types) for k, v in data.items()}  # type: ignore
+        return {
+            k: to_device(v, device, warned_types, non_blocking)  # type: ignore
+            for k, v in data.items()
+        }
     if isinstance(data, list):
-        return [to_device(d, device, warned_types) for d in data]  # type: ignore
+        return [to_device(d, device, warned_types, non_blocking) for d in data]  # type: ignore
     if isinstance(data, tuple):
-        return tuple(to_device(d, device, warned_types) for d in data)  # type: ignore
+        return tuple(to_device(d, device, warned_types, non_blocking) for d in data)  # type: ignore
     if isinstance(data, np.ndarray):
-        return torch.from_numpy(data).to(device)
+        return torch.from_numpy(data).to(device, non_blocking=non_blocking)
+    if isinstance(data, torch.Tensor):
+        return data.to(device, non_blocking=non_blocking)
     if hasattr(data, "to") and callable(data.to):  # type: ignore
         return data.to(device)  # type: ignore
 
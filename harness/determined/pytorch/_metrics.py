@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+
+# Tensors with more elements than this are copied to the host as soon as they are returned, so
+# that large per-batch outputs (e.g., predictions) do not accumulate in device memory.
+MAX_ACCUMULATED_NUMEL = 256
+
+
+class _MetricBuffer:
+    """
+    _MetricBuffer holds one metric for every batch of a workload in a single preallocated tensor
+    on the metric's device.
+    """
+
+    def __init__(self, first: torch.Tensor, num_batches: int) -> None:
+        self.buffer = torch.empty(
+            (num_batches, *first.shape), dtype=first.dtype, device=first.device
+        )
+        self.size = 0
+
+    def accepts(self, value: torch.Tensor) -> bool:
+        return (
+            self.size < len(self.buffer)
+            and value.shape == self.buffer.shape[1:]
+            and value.dtype == self.buffer.dtype
+            and value.device == self.buffer.device
+        )
+
+    def append(self, value: torch.Tensor) -> int:
+        # Copying into the buffer is asynchronous on CUDA devices, unlike value.cpu().
+        self.buffer[self.size] = value.detach()
+        self.size += 1
+        return self.size - 1
+
+
+class _DeviceMetricAccumulator:
+    """
+    _DeviceMetricAccumulator collects the per-batch metrics returned by train_batch() or
+    evaluate_batch() without synchronizing with the device after every batch.
+
+    Small tensors are copied into a preallocated buffer on their device and all buffers are
+    transferred to the host once, in to_numpy(). The result is identical to converting every
+    tensor with metric.cpu().detach().numpy() as soon as it was returned.
+    """
+
+    def __init__(self, num_batches: int) -> None:
+        self._num_batches = num_batches
+        self._buffers = {}  # type: Dict[str, _MetricBuffer]
+        # For every batch and metric, either (True, index into the metric's buffer) or
+        # (False, the value itself).
+        self._batches = []  # type: List[Dict[str, Tuple[bool, Any]]]
+
+    def _accumulate(self, name: str, value: torch.Tensor) -> Optional[int]:
+        if value.numel() > MAX_ACCUMULATED_NUMEL:
+            return None
+        if name not in self._buffers:
+            self._buffers[name] = _MetricBuffer(value, self._num_batches)
+        buffer = self._buffers[name]
+        if not buffer.accepts(value):
+            return None
+        return buffer.append(value)
+
+    @torch.no_grad()
+    def add(self, metrics: Dict[str, Any]) -> None:
+        """Record the metrics of the next batch."""
+        batch = {}  # type: Dict[str, Tuple[bool, Any]]
+        for name, value in metrics.items():
+            if isinstance(value, torch.Tensor):
+                index = self._accumulate(name, value)
+                if index is not None:
+                    batch[name] = (True, index)
+                else:
+                    batch[name] = (False, value.cpu().detach().numpy())
+            else:
+                batch[name] = (False, value)
+        self._batches.append(batch)
+
+    def to_numpy(self) -> List[Dict[str, Any]]:
+        """
+        Return the metrics of every batch, with all tensors converted to NumPy arrays. This is the
+        only point where the host waits for the device.
+        """
+        host = {
+            name: buffer.buffer[: buffer.size].cpu().numpy()
+            for name, buffer in self._buffers.items()
+        }
+        return [
+            {
+                # Indexing with Ellipsis keeps 0-d metrics as arrays rather than NumPy scalars.
+                name: host[name][value, ...] if buffered else value
+                for name, (buffered, value) in batch.items()
+            }
+            for batch in self._batches
+        ]
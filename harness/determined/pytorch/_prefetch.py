@@ -0,0 +1,164 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Iterator, Optional, Set, Tuple, Type
+
+import numpy as np
+import torch
+
+from determined import pytorch
+
+
+def _pin_memory(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: _pin_memory(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_pin_memory(d) for d in data]
+    if isinstance(data, tuple):
+        return tuple(_pin_memory(d) for d in data)
+    if isinstance(data, np.ndarray):
+        return torch.from_numpy(data).pin_memory()
+    if isinstance(data, torch.Tensor) and not data.is_cuda and not data.is_pinned():
+        return data.pin_memory()
+    return data
+
+
+def _record_stream(data: Any, stream: Any) -> None:
+    """
+    Mark every tensor in `data` as in use by `stream`, so that the caching allocator does not reuse
+    their memory (allocated on the prefetching stream) before `stream` is done with them.
+    """
+    if isinstance(data, dict):
+        for d in data.values():
+            _record_stream(d, stream)
+    elif isinstance(data, (list, tuple)):
+        for d in data:
+            _record_stream(d, stream)
+    elif isinstance(data, torch.Tensor) and data.is_cuda:
+        data.record_stream(stream)  # type: ignore
+
+
+class _Error:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+_STOP = object()
+
+
+class _BatchPrefetcher:
+    """
+    Iterates over the batches of a data loader iterator while up to `depth` batches after the
+    current one are copied to `device` in the background.
+
+    Batches are fetched from the iterator on the calling thread, so the dataset and collate_fn of
+    the user never run concurrently with training and draw random numbers in a deterministic order;
+    only the copies are made by a background thread. For CUDA devices, batches are copied from
+    pinned memory on a separate stream, so the copies overlap with the computation of the current
+    batch on the default stream; otherwise, batches are moved with to_device(). Each item is a
+    tuple of the batch on the device and the length of the batch, as returned by data_length()
+    before the copy.
+    """
+
+    def __init__(
+        self,
+        iterator: Iterator,
+        device: torch.device,
+        depth: int,
+        warned_types: Optional[Set[Type]] = None,
+    ) -> None:
+        self._iterator = iterator
+        self._device = device
+        self._depth = depth
+        self._warned_types = warned_types
+        self._use_cuda = device.type == "cuda" and torch.cuda.is_available()
+        self._stream = torch.cuda.Stream(device) if self._use_cuda else None  # type: ignore
+        # Batches fetched on the calling thread, and the same batches once they are on the device.
+        self._fetched = queue.Queue()  # type: queue.Queue
+        self._copied = queue.Queue()  # type: queue.Queue
+        self._in_flight = 0
+        self._exhausted = False
+        self._stop_signal = threading.Event()
+
+        # Seconds spent blocked in __next__, i.e., not overlapped with computation.
+        self.wait_time = 0.0
+
+        self._thread = threading.Thread(
+            target=self._copy_batches, name="DeterminedBatchPrefetcher", daemon=True
+        )
+        self._thread.start()
+
+    def _copy(self, batch: Any) -> Tuple[Any, int, Any]:
+        length = pytorch.data_length(batch)
+        if not self._use_cuda:
+            return pytorch.to_device(batch, self._device, self._warned_types), length, None
+
+        batch = _pin_memory(batch)
+        with torch.cuda.stream(self._stream):  # type: ignore
+            batch = pytorch.to_device(batch, self._device, self._warned_types, non_blocking=True)
+            event = torch.cuda.Event()  # type: ignore
+            event.record()
+        return batch, length, event
+
+    def _copy_batches(self) -> None:
+        if self._use_cuda:
+            torch.cuda.set_device(self._device)
+        while not self._stop_signal.is_set():
+            try:
+                batch = self._fetched.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if batch is _STOP or isinstance(batch, _Error):
+                self._copied.put(batch)
+                return
+            try:
+                self._copied.put(self._copy(batch))
+            except BaseException as e:
+                self._copied.put(_Error(e))
+                return
+
+    def _fetch(self) -> None:
+        """Fetch batches until the current batch and the `depth` batches after it are fetched."""
+        while not self._exhausted and self._in_flight <= self._depth:
+            try:
+                batch = next(self._iterator)
+            except StopIteration:
+                batch = _STOP
+            except Exception as e:
+                # Errors are raised when the batch which could not be fetched is reached.
+                batch = _Error(e)
+            if batch is _STOP or isinstance(batch, _Error):
+                self._exhausted = True
+            else:
+                self._in_flight += 1
+            self._fetched.put(batch)
+
+    def __iter__(self) -> "_BatchPrefetcher":
+        return self
+
+    def __next__(self) -> Tuple[Any, int]:
+        start = time.time()
+        self._fetch()
+        item = self._copied.get()
+        self.wait_time += time.time() - start
+
+        if item is _STOP:
+            self._copied.put(_STOP)
+            raise StopIteration
+        if isinstance(item, _Error):
+            self._copied.put(item)
+            raise item.exc
+
+        self._in_flight -= 1
+        batch, length, event = item
+        if event is not None:
+            current_stream = torch.cuda.current_stream()  # type: ignore
+            current_stream.wait_event(event)
+            _record_stream(batch, current_stream)
+        return batch, length
+
+    def close(self) -> None:
+        self._stop_signal.set()
+        self._thread.join()
+        logging.debug("Stopped prefetching batches.")
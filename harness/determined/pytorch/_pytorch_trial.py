@@ -1,6 +1,7 @@
 import logging
 import pathlib
 import random
+import time
 from abc import abstractmethod
 from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union, cast
 
@@ -12,6 +13,7 @@ import torch.nn as nn
 import determined as det
 from determined import horovod, ipc, pytorch, util, workload
 from determined.horovod import hvd
+from determined.pytorch import _checkpoint
 from determined_common import check
 
 # Apex is included only for GPU trials.
@@ -58,6 +60,24 @@ class PyTorchTrialController(det.LoopTrialController):
         # If a load path is provided load weights and restore the data location.
         self._load()
 
+        # Optionally load and copy the next training batches to the device in the background.
+        self.prefetcher = None  # type: Optional[pytorch._BatchPrefetcher]
+        prefetch_batches = self.env.experiment_config.prefetch_batches()
+        if prefetch_batches > 0 and self.training_loader.num_workers == 0:
+            # Without worker processes, fetching batches ahead of training would run the dataset
+            # ahead of training too, and a restored trial would not see the same random numbers.
+            logging.warning(
+                "optimizations.prefetch_batches is ignored because the training data loader has "
+                "num_workers=0."
+            )
+        elif prefetch_batches > 0:
+            self.prefetcher = pytorch._BatchPrefetcher(
+                self.training_iterator,
+                self.context.device,
+                prefetch_batches,
+                self.context._to_device_warned_types,
+            )
+
         if self.hvd_config.use:
             hvd.broadcast_parameters(self.context._main_model.state_dict(), root_rank=0)
             for optimizer in self.context.optimizers:
@@ -272,6 +292,13 @@ class PyTorchTrialController(det.LoopTrialController):
                 path = cast(pathlib.Path, args[0])
                 response_func(self._save(path))
             elif w.kind == workload.Workload.Kind.TERMINATE:
+                if self.prefetcher is not None:
+                    self.prefetcher.close()
+                    self.prefetcher = None
+                # Release the data loader workers now. If the iterator were only freed together
+                # with a reference cycle, torch could close its index queues before telling the
+                # workers to exit, and then wait for them forever.
+                del self.training_iterator
                 response_func({} if self.is_chief else workload.Skipped())
                 break
             else:
@@ -287,10 +314,18 @@ class PyTorchTrialController(det.LoopTrialController):
         check.true(self.hvd_config.use, "Can only average training metrics in multi-GPU training.")
         metrics_timeseries = util._list_to_dict(per_batch_metrics)
 
-        # combined_timeseries is: dict[metric_name] -> 2d-array.
-        # A measurement is accessed via combined_timeseries[metric_name][process_idx][batch_idx].
+        # Scalar metrics are packed into one array per metric before they are sent to the chief,
+        # so that the chief can average them with a single vectorized reduction per metric.
+        # Metrics which cannot be packed are sent as lists and averaged batch by batch.
+        packed_timeseries = {}  # type: Dict[str, Any]
+        for metric_name, values in metrics_timeseries.items():
+            packed = util._pack_metric_values(values)
+            packed_timeseries[metric_name] = packed if packed is not None else values
+
+        # combined_timeseries is: dict[metric_name] -> list of the (packed) timeseries of every
+        # process, with the chief's timeseries first.
         combined_timeseries, _ = self._combine_metrics_across_processes(
-            metrics_timeseries, num_batches=len(per_batch_metrics)
+            packed_timeseries, num_batches=len(per_batch_metrics)
         )
 
         # If the value for a metric is a single-element array, the averaging process will
@@ -303,28 +338,55 @@ class PyTorchTrialController(det.LoopTrialController):
                 array_metrics.append(metric_name)
 
         if self.is_chief:
-            combined_timeseries_type = Dict[str, List[List[Any]]]
-            combined_timeseries = cast(combined_timeseries_type, combined_timeseries)
+            combined_timeseries = cast(Dict[str, List[Any]], combined_timeseries)
             num_batches = len(per_batch_metrics)
-            num_processes = hvd.size()
             averaged_metrics_timeseries = {}  # type: Dict[str, List]
 
-            for metric_name in combined_timeseries.keys():
-                averaged_metrics_timeseries[metric_name] = []
-                for batch_idx in range(num_batches):
-                    batch = [
-                        combined_timeseries[metric_name][process_idx][batch_idx]
-                        for process_idx in range(num_processes)
-                    ]
-
-                    np_batch = np.array(batch)
-                    batch_avg = np.mean(np_batch[np_batch != None])  # noqa: E711
-                    if metric_name in array_metrics:
-                        batch_avg = np.array(batch_avg)
-                    averaged_metrics_timeseries[metric_name].append(batch_avg)
+            for metric_name, process_timeseries in combined_timeseries.items():
+                if all(isinstance(ts, tuple) for ts in process_timeseries):
+                    batch_avgs = self._average_packed_timeseries(process_timeseries)
+                else:
+                    batch_avgs = self._average_timeseries(process_timeseries, num_batches)
+
+                if metric_name in array_metrics:
+                    averaged_metrics_timeseries[metric_name] = [np.array(a) for a in batch_avgs]
+                else:
+                    averaged_metrics_timeseries[metric_name] = list(batch_avgs)
             per_batch_metrics = util._dict_to_list(averaged_metrics_timeseries)
         return per_batch_metrics
 
+    @staticmethod
+    def _average_packed_timeseries(
+        process_timeseries: List[Tuple[np.ndarray, Optional[np.ndarray]]]
+    ) -> np.ndarray:
+        """Average the packed timeseries of every process, ignoring missing (None) values."""
+        values = np.stack([packed for packed, _ in process_timeseries])
+        if all(missing is None for _, missing in process_timeseries):
+            return cast(np.ndarray, values.mean(axis=0))
+
+        present = ~np.stack(
+            [
+                missing if missing is not None else np.zeros(len(packed), dtype=bool)
+                for packed, missing in process_timeseries
+            ]
+        )
+        return cast(np.ndarray, np.where(present, values, 0).sum(axis=0) / present.sum(axis=0))
+
+    @staticmethod
+    def _average_timeseries(process_timeseries: List[Any], num_batches: int) -> List[Any]:
+        """Average timeseries which could not be packed, one batch at a time."""
+        timeseries = [ts if not isinstance(ts, tuple) else list(ts[0]) for ts in process_timeseries]
+        for ts, unpacked in zip(process_timeseries, timeseries):
+            if isinstance(ts, tuple) and ts[1] is not None:
+                for batch_idx in np.flatnonzero(ts[1]):
+                    unpacked[batch_idx] = None
+
+        batch_avgs = []
+        for batch_idx in range(num_batches):
+            np_batch = np.array([ts[batch_idx] for ts in timeseries])
+            batch_avgs.append(np.mean(np_batch[np_batch != None]))  # noqa: E711
+        return batch_avgs
+
     def _auto_step_lr_scheduler_per_batch(
         self, batch_idx: int, lr_scheduler: pytorch.LRScheduler
     ) -> None:
@@ -352,21 +414,33 @@ class PyTorchTrialController(det.LoopTrialController):
         start = total_batches_processed
         end = start + num_batches
 
-        per_batch_metrics = []  # type: List[Dict]
+        accumulator = pytorch._DeviceMetricAccumulator(num_batches)
         num_inputs = 0
+        # Seconds spent waiting for the next batch on the device and in train_batch(). Training is
+        # not synchronized with the device, so queued device work may be counted in either one.
+        data_wait_time = 0.0
+        compute_time = 0.0
 
         for batch_idx in range(start, end):
-            batch = next(self.training_iterator)
-            num_inputs += pytorch.data_length(batch)
-            batch = self.context.to_device(batch)
+            batch_start = time.time()
+            if self.prefetcher is not None:
+                batch, batch_length = next(self.prefetcher)
+            else:
+                batch = next(self.training_iterator)
+                batch_length = pytorch.data_length(batch)
+                batch = self.context.to_device(batch)
+            num_inputs += batch_length
 
             self.context._current_batch_idx = batch_idx
             self.context._loss_ids = {}
+            compute_start = time.time()
+            data_wait_time += compute_start - batch_start
             tr_metrics = self.trial.train_batch(
                 batch=batch,
                 epoch_idx=self.get_epoch_idx(batch_idx),
                 batch_idx=batch_idx,
             )
+            compute_time += time.time() - compute_start
             if isinstance(tr_metrics, torch.Tensor):
                 tr_metrics = {"loss": tr_metrics}
             check.is_instance(
@@ -380,15 +454,12 @@ class PyTorchTrialController(det.LoopTrialController):
             for lr_scheduler in self.context.lr_schedulers:
                 self._auto_step_lr_scheduler_per_batch(batch_idx, lr_scheduler)
 
-            for name, metric in tr_metrics.items():
-                # Convert PyTorch metric values to NumPy, so that
-                # `det.util.encode_json` handles them properly without
-                # needing a dependency on PyTorch.
-                if isinstance(metric, torch.Tensor):
-                    metric = metric.cpu().detach().numpy()
-                tr_metrics[name] = metric
+            accumulator.add(tr_metrics)
 
-            per_batch_metrics.append(tr_metrics)
+        # Convert PyTorch metric values to NumPy, so that `det.util.encode_json` handles them
+        # properly without needing a dependency on PyTorch. The metrics stay on the device until
+        # now, so that training does not wait for the device after every batch.
+        per_batch_metrics = accumulator.to_numpy()
 
         # Aggregate and reduce training metrics from all the training processes.
         if self.hvd_config.use and self.hvd_config.average_training_metrics:
@@ -409,7 +480,10 @@ class PyTorchTrialController(det.LoopTrialController):
             # The training metrics are reported only in the chief process.
             return workload.Skipped()
 
-        logging.debug(f"Done training step: {num_inputs} records in {num_batches} batches.")
+        logging.debug(
+            f"Done training step: {num_inputs} records in {num_batches} batches "
+            f"({data_wait_time:.3f}s waiting for data, {compute_time:.3f}s in train_batch)."
+        )
 
         return metrics
 
@@ -439,13 +513,14 @@ class PyTorchTrialController(det.LoopTrialController):
 
         num_inputs = 0
         metrics = {}  # type: Dict[str, Any]
+        # Whether the metrics have been reduced on every process rather than only on the chief.
+        reduced_on_all_processes = False
 
         if self._evaluate_batch_defined():
             keys = None
-            batch_metrics = []
-
             self.validation_loader = cast(torch.utils.data.DataLoader, self.validation_loader)
             check.gt(len(self.validation_loader), 0)
+            accumulator = pytorch._DeviceMetricAccumulator(len(self.validation_loader))
             for batch in self.validation_loader:
                 batch = self.context.to_device(batch)
                 num_inputs += pytorch.data_length(batch)
@@ -467,11 +542,10 @@ class PyTorchTrialController(det.LoopTrialController):
                     "dictionary of string names to Tensor "
                     "metrics",
                 )
-                # TODO: For performance perform -> cpu() only at the end of validation.
-                batch_metrics.append(self._convert_metrics_to_numpy(vld_metrics))
+                accumulator.add(vld_metrics)
 
-            metrics = self._reduce_metrics(
-                batch_metrics=batch_metrics,
+            metrics, reduced_on_all_processes = self._reduce_metrics(
+                batch_metrics=accumulator.to_numpy(),
                 keys=keys,
                 metrics_reducers=self._prepare_metrics_reducers(keys=keys),
             )
@@ -498,11 +572,15 @@ class PyTorchTrialController(det.LoopTrialController):
             )
         )
 
-        if self.hvd_config.use and any(
-            map(
-                lambda c: util.is_overridden(c.on_validation_end, pytorch.PyTorchCallback)
-                or util.is_overridden(c.on_validation_step_end, pytorch.PyTorchCallback),
-                self.callbacks.values(),
+        if (
+            self.hvd_config.use
+            and not reduced_on_all_processes
+            and any(
+                map(
+                    lambda c: util.is_overridden(c.on_validation_end, pytorch.PyTorchCallback)
+                    or util.is_overridden(c.on_validation_step_end, pytorch.PyTorchCallback),
+                    self.callbacks.values(),
+                )
             )
         ):
             logging.debug(
@@ -551,7 +629,11 @@ class PyTorchTrialController(det.LoopTrialController):
 
     def _reduce_metrics(
         self, batch_metrics: List, keys: Any, metrics_reducers: Dict[str, pytorch.Reducer]
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Reduce the validation metrics of every batch on every process. Return the reduced metrics
+        and whether every process received them, rather than only the chief.
+        """
         metrics = {
             name: pytorch._reduce_metrics(
                 reducer=metrics_reducers[name],
@@ -562,10 +644,19 @@ class PyTorchTrialController(det.LoopTrialController):
         }
 
         if self.hvd_config.use:
-            # If using horovod combine metrics across all processes.
-            # Only the chief process will receive all the metrics.
             self.validation_loader = cast(torch.utils.data.DataLoader, self.validation_loader)
             num_batches = len(self.validation_loader)
+
+            # Reducing scalar metrics with a collective call is much cheaper than gathering them
+            # on the chief and broadcasting them back.
+            allreduced = pytorch._allreduce_metrics(
+                metrics, metrics_reducers, num_batches, self._allgather_array
+            )
+            if allreduced is not None:
+                return allreduced, True
+
+            # Otherwise combine metrics across all processes.
+            # Only the chief process will receive all the metrics.
             combined_metrics, batches_per_process = self._combine_metrics_across_processes(
                 metrics, num_batches
             )
@@ -583,9 +674,16 @@ class PyTorchTrialController(det.LoopTrialController):
                     for name in keys or []
                 }
             else:
-                return {}
+                return {}, False
+            return metrics, False
 
-        return metrics
+        return metrics, True
+
+    @staticmethod
+    def _allgather_array(array: np.ndarray) -> np.ndarray:
+        """Gather a 1-D array of the same length from every process, stacked in rank order."""
+        gathered = hvd.allgather(torch.from_numpy(array).unsqueeze(0), name="reduce_metrics")
+        return cast(np.ndarray, gathered.numpy())
 
     def _combine_metrics_across_processes(
         self, metrics: Dict[str, Any], num_batches: int
@@ -629,20 +727,9 @@ class PyTorchTrialController(det.LoopTrialController):
         if not self.load_path:
             return
 
-        # Backwards compat with older checkpoint formats. List is newest to
-        # oldest known state_dict locations.
-        potential_paths = [
-            ["state_dict.pth"],
-            ["determined", "state_dict.pth"],
-            ["pedl", "state_dict.pth"],
-            ["checkpoint.pt"],
-        ]
-
-        for ckpt_path in potential_paths:
-            maybe_ckpt = self.load_path.joinpath(*ckpt_path)
-            if maybe_ckpt.exists():
-                checkpoint = torch.load(str(maybe_ckpt), map_location="cpu")  # type: ignore
-                break
+        # Tensors of sharded checkpoints are memory-mapped and copied to the device one at a time,
+        # so the checkpoint is never held in host memory as a whole.
+        checkpoint = _checkpoint.load_checkpoint(self.load_path, map_location=self.context.device)
 
         if "model_state_dict" in checkpoint:
             # Backward compatible with older checkpoint format.
@@ -688,12 +775,14 @@ class PyTorchTrialController(det.LoopTrialController):
             rng_state = checkpoint["rng_state"]
             np.random.set_state(rng_state["np_rng_state"])
             random.setstate(rng_state["random_rng_state"])
-            torch.random.set_rng_state(rng_state["cpu_rng_state"])  # type: ignore
+            # Random states are loaded on the device like every other tensor.
+            torch.random.set_rng_state(rng_state["cpu_rng_state"].cpu())  # type: ignore
 
             if torch.cuda.device_count():
                 if "gpu_rng_state" in rng_state:
                     torch.cuda.set_rng_state(  # type: ignore
-                        rng_state["gpu_rng_state"], device=self.context.distributed.get_local_rank()
+                        rng_state["gpu_rng_state"].cpu(),
+                        device=self.context.distributed.get_local_rank(),
                     )
                 else:
                     logging.warning(
@@ -758,9 +847,14 @@ class PyTorchTrialController(det.LoopTrialController):
         if self.context._use_amp:
             checkpoint["amp_state"] = apex.amp.state_dict()
 
-        torch.save(  # type: ignore
-            checkpoint, str(path.joinpath("state_dict.pth")), pickle_module=cloudpickle
-        )
+        if self.env.experiment_config.sharded_checkpoints():
+            _checkpoint.save_sharded_checkpoint(checkpoint, path)
+            checkpoint_format = "sharded"
+        else:
+            torch.save(  # type: ignore
+                checkpoint, str(path.joinpath("state_dict.pth")), pickle_module=cloudpickle
+            )
+            checkpoint_format = "cloudpickle"
 
         for callback in self.callbacks.values():
             callback.on_checkpoint_end(str(path))
@@ -769,7 +863,7 @@ class PyTorchTrialController(det.LoopTrialController):
             workload.Response,
             {
                 "framework": f"torch-{torch.__version__}",  # type: ignore
-                "format": "cloudpickle",
+                "format": checkpoint_format,
             },
         )
 
@@ -1,6 +1,6 @@
 import abc
 import enum
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import numpy as np
 
@@ -43,6 +43,53 @@ def _reduce_metrics(
         raise NotImplementedError
 
 
+def _is_fused_reducible(value: Any) -> bool:
+    array = np.asarray(value)
+    return array.ndim == 0 and array.dtype.kind in "biuf"
+
+
+def _allreduce_metrics(
+    metrics: Dict[str, Any],
+    metrics_reducers: Dict[str, Reducer],
+    num_batches: int,
+    allgather_fn: Callable[[np.ndarray], np.ndarray],
+) -> Optional[Dict[str, Any]]:
+    """
+    Reduce the per-process results of built-in Reducers across all processes with a single
+    collective call, so that every process receives the reduced metrics.
+
+    `allgather_fn` must gather a 1-D float64 array of the same length from every process and
+    return them stacked in rank order. Every process contributes [eligible, num_batches, *values],
+    so if any process has a metric which is not a numeric scalar, every process learns it from the
+    same call and None is returned everywhere; the caller then has to fall back to gathering the
+    metrics on the chief.
+    """
+    names = sorted(metrics)
+    eligible = all(_is_fused_reducible(metrics[name]) for name in names)
+
+    packed = np.zeros(len(names) + 2, dtype=np.float64)
+    packed[0] = eligible
+    packed[1] = num_batches
+    if eligible:
+        packed[2:] = [metrics[name] for name in names]
+
+    gathered = allgather_fn(packed)
+    if not gathered[:, 0].all():
+        return None
+
+    batches_per_process = gathered[:, 1].astype(np.int64).tolist()
+    reduced = {}
+    for i, name in enumerate(names):
+        reducer = metrics_reducers[name]
+        value = _reduce_metrics(reducer, gathered[:, i + 2], batches_per_process)
+        if reducer != Reducer.AVG:
+            # The values were packed as float64; restore the type they would have been reduced
+            # with had they been gathered as they are.
+            value = np.asarray(metrics[name]).dtype.type(value)
+        reduced[name] = value
+    return reduced
+
+
 class MetricReducer(metaclass=abc.ABCMeta):
     """
     Efficiently aggregating validation metrics during a multi-slot distributed trial is done in
@@ -1,6 +1,9 @@
 import logging
 import pathlib
-from typing import Dict, List
+import shutil
+from typing import Callable, Dict, List
+
+from determined_common.storage import transfer
 
 
 class TensorboardManager:
@@ -48,6 +51,35 @@ class TensorboardManager:
 
         return sync_paths
 
+    def _upload_concurrently(self, upload_fn: Callable[[pathlib.Path], None]) -> None:
+        """
+        Call `upload_fn` with every tfevent file returned by to_sync(), uploading several files at
+        once. A file is recorded as synced up to the size it had before its upload began, so that
+        events appended during the upload are synced by the next call.
+        """
+        sizes = {str(path): path.stat().st_size for path in self.to_sync()}
+
+        def upload(path_str: str) -> None:
+            path = pathlib.Path(path_str)
+            upload_fn(path)
+            self._synced_event_sizes[path] = sizes[path_str]
+
+        transfer.transfer_files(sizes, upload, transfer.DEFAULT_MAX_CONCURRENCY)
+
+    def _append_to_file(self, path: pathlib.Path, dst_path: pathlib.Path) -> None:
+        """
+        Copy the tfevent file at `path` to `dst_path`. Event files only ever grow, so if `dst_path`
+        holds exactly the bytes synced previously, only the bytes appended since then are copied.
+        """
+        offset = self._synced_event_sizes.get(path, 0)
+        if not dst_path.exists() or dst_path.stat().st_size != offset:
+            offset = 0
+        with path.open("rb") as src, dst_path.open("r+b" if offset else "wb") as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            shutil.copyfileobj(src, dst)
+            self._synced_event_sizes[path] = src.tell()
+
     def sync(self) -> None:
         """
         Save the object to the backing persistent storage.
@@ -1,4 +1,5 @@
 import logging
+import pathlib
 from typing import Any
 
 from google.cloud import storage
@@ -25,10 +26,12 @@ class GCSTensorboardManager(base.TensorboardManager):
 
     @util.preserve_random_state
     def sync(self) -> None:
-        for path in self.to_sync():
+        # GCS objects cannot be appended to, so files which have grown are uploaded again.
+        def upload(path: pathlib.Path) -> None:
             blob_name = str(self.sync_path.joinpath(path.relative_to(self.base_path)))
             blob = self.bucket.blob(blob_name)
             logging.debug(f"Uploading to GCS: {blob_name}")
 
             blob.upload_from_filename(str(path))
-            self._synced_event_sizes[path] = path.stat().st_size
+
+        self._upload_concurrently(upload)
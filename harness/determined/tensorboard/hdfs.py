@@ -34,7 +34,19 @@ class HDFSTensorboardManager(base.TensorboardManager):
         for path in self.to_sync():
             file_name = str(self.sync_path.joinpath(path.name))
 
-            logging.debug(f"Uploading {path} to {self.hdfs_path}")
-
-            self.client.upload(file_name, str(path))
-            self._synced_event_sizes[path] = path.stat().st_size
+            # Event files only ever grow; append the new events to a file which holds exactly
+            # the bytes synced previously rather than uploading the whole file again.
+            offset = self._synced_event_sizes.get(path, 0)
+            status = self.client.status(file_name, strict=False) if offset else None
+            if status is not None and status["length"] == offset:
+                logging.debug(f"Appending {path} to {self.hdfs_path}")
+                with path.open("rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+                self.client.write(file_name, data=data, append=True)
+                self._synced_event_sizes[path] = offset + len(data)
+            else:
+                logging.debug(f"Uploading {path} to {self.hdfs_path}")
+                size = path.stat().st_size
+                self.client.upload(file_name, str(path), overwrite=True)
+                self._synced_event_sizes[path] = size
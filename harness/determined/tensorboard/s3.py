@@ -1,4 +1,5 @@
 import logging
+import pathlib
 from typing import Any, Optional
 
 import boto3
@@ -32,11 +33,13 @@ class S3TensorboardManager(base.TensorboardManager):
 
     @util.preserve_random_state
     def sync(self) -> None:
-        for path in self.to_sync():
+        # S3 objects cannot be appended to, so files which have grown are uploaded again.
+        def upload(path: pathlib.Path) -> None:
             key_name = str(self.sync_path.joinpath(path.relative_to(self.base_path)))
 
             url = f"s3://{self.bucket}/{key_name}"
             logging.debug(f"Uploading {path} to {url}")
 
             self.client.upload_file(str(path), self.bucket, key_name)
-            self._synced_event_sizes[path] = path.stat().st_size
+
+        self._upload_concurrently(upload)
@@ -1,6 +1,5 @@
 import os
 import pathlib
-import shutil
 from typing import Any
 
 from determined.tensorboard import base
@@ -29,6 +28,4 @@ class SharedFSTensorboardManager(base.TensorboardManager):
         for path in self.to_sync():
             shared_fs_path = self.shared_fs_base.joinpath(path.relative_to(self.base_path))
             pathlib.Path.mkdir(shared_fs_path.parent, exist_ok=True)
-            shutil.copy(path, shared_fs_path)
-
-            self._synced_event_sizes[path] = path.stat().st_size
+            self._append_to_file(path, shared_fs_path)
@@ -7,7 +7,7 @@ import random
 import shutil
 import time
 import uuid
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
 
 import numpy as np
 import simplejson
@@ -68,27 +68,80 @@ def _dict_to_list(dict_of_lists: Dict[str, List]) -> List[Dict[str, Any]]:
 
 
 def validate_batch_metrics(batch_metrics: List[Dict[str, Any]]) -> None:
-    metric_dict = _list_to_dict(batch_metrics)
-
     # We expect that all batches have the same set of metrics.
-    metric_dict_keys = metric_dict.keys()
-    for idx, metric_dict in zip(range(len(batch_metrics)), batch_metrics):
+    metric_names = set()  # type: Set[str]
+    metric_names.update(*batch_metrics)
+    for idx, metric_dict in enumerate(batch_metrics):
         keys = metric_dict.keys()
-        if metric_dict_keys == keys:
+        if keys == metric_names:
             continue
 
-        check.eq(metric_dict_keys, keys, "inconsistent training metrics: index: {}".format(idx))
+        check.eq(metric_names, keys, "inconsistent training metrics: index: {}".format(idx))
+
+
+def _pack_metric_values(values: List[Any]) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Pack the per-batch values of a scalar metric into a 1-D numeric array, so that it can be
+    reduced without looping over batches in Python. Return the array and a boolean mask of the
+    batches whose value is None (or None if no value is None), or None if the metric is not a
+    numeric scalar.
+    """
+    packed = np.array(values)
+    if packed.ndim != 1:
+        return None
+
+    if packed.dtype.kind in "biuf":
+        return packed, None
+
+    if packed.dtype.hasobject:
+        try:
+            missing = np.equal(packed, None)
+            return np.where(missing, 0, packed).astype(np.float64), missing
+        except (TypeError, ValueError):
+            # Some values are non-scalars.
+            pass
+
+    return None
 
 
 def make_metrics(num_inputs: Optional[int], batch_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Make metrics dict including aggregates given individual data points."""
 
-    metric_dict = _list_to_dict(batch_metrics)
     validate_batch_metrics(batch_metrics)
+    metric_dict = _list_to_dict(batch_metrics)
+
+    avg_metrics = {name: _average_metric(values) for name, values in metric_dict.items()}
+    return _make_metrics_response(num_inputs, batch_metrics, avg_metrics)
 
-    avg_metrics = {}  # type: Dict[str, Optional[float]]
-    for name, values in metric_dict.items():
-        m = None  # type: Optional[float]
+
+def make_metrics_from_columns(
+    num_inputs: Optional[int], num_batches: int, columns: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Like make_metrics(), but for metrics given as a column of the values of every batch for each
+    metric name, e.g., a 1-D array of the values of a scalar metric. Numeric columns are averaged
+    without looping over batches in Python.
+    """
+    for name, values in columns.items():
+        check.len_eq(values, num_batches, "inconsistent training metrics: {}".format(name))
+
+    avg_metrics = {name: _average_metric(values) for name, values in columns.items()}
+    batch_metrics = [{} for _ in range(num_batches)]  # type: List[Dict[str, Any]]
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        for batch, value in zip(batch_metrics, values):
+            batch[name] = value
+    return _make_metrics_response(num_inputs, batch_metrics, avg_metrics)
+
+
+def _average_metric(values: Any) -> Optional[float]:
+    m = None  # type: Optional[float]
+    packed = _pack_metric_values(values)
+    if packed is not None:
+        packed_values, missing = packed
+        m = np.mean(packed_values if missing is None else packed_values[~missing])
+    else:
         try:
             values = np.array(values)
             filtered_values = values[values != None]  # noqa: E711
@@ -98,8 +151,14 @@ def make_metrics(num_inputs: Optional[int], batch_metrics: List[Dict[str, Any]])
             # We keep the key so consumers can see all the metric names but
             # leave the value as None.
             pass
-        avg_metrics[name] = m
+    return m
+
 
+def _make_metrics_response(
+    num_inputs: Optional[int],
+    batch_metrics: List[Dict[str, Any]],
+    avg_metrics: Dict[str, Optional[float]],
+) -> Dict[str, Any]:
     metrics = {"batch_metrics": batch_metrics, "avg_metrics": avg_metrics}
     if num_inputs is not None:
         metrics["num_inputs"] = num_inputs
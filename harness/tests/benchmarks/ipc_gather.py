@@ -0,0 +1,118 @@
+"""
+Microbenchmark for gathering metrics from training processes over ZMQBroadcastServer.
+
+Every worker repeatedly sends an ipc.MetricsInfo holding one float32 array per metric and waits
+for the chief's broadcast, like PyTorchTrialController._combine_metrics_across_processes() does
+at the end of every step. The gather latency is reported for the multipart serialization used by
+ipc.ZMQBroadcastServer and for plain pickling (send_pyobj/recv_pyobj), which it replaced.
+
+Usage:
+
+    python -m tests.benchmarks.ipc_gather --workers 1 2 4 8 --sizes 1000 100000 1000000
+"""
+import argparse
+import contextlib
+import multiprocessing
+import statistics
+import time
+from typing import Any, Iterator, List
+
+import numpy as np
+import zmq
+
+from determined import ipc
+
+
+@contextlib.contextmanager
+def pickle_serialization() -> Iterator[None]:
+    """Temporarily replace the multipart serialization of ipc with plain pickling."""
+    send, recv = ipc._send_multipart, ipc._recv_multipart
+
+    def send_pyobj(socket: zmq.Socket, obj: Any) -> None:
+        socket.send_pyobj(obj)
+
+    def recv_pyobj(socket: zmq.Socket) -> Any:
+        return socket.recv_pyobj()
+
+    ipc._send_multipart, ipc._recv_multipart = send_pyobj, recv_pyobj
+    try:
+        yield
+    finally:
+        ipc._send_multipart, ipc._recv_multipart = send, recv
+
+
+def worker(pub_url: str, pull_url: str, size: int, num_metrics: int, rounds: int) -> None:
+    metrics = {
+        "metric_{}".format(i): np.random.rand(size).astype(np.float32) for i in range(num_metrics)
+    }
+    with ipc.ZMQBroadcastClient(pub_url, pull_url) as client:
+        client.send(ipc.ConnectedMessage(process_id=0))
+        client.recv()
+        for _ in range(rounds):
+            client.send(ipc.MetricsInfo(metrics=metrics, num_batches=1))
+            client.recv()
+
+
+def measure(num_workers: int, size: int, num_metrics: int, rounds: int) -> List[float]:
+    """Return the latency of every gather in seconds."""
+    latencies = []
+    with ipc.ZMQBroadcastServer(num_connections=num_workers) as server:
+        pub_url = "tcp://localhost:{}".format(server.get_pub_port())
+        pull_url = "tcp://localhost:{}".format(server.get_pull_port())
+        procs = [
+            multiprocessing.Process(
+                target=worker, args=(pub_url, pull_url, size, num_metrics, rounds)
+            )
+            for _ in range(num_workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        server.gather_with_polling(lambda: None)
+        server.broadcast(None)
+        for _ in range(rounds):
+            start = time.perf_counter()
+            server.gather_with_polling(lambda: None)
+            latencies.append(time.perf_counter() - start)
+            server.broadcast(None)
+
+        for proc in procs:
+            proc.join()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 100000, 1000000],
+        help="number of float32 elements in each metric array",
+    )
+    parser.add_argument("--metrics", type=int, default=4, help="number of metrics per message")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>10} {:>14} {:>14} {:>8}".format(
+            "workers", "size", "pickle (ms)", "multipart (ms)", "speedup"
+        )
+    )
+    for num_workers in args.workers:
+        for size in args.sizes:
+            with pickle_serialization():
+                pickled = measure(num_workers, size, args.metrics, args.rounds)
+            multipart = measure(num_workers, size, args.metrics, args.rounds)
+            pickled_ms = statistics.median(pickled) * 1000
+            multipart_ms = statistics.median(multipart) * 1000
+            print(
+                "{:>8} {:>10} {:>14.2f} {:>14.2f} {:>7.2f}x".format(
+                    num_workers, size, pickled_ms, multipart_ms, pickled_ms / multipart_ms
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Microbenchmark for loading batches from a Keras Sequence with worker processes.
+
+Every batch of the Sequence is a pair of float32 inputs of the given size and int64 labels, and
+the main process reads one value of each batch, like a consumer that copies it into the model.
+The throughput is reported for _MultiprocessingEnqueuer, which pickles every batch through a
+multiprocessing.Queue, and for _SharedMemoryEnqueuer, which passes batches through shared memory.
+
+Usage:
+
+    python -m tests.benchmarks.keras_enqueuer --workers 1 4 --sizes 10000 1000000
+"""
+import argparse
+import time
+from typing import Any, Tuple
+
+import numpy as np
+from tensorflow.keras.utils import Sequence
+
+from determined import keras
+
+
+class RandomSequence(Sequence):  # type: ignore
+    def __init__(self, length: int, size: int) -> None:
+        self.length = length
+        self.inputs = np.random.rand(size).astype(np.float32)
+        self.labels = np.arange(1000, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.inputs, self.labels
+
+
+def measure(sequence: Sequence, workers: int, use_shared_memory: bool) -> float:
+    """Return the number of batches loaded per second."""
+    with keras._build_enqueuer(
+        sequence=sequence,
+        workers=workers,
+        use_multiprocessing=True,
+        max_queue_size=10,
+        shard_rank=0,
+        num_shards=1,
+        repeat=False,
+        shuffle=False,
+        shuffle_seed=0,
+        prior_batches_trained=0,
+        use_shared_memory=use_shared_memory,
+    ) as enqueuer:
+        start = time.perf_counter()
+        total = 0.0  # type: Any
+        for inputs, _ in enqueuer.data():
+            total += inputs[-1]
+        return len(sequence) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10000, 1000000, 10000000],
+        help="number of float32 elements in the inputs of each batch",
+    )
+    parser.add_argument("--batches", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>10} {:>14} {:>14} {:>8}".format(
+            "workers", "size", "queue (b/s)", "shm (b/s)", "speedup"
+        )
+    )
+    for workers in args.workers:
+        for size in args.sizes:
+            sequence = RandomSequence(args.batches, size)
+            queued = measure(sequence, workers, use_shared_memory=False)
+            shared = measure(sequence, workers, use_shared_memory=True)
+            print(
+                "{:>8} {:>10} {:>14.1f} {:>14.1f} {:>7.2f}x".format(
+                    workers, size, queued, shared, shared / queued
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
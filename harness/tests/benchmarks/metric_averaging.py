@@ -0,0 +1,124 @@
+"""
+Microbenchmark for the end-of-step processing of training metrics on the chief.
+
+A training step of `--batches` batches is simulated on `--processes` Horovod processes, each
+reporting `--metrics` scalar metrics per batch. The benchmark reports how long the chief takes to
+average the per-batch metrics across processes (as PyTorchTrialController does when
+average_training_metrics is enabled) and to build the step's metrics with det.util.make_metrics,
+compared to the previous implementations which looped over every batch in Python.
+
+Usage:
+
+    python -m tests.benchmarks.metric_averaging --batches 100 1000 10000 --processes 8
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from determined import util
+from determined.pytorch import PyTorchTrialController
+
+
+def legacy_average(combined_timeseries: Dict[str, List[List[Any]]]) -> List[Dict[str, Any]]:
+    num_processes = len(next(iter(combined_timeseries.values())))
+    num_batches = len(next(iter(combined_timeseries.values()))[0])
+    averaged_metrics_timeseries = {}  # type: Dict[str, List]
+    for metric_name in combined_timeseries.keys():
+        averaged_metrics_timeseries[metric_name] = []
+        for batch_idx in range(num_batches):
+            batch = [
+                combined_timeseries[metric_name][process_idx][batch_idx]
+                for process_idx in range(num_processes)
+            ]
+            np_batch = np.array(batch)
+            batch_avg = np.mean(np_batch[np_batch != None])  # noqa: E711
+            averaged_metrics_timeseries[metric_name].append(np.array(batch_avg))
+    return util._dict_to_list(averaged_metrics_timeseries)
+
+
+def columnar_average(combined_timeseries: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    averaged_metrics_timeseries = {}  # type: Dict[str, List]
+    for metric_name, process_timeseries in combined_timeseries.items():
+        batch_avgs = PyTorchTrialController._average_packed_timeseries(process_timeseries)
+        averaged_metrics_timeseries[metric_name] = [np.array(a) for a in batch_avgs]
+    return util._dict_to_list(averaged_metrics_timeseries)
+
+
+def legacy_make_metrics(batch_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    metric_dict = util._list_to_dict(batch_metrics)
+    util._list_to_dict(batch_metrics)  # The old validate_batch_metrics() transposed them again.
+    avg_metrics = {}  # type: Dict[str, Optional[float]]
+    for name, values in metric_dict.items():
+        values = np.array(values)
+        avg_metrics[name] = np.mean(values[values != None])  # noqa: E711
+    return {"batch_metrics": batch_metrics, "avg_metrics": avg_metrics}
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    """Return the best time of `repeat` calls of `fn`, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batches", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--metrics", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>22} {:>12} {:>12} {:>8}".format(
+            "batches", "operation", "legacy (ms)", "new (ms)", "speedup"
+        )
+    )
+    for num_batches in args.batches:
+        # Every process reports one 0-d array per metric per batch, like PyTorchTrial does.
+        per_process_metrics = [
+            [
+                {"metric_{}".format(m): np.array(np.random.rand()) for m in range(args.metrics)}
+                for _ in range(num_batches)
+            ]
+            for _ in range(args.processes)
+        ]
+        timeseries = [util._list_to_dict(metrics) for metrics in per_process_metrics]
+        names = list(timeseries[0])
+
+        lists = {name: [ts[name] for ts in timeseries] for name in names}
+        # Packing happens on every process in parallel; only the chief's share is timed.
+        packed = {name: [util._pack_metric_values(ts[name]) for ts in timeseries] for name in names}
+
+        def pack_and_average() -> None:
+            for name in names:
+                util._pack_metric_values(timeseries[0][name])
+            columnar_average(packed)
+
+        results = [
+            (
+                "average across workers",
+                timed(lambda: legacy_average(lists), args.repeat),
+                timed(pack_and_average, args.repeat),
+            ),
+            (
+                "make_metrics",
+                timed(lambda: legacy_make_metrics(per_process_metrics[0]), args.repeat),
+                timed(lambda: util.make_metrics(None, per_process_metrics[0]), args.repeat),
+            ),
+        ]
+        for operation, legacy_ms, new_ms in results:
+            print(
+                "{:>8} {:>22} {:>12.2f} {:>12.2f} {:>7.2f}x".format(
+                    num_batches, operation, legacy_ms, new_ms, legacy_ms / new_ms
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -36,13 +36,13 @@ def binary_error_rate(predictions: torch.Tensor, labels: torch.Tensor) -> float:
     return result
 
 
-def xor_data_loader(batch_size: int) -> pytorch.DataLoader:
+def xor_data_loader(batch_size: int, num_workers: int = 0) -> pytorch.DataLoader:
     training_data = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=np.float32)
     training_data = torch.Tensor(training_data)
     training_labels = np.array([0, 1, 1, 0], dtype=np.float32)
     training_labels = torch.Tensor(training_labels)
     training = TensorDataset(training_data, training_labels)
-    return pytorch.DataLoader(training, batch_size=batch_size)
+    return pytorch.DataLoader(training, batch_size=batch_size, num_workers=num_workers)
 
 
 class XORNet(nn.Module):
@@ -190,6 +190,11 @@ class XORTrialWithMultiValidation(XORTrialMulti):
         return {"accuracy": accuracy, "binary_error": binary_error}
 
 
+class XORTrialWithWorkers(XORTrialMulti):
+    def build_training_data_loader(self) -> pytorch.DataLoader:
+        return xor_data_loader(self.context.get_per_slot_batch_size(), num_workers=1)
+
+
 class XORTrialWithNonScalarValidation(pytorch.PyTorchTrial):
     def __init__(self, context: pytorch.PyTorchTrialContext) -> None:
         self.context = context
@@ -1,3 +1,7 @@
+import os
+import pathlib
+from typing import Any
+
 import numpy as np
 import pytest
 from tensorflow.keras.utils import Sequence
@@ -125,12 +129,11 @@ def test_sampler(shuffle, skip, rank_size):
     seed = 777
 
     # Build a list of globally expected indices; just a stream of indices, shuffled every epoch.
-    rng = np.random.RandomState(seed)
     all_indices = []
-    one_epoch_indices = list(range(epoch_len))
-    for _ in range(15):
+    for epoch in range(15):
+        one_epoch_indices = list(range(epoch_len))
         if shuffle:
-            rng.shuffle(one_epoch_indices)
+            one_epoch_indices = list(np.random.RandomState([seed, epoch]).permutation(epoch_len))
         all_indices += one_epoch_indices
 
     # Expect the appropriate shard of the stream for ourselves.
@@ -154,6 +157,15 @@ def test_sampler(shuffle, skip, rank_size):
     assert got_indices == expect_indices[: len(got_indices)]
 
 
+def test_sampler_resumes_without_replaying_epochs() -> None:
+    skip = 10 ** 9
+    sampler = keras._Sampler(100, 1, 3, True, 777, skip)
+
+    epoch, offset = divmod(1 + 3 * skip, 100)
+    expected = np.random.RandomState([777, epoch]).permutation(100)[offset::3]
+    assert list(sampler.yield_epoch()) == list(expected)
+
+
 @pytest.mark.parametrize("use_multiprocessing", [False, True])
 @pytest.mark.parametrize("workers", [0, 1, 5])
 @pytest.mark.parametrize("rank_size", [(0, 1), (0, 3), (1, 3), (2, 3)])
@@ -181,3 +193,115 @@ def test_enqueuer(shuffle, skip, rank_size, workers, use_multiprocessing) -> Non
         assert list(enqueuer.data()) == list(sampler.yield_epoch()), "first epoch was wrong"
         assert list(enqueuer.data()) == list(sampler.yield_epoch()), "second epoch was wrong"
         assert list(enqueuer.data()) == list(sampler.yield_epoch()), "third epoch was wrong"
+
+
+class ArraySequence(Sequence):
+    def __init__(self, length: int) -> None:
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> Any:
+        # Every fifth batch is larger than the others.
+        batch_size = 16 if index % 5 == 4 else 8
+        x = np.arange(batch_size * 3, dtype=np.float32).reshape(batch_size, 3) + index
+        return {"x": x, "mask": x > index + 1}, np.full(batch_size, index, dtype=np.int64)
+
+
+@pytest.mark.parametrize("skip", [0, 50])
+@pytest.mark.parametrize("rank_size", [(0, 1), (1, 3)])
+def test_shared_memory_enqueuer(skip, rank_size) -> None:
+    rank, size = rank_size
+    sequence = ArraySequence(30)
+    sampler = keras._Sampler(len(sequence), rank, size, True, 777, skip)
+
+    with keras._build_enqueuer(
+        sequence=sequence,
+        workers=3,
+        use_multiprocessing=True,
+        max_queue_size=4,
+        shard_rank=rank,
+        num_shards=size,
+        repeat=False,
+        shuffle=True,
+        shuffle_seed=777,
+        prior_batches_trained=skip,
+        use_shared_memory=True,
+    ) as enqueuer:
+        assert isinstance(enqueuer, keras._SharedMemoryEnqueuer)
+        for _ in range(2):
+            indices = list(sampler.yield_epoch())
+            # Batches must stay valid after later batches are requested, as Keras prefetches them.
+            batches = list(enqueuer.data())
+            assert len(batches) == len(indices)
+            for (inputs, labels), i in zip(batches, indices):
+                expected_inputs, expected_labels = sequence[i]
+                assert np.array_equal(inputs["x"], expected_inputs["x"])
+                assert np.array_equal(inputs["mask"], expected_inputs["mask"])
+                assert np.array_equal(labels, expected_labels)
+    # The slots are removed when the enqueuer is stopped.
+    assert not os.path.exists(enqueuer.slot_dir)
+
+
+def test_arraylike_data_adapter_npy_files(tmp_path: pathlib.Path) -> None:
+    np.save(str(tmp_path / "x.npy"), np.arange(0, 100))
+    np.save(str(tmp_path / "y.npy"), np.arange(100, 200))
+    seq = keras._ArrayLikeAdapter(
+        {"a": str(tmp_path / "x.npy"), "b": np.arange(200, 300)},
+        tmp_path / "y.npy",
+        batch_size=16,
+    )
+    assert isinstance(seq.x["a"], np.memmap)
+    x, y = seq[6]
+    assert np.array_equal(x["a"], np.arange(96, 100))
+    assert np.array_equal(x["b"], np.arange(296, 300))
+    assert np.array_equal(y, np.arange(196, 200))
+
+
+@pytest.mark.parametrize("use_multiprocessing", [False, True])
+def test_arraylike_data_adapter_shuffle(use_multiprocessing) -> None:
+    def make_enqueuer(prior_batches_trained: int, shuffle_samples: bool = True) -> keras._Enqueuer:
+        seq = keras._ArrayLikeAdapter(
+            [np.arange(0, 100), np.arange(100, 200)], np.arange(200, 300), batch_size=8
+        )
+        return keras._build_enqueuer(
+            sequence=seq,
+            workers=2,
+            use_multiprocessing=use_multiprocessing,
+            max_queue_size=4,
+            shard_rank=0,
+            num_shards=1,
+            repeat=False,
+            shuffle=True,
+            shuffle_seed=777,
+            prior_batches_trained=prior_batches_trained,
+            shuffle_samples=shuffle_samples,
+        )
+
+    with make_enqueuer(0) as enqueuer:
+        epochs = [[(x[0], y) for x, y in enqueuer.data()] for _ in range(3)]
+
+    samples = [np.concatenate([x for x, _ in epoch]) for epoch in epochs]
+    for epoch, epoch_samples in zip(epochs, samples):
+        # Every sample is seen once per epoch, and the inputs still match the targets.
+        assert sorted(epoch_samples) == list(range(100))
+        assert all(np.array_equal(x + 200, y) for x, y in epoch)
+    # Samples are shuffled across batches, differently every epoch.
+    assert samples[0][7] - samples[0][0] != 7
+    assert not np.array_equal(samples[0], samples[1])
+
+    # Resuming in the middle of the second epoch continues with the same batches.
+    with make_enqueuer(len(epochs[0]) + 5) as enqueuer:
+        resumed = [x[0] for x, _ in enqueuer.data()] + [x[0] for x, _ in enqueuer.data()]
+    expected = [x for x, _ in epochs[1][5:] + epochs[2]]
+    assert all(np.array_equal(a, b) for a, b in zip(resumed, expected))
+    assert len(resumed) == len(expected)
+
+    # Without shuffle_samples, only the order of the batches is shuffled.
+    with make_enqueuer(0, shuffle_samples=False) as enqueuer:
+        batches = [x[0] for x, _ in enqueuer.data()]
+    assert sorted(batch[0] for batch in batches) == list(range(0, 100, 8))
+    assert all(
+        np.array_equal(batch, np.arange(batch[0], batch[0] + len(batch))) for batch in batches
+    )
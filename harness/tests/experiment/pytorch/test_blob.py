@@ -0,0 +1,185 @@
+import os
+import pathlib
+import pickle
+import threading
+import time
+import typing
+
+import pytest
+import torch
+
+from determined import pytorch
+
+
+class CountingBackend(pytorch.LocalBlobBackend):
+    def __init__(self, root: str, cache: typing.Optional[pytorch.BlobCache] = None) -> None:
+        super().__init__(root, cache)
+        self.fetched = []  # type: typing.List[str]
+        self.lock = threading.Lock()
+
+    def _fetch(self, key: str) -> bytes:
+        with self.lock:
+            self.fetched.append(key)
+        return super()._fetch(key)
+
+
+class BlobDataset(torch.utils.data.Dataset):
+    def __init__(self, backend: pytorch.BlobBackend, length: int) -> None:
+        self.backend = backend
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        return torch.tensor(int(self.backend.get(key(index))))
+
+
+def key(index: int) -> str:
+    return "images/{}.txt".format(index)
+
+
+def make_blobs(root: pathlib.Path, length: int) -> None:
+    root.joinpath("images").mkdir(parents=True)
+    for i in range(length):
+        root.joinpath(key(i)).write_text(str(i))
+
+
+def test_blob_cache_read_through(tmp_path: pathlib.Path) -> None:
+    make_blobs(tmp_path.joinpath("blobs"), 3)
+    cache = pytorch.BlobCache(str(tmp_path.joinpath("cache")))
+    backend = CountingBackend(str(tmp_path.joinpath("blobs")), cache)
+
+    for _ in range(2):
+        assert [backend.get(key(i)) for i in range(3)] == [b"0", b"1", b"2"]
+    assert backend.fetched == [key(i) for i in range(3)]
+
+    # The cache outlives the backend, and is shared by the backends which use the same directory.
+    other = CountingBackend(
+        str(tmp_path.joinpath("blobs")), pytorch.BlobCache(str(tmp_path.joinpath("cache")))
+    )
+    assert other.get(key(1)) == b"1"
+    assert other.fetched == []
+
+    # Without a cache, every get() fetches the blob.
+    uncached = CountingBackend(str(tmp_path.joinpath("blobs")))
+    uncached.get(key(0))
+    uncached.get(key(0))
+    assert uncached.fetched == [key(0), key(0)]
+
+
+def test_blob_cache_evicts_least_recently_used(tmp_path: pathlib.Path) -> None:
+    cache = pytorch.BlobCache(str(tmp_path), max_size=25)
+    for i in range(2):
+        cache.put(str(i), b"x" * 10)
+        # Make sure the modification times are ordered on coarse-grained file systems.
+        os.utime(cache._path(str(i)), (i, i))
+
+    # Using a blob makes it the most recently used.
+    assert cache.get("0") == b"x" * 10
+    cache.put("2", b"x" * 10)
+    assert "0" in cache and "1" not in cache and "2" in cache
+    assert cache._size == 20
+
+    # Blobs which do not fit in the cache are not cached.
+    cache.put("3", b"x" * 30)
+    assert "3" not in cache
+
+    # The cache survives pickling, e.g. when the dataset is sent to DataLoader workers.
+    assert pickle.loads(pickle.dumps(cache)).get("2") == b"x" * 10
+
+
+def test_gcs_blob_backend_pickles_without_client() -> None:
+    backend = pytorch.GCSBlobBackend("bucket")
+    backend._bucket = object()
+    backend._pid = os.getpid()
+    restored = pickle.loads(pickle.dumps(backend))
+    assert restored._bucket is None and restored.bucket_name == "bucket"
+
+
+def test_prefetch_batch_sampler(tmp_path: pathlib.Path) -> None:
+    make_blobs(tmp_path.joinpath("blobs"), 10)
+    backend = CountingBackend(
+        str(tmp_path.joinpath("blobs")), pytorch.BlobCache(str(tmp_path.joinpath("cache")))
+    )
+    prefetcher = pytorch.BlobPrefetcher(backend, key, lookahead=2, num_threads=2)
+    batch_sampler = torch.utils.data.BatchSampler(
+        torch.utils.data.SequentialSampler(range(10)), batch_size=2, drop_last=False
+    )
+    sampler = prefetcher.wrap(batch_sampler)
+    assert len(sampler) == 5
+
+    batches = iter(sampler)
+    assert next(batches) == [0, 1]
+    # The next two batches are prefetched, but not the one being loaded.
+    deadline = time.time() + 10
+    while len(backend.fetched) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(backend.fetched) == sorted(key(i) for i in range(2, 6))
+
+    assert list(batches) == [[2, 3], [4, 5], [6, 7], [8, 9]]
+    assert sorted(backend.fetched) == sorted(key(i) for i in range(2, 10))
+
+
+def test_prefetch_batch_sampler_deduplicates_keys(tmp_path: pathlib.Path) -> None:
+    make_blobs(tmp_path.joinpath("blobs"), 3)
+    release = threading.Event()
+
+    class BlockingBackend(CountingBackend):
+        def _fetch(self, key: str) -> bytes:
+            assert release.wait(timeout=10)
+            return super()._fetch(key)
+
+    backend = BlockingBackend(
+        str(tmp_path.joinpath("blobs")), pytorch.BlobCache(str(tmp_path.joinpath("cache")))
+    )
+    prefetcher = pytorch.BlobPrefetcher(backend, key, lookahead=2, num_threads=4)
+
+    class ListSampler(torch.utils.data.Sampler):
+        def __init__(self, indices: typing.List[int]) -> None:
+            self.indices = indices
+
+        def __iter__(self) -> typing.Iterator[int]:
+            return iter(self.indices)
+
+        def __len__(self) -> int:
+            return len(self.indices)
+
+    batch_sampler = torch.utils.data.BatchSampler(
+        ListSampler([0, 1, 1, 1, 2, 1]), batch_size=2, drop_last=False
+    )
+
+    batches = iter(prefetcher.wrap(batch_sampler))
+    assert next(batches) == [0, 1]
+    # The blob of sample 1 is still being prefetched when it shows up again.
+    release.set()
+    assert list(batches) == [[1, 1], [2, 1]]
+    assert sorted(backend.fetched) == [key(1), key(2)]
+
+    # Like the cache, the prefetcher survives pickling.
+    local = pytorch.LocalBlobBackend(str(tmp_path.joinpath("blobs")), backend.cache)
+    restored = pickle.loads(pickle.dumps(pytorch.BlobPrefetcher(local, key)))
+    assert restored._in_flight == set() and restored.lookahead == 2
+
+
+def test_blob_backend_is_abstract() -> None:
+    with pytest.raises(TypeError, match="_fetch"):
+        pytorch.BlobBackend()  # type: ignore
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_data_loader_prefetches_blobs(tmp_path: pathlib.Path, num_workers: int) -> None:
+    make_blobs(tmp_path.joinpath("blobs"), 12)
+    cache = pytorch.BlobCache(str(tmp_path.joinpath("cache")))
+    backend = pytorch.LocalBlobBackend(str(tmp_path.joinpath("blobs")), cache)
+    data_loader = pytorch.DataLoader(
+        BlobDataset(backend, 12),
+        batch_size=2,
+        num_workers=num_workers,
+        blob_prefetcher=pytorch.BlobPrefetcher(backend, key, lookahead=1),
+    )
+
+    # Only the batches of this replica are prefetched, and only after skipped batches.
+    loader = data_loader.get_data_loader(skip=1, num_replicas=2, rank=1)
+    assert [batch.tolist() for batch in loader] == [[6, 7], [10, 11]]
+    assert [i for i in range(12) if key(i) in cache] == [6, 7, 10, 11]
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+
+from determined.pytorch import PyTorchTrialController, _DeviceMetricAccumulator
+from determined.util import _pack_metric_values
+
+
+def eager_conversion(per_batch_metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            name: value.cpu().detach().numpy() if isinstance(value, torch.Tensor) else value
+            for name, value in metrics.items()
+        }
+        for metrics in per_batch_metrics
+    ]
+
+
+def test_device_metric_accumulator() -> None:
+    weight = torch.ones(3, requires_grad=True)
+    per_batch_metrics = [
+        {
+            "loss": (weight * i).sum(),
+            "accuracy": torch.tensor(i / 10, dtype=torch.float64),
+            "per_class": torch.arange(3) * i,
+            # Shapes which change between batches cannot be buffered.
+            "ragged": torch.zeros(i + 1),
+            # Neither can large tensors.
+            "predictions": torch.rand(1000),
+            "count": i,
+            "maybe": None if i % 2 else float(i),
+        }
+        for i in range(4)
+    ]
+    expected = eager_conversion(per_batch_metrics)
+
+    accumulator = _DeviceMetricAccumulator(len(per_batch_metrics))
+    for metrics in per_batch_metrics:
+        accumulator.add(metrics)
+    actual = accumulator.to_numpy()
+
+    assert len(actual) == len(expected)
+    for actual_metrics, expected_metrics in zip(actual, expected):
+        assert actual_metrics.keys() == expected_metrics.keys()
+        for name, expected_value in expected_metrics.items():
+            actual_value = actual_metrics[name]
+            assert type(actual_value) == type(expected_value)
+            if isinstance(expected_value, np.ndarray):
+                assert actual_value.dtype == expected_value.dtype
+                assert actual_value.shape == expected_value.shape
+                assert np.array_equal(actual_value, expected_value)
+            else:
+                assert actual_value == expected_value
+
+
+def test_device_metric_accumulator_snapshots_values() -> None:
+    # Metrics are recorded as they were when returned, even if the tensor is modified later.
+    metric = torch.zeros(())
+    accumulator = _DeviceMetricAccumulator(3)
+    for _ in range(3):
+        metric += 1
+        accumulator.add({"metric": metric})
+
+    assert [m["metric"] for m in accumulator.to_numpy()] == [1, 2, 3]
+
+
+def test_device_metric_accumulator_more_batches() -> None:
+    # Batches beyond the expected number are still recorded.
+    accumulator = _DeviceMetricAccumulator(1)
+    for i in range(3):
+        accumulator.add({"metric": torch.tensor(i)})
+
+    assert [m["metric"] for m in accumulator.to_numpy()] == [0, 1, 2]
+
+
+def test_average_packed_timeseries() -> None:
+    chief = _pack_metric_values([1.0, None, 3.0])
+    worker = _pack_metric_values([3.0, 4.0, float("nan")])
+    assert chief is not None and worker is not None
+
+    avgs = PyTorchTrialController._average_packed_timeseries([chief, worker])
+    assert list(avgs[:2]) == [2.0, 4.0]
+    assert np.isnan(avgs[2])
+
+    # Timeseries which cannot be packed are averaged batch by batch, and give the same result.
+    unpacked = PyTorchTrialController._average_timeseries([chief, [3.0, 4.0, float("nan")]], 3)
+    assert unpacked[:2] == [2.0, 4.0]
+    assert np.isnan(unpacked[2])
@@ -1,5 +1,7 @@
+import itertools
 import logging
 import multiprocessing
+import threading
 import typing
 from logging import handlers
 
@@ -12,6 +14,8 @@ from determined.pytorch import (
     DistributedBatchSampler,
     RepeatBatchSampler,
     SkipBatchSampler,
+    _BatchPrefetcher,
+    adapt_batch_sampler,
     data_length,
     to_device,
 )
@@ -188,3 +192,91 @@ def test_to_device_warnings(dedup_between_calls) -> None:
     while queue.qsize():
         msg = queue.get().message
         assert "not able to move data" in msg
+
+
+def test_batch_prefetcher() -> None:
+    data_loader = make_data_loader()
+    prefetcher = _BatchPrefetcher(iter(data_loader), torch.device("cpu"), depth=2)
+    batches = list(prefetcher)
+    prefetcher.close()
+
+    assert [length for _, length in batches] == [1] * len(data_loader)
+    for (batch, _), expected in zip(batches, data_loader):
+        assert all(torch.equal(x, y) for x, y in zip(batch, expected))
+
+    # Iteration keeps stopping once the underlying iterator is exhausted.
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+
+
+def test_batch_prefetcher_fetches_on_calling_thread() -> None:
+    fetched = []  # type: typing.List[threading.Thread]
+
+    def batches() -> typing.Iterator[torch.Tensor]:
+        for i in range(10):
+            fetched.append(threading.current_thread())
+            yield torch.full((2,), i)
+
+    prefetcher = _BatchPrefetcher(batches(), torch.device("cpu"), depth=2)
+    for i in range(5):
+        batch, _ = next(prefetcher)
+        assert torch.equal(batch, torch.full((2,), i))
+        # The current batch and the two after it have been fetched.
+        assert len(fetched) == i + 3
+    prefetcher.close()
+    assert set(fetched) == {threading.current_thread()}
+
+
+def test_batch_prefetcher_error() -> None:
+    def batches() -> typing.Iterator[np.ndarray]:
+        yield np.zeros(2)
+        raise ValueError("bad batch")
+
+    prefetcher = _BatchPrefetcher(batches(), torch.device("cpu"), depth=2)
+    batch, length = next(prefetcher)
+    assert torch.equal(batch, torch.zeros(2, dtype=torch.float64)) and length == 2
+    with pytest.raises(ValueError, match="bad batch"):
+        next(prefetcher)
+    prefetcher.close()
+
+
+def test_batch_prefetcher_close() -> None:
+    def batches() -> typing.Iterator[torch.Tensor]:
+        while True:
+            yield torch.zeros(2)
+
+    prefetcher = _BatchPrefetcher(batches(), torch.device("cpu"), depth=1)
+    next(prefetcher)
+    # The copying thread stops even though there are more batches.
+    prefetcher.close()
+    assert not prefetcher._thread.is_alive()
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize("drop_last", [False, True])
+@pytest.mark.parametrize("num_replicas", [1, 3])
+@pytest.mark.parametrize("skip", [0, 4, 7, 50])
+def test_skip_batch_sampler_seeks(shuffle, drop_last, num_replicas, skip) -> None:
+    def make_batch_sampler(rank: int) -> torch.utils.data.BatchSampler:
+        data_loader = det.pytorch.DataLoader(
+            range(11), batch_size=3, shuffle=shuffle, drop_last=drop_last
+        )
+        # Give every sampler the same seed, as in separate processes with the same trial seed.
+        if shuffle:
+            data_loader.sampler.seed = 777
+        return adapt_batch_sampler(data_loader.batch_sampler, True, 0, num_replicas, rank)
+
+    for rank in range(num_replicas):
+        expected = list(itertools.islice(make_batch_sampler(rank), skip, skip + 20))
+        got = list(itertools.islice(SkipBatchSampler(make_batch_sampler(rank), skip), 20))
+        assert got == expected
+
+
+def test_skip_batch_sampler_seeks_without_iterating() -> None:
+    data_loader = det.pytorch.DataLoader(range(10), batch_size=3, shuffle=True)
+    batch_sampler = data_loader.get_data_loader(
+        repeat=True, skip=10 ** 12, num_replicas=2, rank=1
+    ).batch_sampler
+    epoch, offset = divmod(1 + 2 * 10 ** 12, 4)
+    indices = data_loader.sampler.permutation(epoch)
+    assert next(iter(batch_sampler)) == indices[offset * 3 : offset * 3 + 3]
@@ -6,6 +6,7 @@ import torch
 
 import determined as det
 from determined import pytorch, workload
+from determined.pytorch import _checkpoint
 from tests.experiment import utils  # noqa: I100
 from tests.experiment.fixtures import pytorch_onevar_model, pytorch_xor_model
 
@@ -154,6 +155,60 @@ class TestPyTorchTrial:
 
         utils.checkpointing_and_restoring_test(make_trial_controller_fn, tmp_path)
 
+    def test_sharded_checkpointing_and_restoring(self, tmp_path: pathlib.Path) -> None:
+        def make_trial_controller_fn(
+            workloads: workload.Stream, load_path: typing.Optional[str] = None
+        ) -> det.TrialController:
+            updated_hparams = {
+                "lr_scheduler_step_mode": pytorch.LRScheduler.StepMode.STEP_EVERY_BATCH.value,
+                **self.hparams,
+            }
+            exp_config = utils.make_default_exp_config(updated_hparams, 1)
+            exp_config["optimizations"]["sharded_checkpoints"] = True
+            return utils.make_trial_controller_from_trial_implementation(
+                trial_class=pytorch_xor_model.XORTrialWithLRScheduler,
+                hparams=updated_hparams,
+                workloads=workloads,
+                load_path=load_path,
+                trial_seed=self.trial_seed,
+                exp_config=exp_config,
+            )
+
+        utils.checkpointing_and_restoring_test(make_trial_controller_fn, tmp_path)
+        assert tmp_path.joinpath("checkpoint", "state_dict", "index.json").exists()
+        assert not tmp_path.joinpath("checkpoint", "state_dict.pth").exists()
+
+    def test_prefetching(self, tmp_path: pathlib.Path) -> None:
+        def make_trial_controller_fn(
+            workloads: workload.Stream, load_path: typing.Optional[str] = None
+        ) -> det.TrialController:
+            exp_config = utils.make_default_exp_config(self.hparams, 1)
+            exp_config["optimizations"]["prefetch_batches"] = 2
+            return utils.make_trial_controller_from_trial_implementation(
+                trial_class=pytorch_xor_model.XORTrialWithWorkers,
+                hparams=self.hparams,
+                workloads=workloads,
+                load_path=load_path,
+                trial_seed=self.trial_seed,
+                exp_config=exp_config,
+            )
+
+        # Prefetching does not change which batches are trained on, including after restoring.
+        utils.checkpointing_and_restoring_test(make_trial_controller_fn, tmp_path)
+
+    def test_prefetching_without_workers(self) -> None:
+        exp_config = utils.make_default_exp_config(self.hparams, 1)
+        exp_config["optimizations"]["prefetch_batches"] = 2
+        controller = utils.make_trial_controller_from_trial_implementation(
+            trial_class=pytorch_xor_model.XORTrialMulti,
+            hparams=self.hparams,
+            workloads=iter([]),
+            trial_seed=self.trial_seed,
+            exp_config=exp_config,
+        )
+        # The dataset would run ahead of training on the training thread.
+        assert typing.cast(pytorch.PyTorchTrialController, controller).prefetcher is None
+
     def test_restore_invalid_checkpoint(self, tmp_path: pathlib.Path) -> None:
         # Build, train, and save a checkpoint with the normal hyperparameters.
         checkpoint_dir = tmp_path.joinpath("checkpoint")
@@ -483,5 +538,67 @@ class TestPyTorchTrial:
             controller.run()
 
 
+def test_sharded_checkpoint_format(tmp_path: pathlib.Path) -> None:
+    model = torch.nn.Linear(3, 2)
+    checkpoint = {
+        "models_state_dict": [model.state_dict(), {}],
+        "optimizers_state_dict": [torch.optim.Adam(model.parameters()).state_dict()],
+        "rng_state": {"cpu_rng_state": torch.random.get_rng_state(), "seed": 17},
+        "tensors": {
+            # Tensors which cannot be memory-mapped are pickled instead.
+            "bfloat16": torch.ones(4, dtype=torch.bfloat16),
+            "requires_grad": torch.ones(2, requires_grad=True),
+            "sparse": torch.eye(3).to_sparse(),
+            "transposed": torch.arange(6, dtype=torch.int16).reshape(2, 3).t(),
+            "empty": torch.zeros(0, 5),
+            "scalar": torch.tensor(1.5, dtype=torch.float64),
+        },
+    }
+    _checkpoint.save_sharded_checkpoint(checkpoint, tmp_path)
+    loaded = _checkpoint.load_checkpoint(tmp_path, map_location="cpu")
+
+    sparse = loaded["tensors"].pop("sparse")
+    assert torch.equal(sparse.to_dense(), torch.eye(3))
+    assert loaded["tensors"]["bfloat16"].dtype == torch.bfloat16
+    assert loaded["tensors"]["requires_grad"].requires_grad
+    assert loaded["tensors"]["transposed"].dtype == torch.int16
+    del checkpoint["tensors"]["sparse"]
+    check_equal_structures(
+        {k: v for k, v in checkpoint["tensors"].items() if k != "bfloat16"},
+        {k: v for k, v in loaded["tensors"].items() if k != "bfloat16"},
+    )
+    check_equal_structures(checkpoint["models_state_dict"], loaded["models_state_dict"])
+    check_equal_structures(checkpoint["rng_state"], loaded["rng_state"])
+
+    # Memory-mapped tensors can be modified without changing the checkpoint.
+    loaded["models_state_dict"][0]["weight"].zero_()
+    reloaded = _checkpoint.load_checkpoint(tmp_path)
+    assert torch.equal(reloaded["models_state_dict"][0]["weight"], model.weight.detach())
+    torch.random.set_rng_state(reloaded["rng_state"]["cpu_rng_state"])
+
+
+def test_sharded_checkpoint_map_location(tmp_path: pathlib.Path) -> None:
+    weight = torch.arange(6, dtype=torch.float32).reshape(2, 3)
+    _checkpoint.save_sharded_checkpoint({"weight": weight}, tmp_path)
+
+    # map_location takes the same forms as for torch.load().
+    for map_location in [None, "cpu", torch.device("cpu"), {"cpu": "cpu"}]:
+        loaded = _checkpoint.load_checkpoint(tmp_path, map_location=map_location)
+        assert torch.equal(loaded["weight"], weight)
+
+    locations = []  # type: typing.List[str]
+
+    def restore_location(storage: typing.Any, location: str) -> typing.Any:
+        locations.append(location)
+        return storage
+
+    loaded = _checkpoint.load_checkpoint(tmp_path, map_location=restore_location)
+    assert torch.equal(loaded["weight"], weight)
+    assert locations == ["cpu"]
+
+    with pytest.raises(TypeError, match="map_location"):
+        _checkpoint.load_checkpoint(tmp_path, map_location=0)
+
+
 def test_create_trial_instance() -> None:
     utils.create_trial_instance(pytorch_xor_model.XORTrial)
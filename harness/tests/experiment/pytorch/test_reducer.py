@@ -1,6 +1,10 @@
+import concurrent.futures
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
 import numpy as np
 
-from determined.pytorch import Reducer, _reduce_metrics
+from determined.pytorch import Reducer, _allreduce_metrics, _reduce_metrics
 
 
 def test_reducer() -> None:
@@ -12,3 +16,75 @@ def test_reducer() -> None:
 
     batches_per_process = [1, 2, 5, 4, 5, 6]
     assert np.around(_reduce_metrics(Reducer.AVG, metrics, batches_per_process), decimals=2) == 6.43
+
+
+class LocalAllgather:
+    """A stand-in for hvd.allgather between threads which play the role of processes."""
+
+    def __init__(self, size: int) -> None:
+        self.barrier = threading.Barrier(size)
+        self.arrays = [None] * size  # type: List[Any]
+
+    def for_rank(self, rank: int) -> Callable[[np.ndarray], np.ndarray]:
+        def allgather(array: np.ndarray) -> np.ndarray:
+            self.arrays[rank] = array
+            self.barrier.wait()
+            return np.stack(self.arrays)
+
+        return allgather
+
+
+def allreduce_on_every_rank(
+    per_rank_metrics: List[Dict[str, Any]],
+    metrics_reducers: Dict[str, Reducer],
+    batches_per_process: List[int],
+) -> List[Optional[Dict[str, Any]]]:
+    allgather = LocalAllgather(len(per_rank_metrics))
+    with concurrent.futures.ThreadPoolExecutor(len(per_rank_metrics)) as executor:
+        futures = [
+            executor.submit(
+                _allreduce_metrics,
+                metrics,
+                metrics_reducers,
+                batches_per_process[rank],
+                allgather.for_rank(rank),
+            )
+            for rank, metrics in enumerate(per_rank_metrics)
+        ]
+        return [future.result() for future in futures]
+
+
+def test_allreduce_metrics() -> None:
+    per_rank_metrics = [
+        {"loss": np.float64(0.5), "count": np.int64(3), "max": np.float32(1.5), "min": 7},
+        {"loss": np.float64(1.5), "count": np.int64(4), "max": np.float32(2.5), "min": 2},
+        {"loss": np.float64(2.0), "count": np.int64(5), "max": np.float32(0.5), "min": 4},
+    ]
+    metrics_reducers = {
+        "loss": Reducer.AVG,
+        "count": Reducer.SUM,
+        "max": Reducer.MAX,
+        "min": Reducer.MIN,
+    }
+    batches_per_process = [2, 3, 5]
+
+    # Every rank gets the result the chief would compute from the gathered metrics.
+    expected = {
+        name: _reduce_metrics(
+            reducer, [metrics[name] for metrics in per_rank_metrics], batches_per_process
+        )
+        for name, reducer in metrics_reducers.items()
+    }
+    for reduced in allreduce_on_every_rank(per_rank_metrics, metrics_reducers, batches_per_process):
+        assert reduced is not None
+        assert reduced.keys() == expected.keys()
+        for name, value in expected.items():
+            assert reduced[name] == value
+            assert np.asarray(reduced[name]).dtype == np.asarray(value).dtype
+
+
+def test_allreduce_metrics_fallback() -> None:
+    # If a single rank has a metric which cannot be packed, every rank falls back to gathering.
+    per_rank_metrics = [{"loss": 0.5}, {"loss": "nan"}, {"loss": 1.5}]
+    reduced = allreduce_on_every_rank(per_rank_metrics, {"loss": Reducer.AVG}, [1, 1, 1])
+    assert reduced == [None, None, None]
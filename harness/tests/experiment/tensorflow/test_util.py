@@ -1,7 +1,16 @@
 import os
 from pathlib import Path
 
-from determined.estimator import _scan_checkpoint_directory
+import numpy as np
+import tensorflow as tf
+
+from determined.estimator import (
+    _get_summary_value_tensor,
+    _scan_checkpoint_directory,
+    _stage_checkpoint_directory,
+    _StepMetrics,
+)
+from determined.util import make_metrics, make_metrics_from_columns
 from tests.filetree import FileTree
 
 
@@ -27,3 +36,72 @@ all_model_checkpoint_paths: "model.ckpt-9"
             "model.ckpt-1",
             "model.ckpt-9",
         ]
+
+
+def test_stage_checkpoint_directory(tmp_path: Path) -> None:
+    with FileTree(
+        tmp_path,
+        {
+            "checkpoint": 'model_checkpoint_path: "model.ckpt-9"',
+            "model.ckpt-9.data-00000-of-00001": "data",
+            "model.ckpt-9.index": "index",
+            "custom.log": "1",
+            "code/model_def.py": "",
+        },
+    ) as src:
+        dst = tmp_path.joinpath("dst")
+        _stage_checkpoint_directory(src, dst)
+
+        # Checkpoint data files are linked; everything else is copied, so rewriting it in the
+        # staged directory does not modify the original.
+        for name in ["model.ckpt-9.data-00000-of-00001", "model.ckpt-9.index"]:
+            assert os.path.samefile(str(src.joinpath(name)), str(dst.joinpath(name)))
+        for name in ["checkpoint", "custom.log", "code/model_def.py"]:
+            assert dst.joinpath(name).read_text() == src.joinpath(name).read_text()
+            assert not os.path.samefile(str(src.joinpath(name)), str(dst.joinpath(name)))
+
+
+def test_get_summary_value_tensor() -> None:
+    with tf.Graph().as_default():
+        value = tf.constant(3.0)
+        with tf.name_scope("scope"):
+            scalar = tf.compat.v1.summary.scalar("loss", value)
+        duplicate = tf.compat.v1.summary.scalar("loss", value * 2)
+        tensor = tf.compat.v1.summary.tensor_summary("tensor", tf.constant([1.0, 2.0]))
+
+        # The tags and values match the ones parsed from the serialized summary.
+        with tf.compat.v1.Session() as sess:
+            summary = tf.compat.v1.summary.Summary()
+            summary.ParseFromString(sess.run(tf.compat.v1.summary.merge([scalar, duplicate])))
+            parsed = {val.tag: val.simple_value for val in summary.value}
+            fetched = dict(_get_summary_value_tensor(s) for s in [scalar, duplicate])
+            assert sess.run(fetched) == parsed == {"scope/loss": 3.0, "loss": 6.0}
+
+        assert _get_summary_value_tensor(tensor) is None
+
+
+def test_make_metrics_from_columns() -> None:
+    step_metrics = _StepMetrics(2)
+    step_metrics.add({"loss": np.float32(1.0), "acc": 0.25, "vec": np.array([1.0, 2.0])})
+    step_metrics.add({"loss": np.float32(3.0), "acc": None, "vec": np.array([3.0, 4.0])})
+    assert isinstance(step_metrics.columns["loss"], np.ndarray)
+    # A column falls back to a list once a batch has a value which is not a numeric scalar.
+    assert step_metrics.columns["acc"] == [0.25, None]
+
+    metrics = make_metrics_from_columns(2, 2, step_metrics.columns)
+    assert metrics["num_inputs"] == 2
+    assert metrics["avg_metrics"] == {"loss": 2.0, "acc": 0.25, "vec": 2.5}
+    assert metrics["batch_metrics"][0]["loss"] == 1.0
+    assert type(metrics["batch_metrics"][0]["loss"]) is float
+    assert metrics["batch_metrics"][1]["acc"] is None
+
+    # The result matches make_metrics() for the same batches.
+    batch_metrics = [
+        {"loss": 1.0, "acc": 0.25, "vec": np.array([1.0, 2.0])},
+        {"loss": 3.0, "acc": None, "vec": np.array([3.0, 4.0])},
+    ]
+    assert make_metrics(2, batch_metrics)["avg_metrics"] == metrics["avg_metrics"]
+    assert make_metrics_from_columns(None, 3, {}) == {
+        "batch_metrics": [{}, {}, {}],
+        "avg_metrics": {},
+    }
@@ -1,11 +1,13 @@
+import io
 from typing import Any, Dict, List, Tuple
 
 import boto3.exceptions
+import botocore.exceptions
 
 
 class MockS3Client:
     def __init__(self, faulty: bool = False) -> None:
-        self.objects = {}  # type: Dict[Tuple[str, str], str]
+        self.objects = {}  # type: Dict[Tuple[str, str], Any]
         self.faulty = faulty
 
     def put_object(self, **kwargs: str) -> None:
@@ -13,11 +15,11 @@ class MockS3Client:
             raise boto3.exceptions.S3UploadFailedError()
         self.objects[(kwargs["Bucket"], kwargs["Key"])] = kwargs["Body"]
 
-    def upload_file(self, path: str, bucket: str, key: str) -> None:
+    def upload_file(self, path: str, bucket: str, key: str, Config: Any = None) -> None:
         with open(path, "r") as fp:
             self.put_object(Bucket=bucket, Key=key, Body=fp.read())
 
-    def download_file(self, bucket: str, key: str, path: str) -> None:
+    def download_file(self, bucket: str, key: str, path: str, Config: Any = None) -> None:
         with open(path, "w") as fp:
             fp.write(self.objects[(bucket, key)])
 
@@ -28,6 +30,21 @@ class MockS3Client:
         for key in keys:
             del self.objects[(Bucket, key["Key"])]
 
+    def head_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        if (Bucket, Key) not in self.objects:
+            raise botocore.exceptions.ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket: str, Key: str) -> None:
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket: str, Prefix: str) -> Dict[str, Any]:
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        return {"Contents": [{"Key": k} for k in keys], "IsTruncated": False}
+
 
 def s3_client(_1: str, **_2: Any) -> MockS3Client:
     return MockS3Client()
@@ -0,0 +1,163 @@
+import os
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from determined_common import storage
+from tests import s3
+from tests.storage import util
+
+# The size of the checkpoint created by util.create_checkpoint().
+CHECKPOINT_SIZE = 20
+
+
+@pytest.fixture
+def manager(tmp_path: Path, monkeypatch: MonkeyPatch) -> storage.S3StorageManager:
+    monkeypatch.setattr("boto3.client", s3.s3_client)
+    return storage.S3StorageManager(
+        bucket="bucket", access_key="key", secret_key="secret", temp_dir=str(tmp_path)
+    )
+
+
+@pytest.fixture
+def downloads(manager: storage.S3StorageManager, monkeypatch: MonkeyPatch) -> List[str]:
+    """Record the storage_id of every checkpoint downloaded from the manager."""
+    downloaded = []  # type: List[str]
+    download = manager.download
+
+    def record_download(metadata: storage.StorageMetadata, storage_dir: str) -> None:
+        downloaded.append(metadata.storage_id)
+        download(metadata, storage_dir)
+
+    monkeypatch.setattr(manager, "download", record_download)
+    return downloaded
+
+
+def store_checkpoint(manager: storage.StorageManager) -> storage.StorageMetadata:
+    with manager.store_path() as (storage_id, path):
+        util.create_checkpoint(path)
+        metadata = storage.StorageMetadata(storage_id, manager._list_directory(path))
+    assert sum(metadata.resources.values()) == CHECKPOINT_SIZE
+    return metadata
+
+
+def test_cache_hit(manager: storage.S3StorageManager, downloads: List[str], tmp_path: Path) -> None:
+    cache = storage.CheckpointCache(str(tmp_path.joinpath("cache")))
+    metadata = store_checkpoint(manager)
+
+    for _ in range(3):
+        with cache.restore_path(manager, metadata) as path:
+            util.validate_checkpoint(path)
+        # Cached checkpoints outlive the context manager.
+        assert os.path.exists(path)
+
+    assert downloads == [metadata.storage_id]
+
+
+def test_cache_integrity(
+    manager: storage.S3StorageManager, downloads: List[str], tmp_path: Path
+) -> None:
+    cache = storage.CheckpointCache(str(tmp_path.joinpath("cache")))
+    metadata = store_checkpoint(manager)
+
+    with cache.restore_path(manager, metadata) as path:
+        pass
+
+    # A cached file whose size no longer matches the metadata is downloaded again.
+    with open(os.path.join(path, "root.txt"), "a") as f:
+        f.write("corrupted")
+    with cache.restore_path(manager, metadata) as path:
+        util.validate_checkpoint(path)
+
+    # So is a cached checkpoint with missing files.
+    os.remove(os.path.join(path, "subdir", "file.txt"))
+    with cache.restore_path(manager, metadata) as path:
+        util.validate_checkpoint(path)
+
+    assert downloads == [metadata.storage_id] * 3
+
+
+def test_cache_lru_eviction(
+    manager: storage.S3StorageManager, downloads: List[str], tmp_path: Path
+) -> None:
+    cache = storage.CheckpointCache(str(tmp_path.joinpath("cache")), max_size=2 * CHECKPOINT_SIZE)
+    a, b, c = [store_checkpoint(manager) for _ in range(3)]
+
+    for metadata in [a, b, a, c]:
+        with cache.restore_path(manager, metadata):
+            pass
+
+    # b was the least recently used checkpoint when c was cached.
+    cached = {name for name in os.listdir(cache.cache_dir) if os.path.isdir(cache._entry_dir(name))}
+    assert cached == {a.storage_id, c.storage_id}
+    assert downloads == [a.storage_id, b.storage_id, c.storage_id]
+    # The lock files of evicted checkpoints are removed too.
+    assert not os.path.exists(cache._lock_path(b.storage_id))
+    assert not os.path.exists(cache._download_lock_path(b.storage_id))
+
+    with cache.restore_path(manager, b) as path:
+        util.validate_checkpoint(path)
+    assert downloads[-1] == b.storage_id
+
+
+def test_cache_does_not_evict_checkpoints_in_use(
+    manager: storage.S3StorageManager, tmp_path: Path
+) -> None:
+    cache = storage.CheckpointCache(str(tmp_path.joinpath("cache")), max_size=CHECKPOINT_SIZE)
+    a, b, c = [store_checkpoint(manager) for _ in range(3)]
+
+    with cache.restore_path(manager, a) as path_a:
+        with cache.restore_path(manager, b) as path_b:
+            util.validate_checkpoint(path_a)
+            util.validate_checkpoint(path_b)
+
+    # Once they are no longer in use they can be evicted.
+    with cache.restore_path(manager, c):
+        pass
+    assert not os.path.exists(path_a)
+    assert not os.path.exists(path_b)
+
+
+def test_cache_relocks_removed_lock_files(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    lock_path = str(tmp_path.joinpath("checkpoint.lock"))
+    locks = []  # type: List[int]
+
+    def lock_and_evict(f: Any, shared: bool = False, blocking: bool = True) -> bool:
+        # Simulate a checkpoint being evicted while its lock file is being locked.
+        if not locks:
+            os.remove(lock_path)
+        locks.append(os.fstat(f.fileno()).st_ino)
+        return True
+
+    monkeypatch.setattr(storage.cache, "_lock", lock_and_evict)
+    with storage.cache._locked(lock_path, shared=True):
+        # The lock is held on the new lock file.
+        assert os.stat(lock_path).st_ino == locks[-1]
+    assert len(locks) == 2
+
+
+def test_cache_bypass(manager: storage.S3StorageManager, tmp_path: Path) -> None:
+    # Checkpoints larger than the cache are restored without it.
+    cache = storage.CheckpointCache(str(tmp_path.joinpath("cache")), max_size=CHECKPOINT_SIZE - 1)
+    metadata = store_checkpoint(manager)
+
+    with cache.restore_path(manager, metadata) as path:
+        util.validate_checkpoint(path)
+    assert not os.path.exists(path)
+    assert not os.path.exists(cache.cache_dir)
+
+    shared_fs = storage.SharedFSStorageManager(str(tmp_path.joinpath("shared")))
+    assert not storage.CheckpointCache.is_supported(shared_fs)
+
+
+def test_cache_from_env(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.delenv(storage.cache.CACHE_DIR_ENV_VAR, raising=False)
+    assert storage.CheckpointCache.from_env() is None
+
+    monkeypatch.setenv(storage.cache.CACHE_DIR_ENV_VAR, "/tmp/cache")
+    monkeypatch.setenv(storage.cache.CACHE_MAX_SIZE_ENV_VAR, "1024")
+    cache = storage.CheckpointCache.from_env()  # type: Any
+    assert cache.cache_dir == "/tmp/cache"
+    assert cache.max_size == 1024
@@ -0,0 +1,116 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from determined_common import storage
+from determined_common.experimental import Checkpoint
+from tests import s3
+from tests.storage import util
+
+
+def make_checkpoint(checkpoint_storage: Dict[str, Any], metadata: storage.StorageMetadata) -> Any:
+    return Checkpoint(
+        metadata.storage_id,
+        {"checkpoint_storage": checkpoint_storage},
+        experiment_id=1,
+        trial_id=1,
+        hparams={},
+        batch_number=100,
+        start_time="",
+        end_time="",
+        resources=metadata.resources,
+        validation={},
+        metadata={},
+        framework="torch-1.4.0",
+        format="pickle",
+    )
+
+
+def test_shared_fs_download_resumes(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    manager = storage.SharedFSStorageManager(str(tmp_path.joinpath("shared")))
+    with manager.store_path() as (storage_id, path):
+        util.create_checkpoint(path)
+        metadata = storage.StorageMetadata(storage_id, manager._list_directory(path))
+    checkpoint = make_checkpoint(
+        {"type": "shared_fs", "host_path": str(tmp_path.joinpath("shared"))}, metadata
+    )
+
+    copied = []  # type: List[str]
+    copy2 = shutil.copy2
+
+    def record_copy(src: str, dst: str) -> Any:
+        copied.append(os.path.relpath(src, os.path.join(manager._base_path, storage_id)))
+        return copy2(src, dst)
+
+    monkeypatch.setattr(shutil, "copy2", record_copy)
+
+    local_path = checkpoint.download(str(tmp_path.joinpath("local")))
+    assert sorted(copied) == ["root.txt", "subdir/file.txt"]
+    assert os.path.exists(os.path.join(local_path, "metadata.json"))
+
+    # A complete checkpoint is not copied again.
+    copied.clear()
+    checkpoint.download(local_path)
+    assert copied == []
+
+    # Only missing or incomplete files are copied.
+    with open(os.path.join(local_path, "root.txt"), "w") as f:
+        f.write("root")
+    os.remove(os.path.join(local_path, "subdir", "file.txt"))
+    checkpoint.download(local_path)
+    assert sorted(copied) == ["root.txt", "subdir/file.txt"]
+    os.remove(os.path.join(local_path, "metadata.json"))
+    util.validate_checkpoint(local_path)
+
+    # Files which do not match the checkpoint's resources are reported.
+    checkpoint.resources = {**metadata.resources, "root.txt": 1000}
+    with pytest.raises(AssertionError, match="root.txt"):
+        checkpoint.download(local_path)
+
+
+def test_download_from_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    # Share one mock bucket between the checkpoint's storage manager and ours.
+    client = s3.MockS3Client()
+    monkeypatch.setattr("boto3.client", lambda *_1, **_2: client)
+    monkeypatch.setenv(storage.cache.CACHE_DIR_ENV_VAR, str(tmp_path.joinpath("cache")))
+    checkpoint_storage = {
+        "type": "s3",
+        "bucket": "bucket",
+        "access_key": "key",
+        "secret_key": "secret",
+        "temp_dir": str(tmp_path.joinpath("tmp")),
+    }
+    manager = storage.build(checkpoint_storage, container_path=None)
+    with manager.store_path() as (storage_id, path):
+        util.create_checkpoint(path)
+        metadata = storage.StorageMetadata(storage_id, manager._list_directory(path))
+    checkpoint = make_checkpoint(checkpoint_storage, metadata)
+
+    downloads = []  # type: List[str]
+    download = storage.S3StorageManager.download
+
+    def record_download(self: Any, metadata: storage.StorageMetadata, storage_dir: str) -> None:
+        downloads.append(metadata.storage_id)
+        download(self, metadata, storage_dir)
+
+    monkeypatch.setattr(storage.S3StorageManager, "download", record_download)
+
+    # Loading the checkpoint into several directories only downloads it once, and every
+    # directory gets its own copy of the files, which does not change the cache when modified.
+    paths = [checkpoint.download(str(tmp_path.joinpath(name))) for name in ["a", "b"]]
+    assert downloads == [storage_id]
+    cached_root = os.path.join(str(tmp_path), "cache", storage_id, "root.txt")
+    for path in paths:
+        root = os.path.join(path, "root.txt")
+        assert not os.path.samefile(root, cached_root)
+        os.remove(os.path.join(path, "metadata.json"))
+        util.validate_checkpoint(path)
+
+    with open(os.path.join(paths[0], "root.txt"), "w") as f:
+        f.write("modified")
+    util.validate_checkpoint(os.path.dirname(cached_root))
+    util.validate_checkpoint(paths[1])
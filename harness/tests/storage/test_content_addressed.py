@@ -0,0 +1,196 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from determined_common import storage
+from determined_common.storage import content_addressed
+from tests import s3
+from tests.storage import util
+
+
+@pytest.fixture(params=["shared_fs", "s3"])
+def manager(
+    request: Any, tmp_path: Path, monkeypatch: MonkeyPatch
+) -> storage.ContentAddressedStorageManager:
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path.joinpath("tmp")))
+    tmp_path.joinpath("tmp").mkdir()
+
+    config = {"content_addressed": True}  # type: Dict[str, Any]
+    if request.param == "shared_fs":
+        config.update({"type": "shared_fs", "host_path": str(tmp_path.joinpath("shared"))})
+    else:
+        monkeypatch.setattr("boto3.client", s3.s3_client)
+        config.update({"type": "s3", "bucket": "bucket", "access_key": "a", "secret_key": "s"})
+
+    manager = storage.build(config, container_path=None)
+    assert isinstance(manager, storage.ContentAddressedStorageManager)
+    manager.chunk_size = 4
+    return manager
+
+
+def keys(manager: storage.ContentAddressedStorageManager, prefix: str) -> List[str]:
+    store = manager._store
+    if isinstance(store, content_addressed._SharedFSBlobStore):
+        root = os.path.join(store.root, prefix)
+        return sorted(name for _, _, files in os.walk(root) for name in files)
+    return sorted(k.split("/")[-1] for k in store.list(prefix))
+
+
+def blobs(manager: storage.ContentAddressedStorageManager) -> List[str]:
+    return keys(manager, content_addressed.BLOBS_PREFIX)
+
+
+def test_content_addressed_lifecycle(manager: storage.ContentAddressedStorageManager) -> None:
+    checkpoints = []
+    for _ in range(2):
+        with manager.store_path() as (storage_id, path):
+            util.create_checkpoint(path)
+            checkpoints.append(storage.StorageMetadata(storage_id, manager._list_directory(path)))
+
+    # "root file" and "nested file" are split into six distinct 4-byte chunks and the identical
+    # second checkpoint does not store any new chunks.
+    num_blobs = len(blobs(manager))
+    assert num_blobs == 6
+
+    for metadata in checkpoints:
+        with manager.restore_path(metadata) as path:
+            util.validate_checkpoint(path)
+        assert not os.path.exists(path)
+
+    # Chunks are only deleted once no checkpoint references them.
+    manager.delete(checkpoints[0])
+    assert len(blobs(manager)) == num_blobs
+    with manager.restore_path(checkpoints[1]) as path:
+        util.validate_checkpoint(path)
+
+    manager.delete(checkpoints[1])
+    assert blobs(manager) == []
+
+
+def test_content_addressed_dedup(manager: storage.ContentAddressedStorageManager) -> None:
+    with manager.store_path() as (first_id, path):
+        util.create_checkpoint(path)
+        first = storage.StorageMetadata(first_id, manager._list_directory(path))
+    first_blobs = blobs(manager)
+
+    with manager.store_path() as (second_id, path):
+        util.create_checkpoint(path)
+        with open(os.path.join(path, "root.txt"), "a") as f:
+            f.write("!!!!")
+        second = storage.StorageMetadata(second_id, manager._list_directory(path))
+
+    # Only the chunks at the end of the modified file are new: "e!!!" and "!".
+    assert len(blobs(manager)) == len(first_blobs) + 2
+
+    manager.delete(second)
+    assert blobs(manager) == first_blobs
+    with manager.restore_path(first) as path:
+        util.validate_checkpoint(path)
+
+
+def test_content_addressed_delete_during_upload(
+    manager: storage.ContentAddressedStorageManager, monkeypatch: MonkeyPatch
+) -> None:
+    with manager.store_path() as (old_id, path):
+        util.create_checkpoint(path)
+        old = storage.StorageMetadata(old_id, manager._list_directory(path))
+
+    # Store an identical checkpoint right after the delete has found that the first chunk is no
+    # longer referenced, so that the upload finds the chunk in storage before it is deleted.
+    new = []  # type: List[storage.StorageMetadata]
+    list_keys = manager._store.list
+
+    def list_then_upload(prefix: str) -> List[str]:
+        keys = list_keys(prefix)  # type: List[str]
+        if not new:
+            with manager.store_path() as (new_id, path):
+                util.create_checkpoint(path)
+                new.append(storage.StorageMetadata(new_id, manager._list_directory(path)))
+        return keys
+
+    monkeypatch.setattr(manager._store, "list", list_then_upload)
+    manager.max_concurrency = 1
+    manager.delete(old)
+
+    assert len(blobs(manager)) == 6
+    with manager.restore_path(new[0]) as path:
+        util.validate_checkpoint(path)
+
+
+def test_content_addressed_upload_during_delete(
+    manager: storage.ContentAddressedStorageManager, monkeypatch: MonkeyPatch
+) -> None:
+    with manager.store_path() as (old_id, path):
+        util.create_checkpoint(path)
+        old = storage.StorageMetadata(old_id, manager._list_directory(path))
+
+    # Store an identical checkpoint after the delete has decided to delete the first chunk, and
+    # only delete the chunk once the upload is checking which chunks are stored.
+    new = []  # type: List[storage.StorageMetadata]
+    checking = threading.Event()
+    list_keys, delete_key = manager._store.list, manager._store.delete
+
+    def upload() -> None:
+        with manager.store_path() as (new_id, path):
+            util.create_checkpoint(path)
+            new.append(storage.StorageMetadata(new_id, manager._list_directory(path)))
+
+    def list_and_signal(prefix: str) -> List[str]:
+        if prefix.startswith(content_addressed.TOMBSTONES_PREFIX):
+            checking.set()
+        listed = list_keys(prefix)  # type: List[str]
+        return listed
+
+    def upload_then_delete(key: str) -> None:
+        if key.startswith(content_addressed.BLOBS_PREFIX) and not checking.is_set():
+            upload_thread.start()
+            assert checking.wait(timeout=10)
+        delete_key(key)
+
+    upload_thread = threading.Thread(target=upload)
+    monkeypatch.setattr(manager._store, "list", list_and_signal)
+    monkeypatch.setattr(manager._store, "delete", upload_then_delete)
+    monkeypatch.setattr(content_addressed, "TOMBSTONE_POLL_SECONDS", 0.01)
+    manager.max_concurrency = 1
+    manager.delete(old)
+    upload_thread.join()
+
+    assert len(blobs(manager)) == 6
+    assert keys(manager, content_addressed.TOMBSTONES_PREFIX) == []
+    with manager.restore_path(new[0]) as path:
+        util.validate_checkpoint(path)
+
+
+def test_content_addressed_stale_tombstone(
+    manager: storage.ContentAddressedStorageManager, monkeypatch: MonkeyPatch
+) -> None:
+    with manager.store_path() as (old_id, path):
+        util.create_checkpoint(path)
+        old = storage.StorageMetadata(old_id, manager._list_directory(path))
+
+    # A delete which failed after writing its tombstones does not block uploads forever.
+    digests = {d for chunks in manager._get_manifest(old_id)["files"].values() for d in chunks}
+    for digest in digests:
+        manager._store.put(content_addressed._tombstone_key(digest, "failed-delete"), b"")
+    monkeypatch.setattr(content_addressed, "TOMBSTONE_TIMEOUT_SECONDS", 0)
+    manager.delete(old)
+
+    with manager.store_path() as (new_id, path):
+        util.create_checkpoint(path)
+        new = storage.StorageMetadata(new_id, manager._list_directory(path))
+
+    assert len(blobs(manager)) == 6
+    assert keys(manager, content_addressed.TOMBSTONES_PREFIX) == []
+    with manager.restore_path(new) as path:
+        util.validate_checkpoint(path)
+
+
+def test_content_addressed_unsupported(tmp_path: Path) -> None:
+    with pytest.raises(TypeError, match="not supported"):
+        storage.ContentAddressedStorageManager(
+            storage.HDFSStorageManager("http://localhost:50070", "/ckpts", temp_dir=str(tmp_path))
+        )
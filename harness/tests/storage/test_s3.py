@@ -7,6 +7,7 @@ from _pytest.monkeypatch import MonkeyPatch
 from boto3.exceptions import S3UploadFailedError
 
 from determined_common import storage
+from determined_common.storage import transfer
 from tests import s3
 from tests.storage import util
 
@@ -62,3 +63,63 @@ def test_verify_s3_upload_error(tmp_path: Path, monkeypatch: MonkeyPatch) -> Non
     with pytest.raises(S3UploadFailedError):
         storage.validate_config(config, container_path=None)
     assert len(os.listdir(tmpdir_s)) == 0
+
+
+def test_s3_transfer_config(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr("boto3.client", s3.s3_client)
+    manager = storage.build(
+        {
+            "type": "s3",
+            "bucket": "bucket",
+            "access_key": "key",
+            "secret_key": "secret",
+            "max_concurrency": 8,
+            "multipart_chunk_size": 16 * 1024 * 1024,
+        },
+        container_path=None,
+    )
+    assert isinstance(manager, storage.S3StorageManager)
+
+    # The per-file part concurrency shrinks as more files are transferred at once.
+    one_file = storage.StorageMetadata("id", {"a": 1, "subdir/": 0})
+    config = manager._transfer_config(one_file)
+    assert config.max_concurrency == 8
+    assert config.multipart_chunksize == 16 * 1024 * 1024
+
+    many_files = storage.StorageMetadata("id", {str(i): 1 for i in range(4)})
+    assert manager._transfer_config(many_files).max_concurrency == 2
+
+
+def test_s3_concurrent_transfer(manager: storage.S3StorageManager, tmp_path: Path) -> None:
+    src = tmp_path.joinpath("src")
+    for i in range(50):
+        src.joinpath("shard_{}".format(i % 5)).mkdir(parents=True, exist_ok=True)
+        src.joinpath("shard_{}".format(i % 5), "part_{}.txt".format(i)).write_text(str(i))
+    metadata = storage.StorageMetadata("id", manager._list_directory(str(src)))
+
+    manager.max_concurrency = 4
+    manager.upload(metadata, str(src))
+    assert len(manager.client.objects) == len(metadata.resources)
+
+    dst = tmp_path.joinpath("dst")
+    manager.download(metadata, str(dst))
+    assert manager._list_directory(str(dst)) == metadata.resources
+    for i in range(50):
+        assert dst.joinpath("shard_{}".format(i % 5), "part_{}.txt".format(i)).read_text() == str(i)
+
+
+def test_transfer_files_error() -> None:
+    transferred = []
+
+    def transfer_fn(rel_path: str) -> None:
+        if rel_path == "bad":
+            raise ValueError(rel_path)
+        transferred.append(rel_path)
+
+    resources = {"dir/": 0, "good": 3, "bad": 3}
+    with pytest.raises(ValueError, match="bad"):
+        transfer.transfer_files(resources, transfer_fn, max_concurrency=1)
+
+    stats = transfer.transfer_files({"dir/": 0, "a": 3, "b": 4}, transferred.append, 2)
+    assert stats.num_files == 2
+    assert stats.num_bytes == 7
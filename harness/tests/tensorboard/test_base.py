@@ -88,3 +88,33 @@ def test_list_nonexistent_directory(tmp_path: pathlib.Path) -> None:
 
     assert not pathlib.Path(base_path).exists()
     assert manager.list_tfevents() == []
+
+
+def test_sync_appended_events(tmp_path: pathlib.Path) -> None:
+    base_path = tmp_path.joinpath("events")
+    base_path.mkdir()
+    event_path = base_path.joinpath("events.out.tfevents.example")
+    sync_path = tensorboard.get_sync_path(test_util.get_dummy_env())
+    manager = tensorboard.SharedFSTensorboardManager(
+        str(tmp_path.joinpath("storage")), base_path, sync_path
+    )
+    synced_path = manager.shared_fs_base.joinpath(event_path.name)
+
+    event_path.write_bytes(b"first")
+    manager.sync()
+    assert synced_path.read_bytes() == b"first"
+    assert manager.to_sync() == []
+
+    # Only the appended bytes are copied.
+    with event_path.open("ab") as f:
+        f.write(b" second")
+    synced_path.write_bytes(b"FIRST")
+    manager.sync()
+    assert synced_path.read_bytes() == b"FIRST second"
+
+    # A synced file which does not match what was synced before is copied again.
+    with event_path.open("ab") as f:
+        f.write(b" third")
+    synced_path.write_bytes(b"?")
+    manager.sync()
+    assert synced_path.read_bytes() == b"first second third"
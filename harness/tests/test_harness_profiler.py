@@ -0,0 +1,119 @@
+import pathlib
+import sys
+import time
+from typing import List, Optional
+
+from _pytest import monkeypatch
+
+from determined import gpu, layers
+
+
+class FakeGPUSampler(gpu.GPUSampler):
+    """Return the given samples one after another, and the last one from then on."""
+
+    def __init__(self, samples: List[List[gpu.GPU]], error: Optional[Exception] = None) -> None:
+        self._samples = list(samples)
+        self._error = error
+        self.closed = False
+
+    def sample(self) -> List[gpu.GPU]:
+        if len(self._samples) > 1:
+            return self._samples.pop(0)
+        if self._error is not None:
+            raise self._error
+        return self._samples[0]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def gpus(load: float) -> list:
+    return [
+        gpu.GPU(id=0, uuid="GPU-0", load=load, memoryUtil=0.5),
+        gpu.GPU(id=1, uuid="GPU-1", load=load, memoryUtil=0.25),
+    ]
+
+
+def test_harness_profiler_samples_gpus() -> None:
+    sampler = FakeGPUSampler([[], gpus(0.1), gpus(0.2)])
+    profiler = layers.HarnessProfiler(interval=0.01, use_gpu=True, gpu_sampler=sampler)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    assert sampler.closed
+
+    results = profiler.results()
+    gpu_results = [name for name in results if name.startswith("GPU")]
+    assert gpu_results == [
+        "GPU 0 Load (%)",
+        "GPU 1 Load (%)",
+        "GPU 0 Memory Utilization (%)",
+        "GPU 1 Memory Utilization (%)",
+    ]
+    # The GPUs are only measured once the sampler reports them.
+    loads = [load for _, load in results["GPU 0 Load (%)"]]
+    assert loads[:2] == [0.1, 0.2] and set(loads[2:]) <= {0.2}
+    assert {u for _, u in results["GPU 1 Memory Utilization (%)"]} == {0.25}
+
+
+def test_harness_profiler_stops_sampling_failing_gpus() -> None:
+    # The sampler fails after its last sample, e.g. when the driver stops responding.
+    sampler = FakeGPUSampler([gpus(0.1), gpus(0.2)], error=RuntimeError("NVML error"))
+    profiler = layers.HarnessProfiler(interval=0.01, use_gpu=True, gpu_sampler=sampler)
+    profiler.start()
+    time.sleep(0.1)
+    # The monitor thread keeps measuring the rest.
+    assert profiler._monitor_thread.is_alive()
+    profiler.stop()
+    assert sampler.closed
+
+    results = profiler.results()
+    assert [load for _, load in results["GPU 0 Load (%)"]] == [0.1]
+    assert len(results["CPU Utilization (%)"]) > 2
+
+
+def test_nvidia_smi_sampler(tmp_path: pathlib.Path, monkeypatch: monkeypatch.MonkeyPatch) -> None:
+    # Stand in for `nvidia-smi --loop-ms`, which reports the GPUs until it is terminated.
+    nvidia_smi = tmp_path.joinpath("nvidia-smi")
+    nvidia_smi.write_text(
+        "#!/bin/sh\n"
+        "i=0\n"
+        "while true; do\n"
+        '  echo "0, GPU-0, $i, 100, 400"\n'
+        '  echo "1, GPU-1, 50, 200, 400"\n'
+        "  i=$((i + 10))\n"
+        "  /bin/sleep 0.01\n"
+        "done\n"
+    )
+    nvidia_smi.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    # Importing a module which is None in sys.modules raises an ImportError.
+    monkeypatch.setitem(sys.modules, "pynvml", None)  # type: ignore
+
+    sampler = gpu.make_gpu_sampler(0.01)
+    assert isinstance(sampler, gpu.NvidiaSMISampler)
+    try:
+        deadline = time.time() + 10
+        while len(sampler.sample()) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        first = sampler.sample()
+        assert [(g.id, g.uuid, g.memoryUtil) for g in first] == [
+            (0, "GPU-0", 0.25),
+            (1, "GPU-1", 0.5),
+        ]
+        while sampler.sample()[0].load == first[0].load and time.time() < deadline:
+            time.sleep(0.01)
+        assert sampler.sample()[0].load > first[0].load
+    finally:
+        sampler.close()
+
+
+def test_make_gpu_sampler_without_gpus(
+    tmp_path: pathlib.Path, monkeypatch: monkeypatch.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path))
+    # Importing a module which is None in sys.modules raises an ImportError.
+    monkeypatch.setitem(sys.modules, "pynvml", None)  # type: ignore
+    sampler = gpu.make_gpu_sampler(0.1)
+    assert isinstance(sampler, gpu.NoGPUSampler)
+    assert sampler.sample() == []
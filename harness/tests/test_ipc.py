@@ -3,7 +3,10 @@ import multiprocessing
 import sys
 import textwrap
 import traceback
-from typing import Any, List, Optional, cast
+from typing import Any, Dict, List, Optional, cast
+
+import numpy as np
+import pytest
 
 from determined import ipc, layers, workload
 from tests.experiment import utils
@@ -158,3 +161,86 @@ def test_zmq_server_client() -> None:
     server.send(server_object)
     client_object = client.receive()
     assert server_object == client_object
+
+
+def test_multipart_serialization() -> None:
+    small = np.arange(4, dtype=np.int32)
+    large = np.arange(128 * 128, dtype=np.float32).reshape(128, 128)
+    obj = {
+        "small": small,
+        "large": large,
+        "transposed": large.T,
+        "same": [large, large],
+        "records": np.zeros(16384, dtype=[("x", np.int64), ("y", np.float32)]),
+        "objects": np.array([{"a": 1}] * 16384, dtype=object),
+        "scalar": np.float64(1.5),
+    }
+
+    frames = ipc._dumps_multipart(obj)
+    # Large arrays of plain data are sent out of band; everything else is pickled inline.
+    assert len(frames) == 4
+
+    result = ipc._loads_multipart([bytes(frame) for frame in frames])
+    assert set(result) == set(obj)
+    for key in ["small", "large", "transposed", "records", "objects"]:
+        assert result[key].dtype == obj[key].dtype
+        assert np.array_equal(result[key], obj[key])
+    assert all(np.array_equal(a, large) for a in result["same"])
+    assert result["scalar"] == obj["scalar"]
+
+
+@pytest.mark.parametrize(  # type: ignore
+    "array",
+    [
+        np.arange(16384).astype("datetime64[s]"),
+        np.arange(16384).astype("timedelta64[ms]").reshape(128, 128).T,
+        np.array(np.datetime64("2020-01-01")),
+        np.zeros((0, 16384), dtype=np.float64),
+        np.array([None] * 16384, dtype=object),
+    ],
+)
+def test_multipart_serialization_dtypes(array: np.ndarray) -> None:
+    frames = ipc._dumps_multipart({"array": array})
+    result = ipc._loads_multipart([bytes(frame) for frame in frames])["array"]
+    assert result.dtype == array.dtype
+    assert result.shape == array.shape
+    assert np.array_equal(result, array)
+
+
+class MetricsClientSubproc(Subproc):
+    def __init__(self, pub_url: str, pull_url: str, metrics: Dict[str, Any]) -> None:
+        self._pub_url = pub_url
+        self._pull_url = pull_url
+        self._metrics = metrics
+        super().__init__()
+
+    def main(self) -> None:
+        with ipc.ZMQBroadcastClient(self._pub_url, self._pull_url) as broadcast_client:
+            broadcast_client.send(ipc.ConnectedMessage(process_id=0))
+            assert broadcast_client.recv() is None
+            broadcast_client.send(ipc.MetricsInfo(metrics=self._metrics, num_batches=4))
+            assert broadcast_client.recv() is None
+
+
+def test_broadcast_server_gather_arrays() -> None:
+    num_subprocs = 2
+    metrics = {"loss": np.random.rand(10000), "labels": np.arange(20000).reshape(1000, 20)}
+
+    with ipc.ZMQBroadcastServer(num_connections=num_subprocs) as broadcast_server:
+        pub_url = f"tcp://localhost:{broadcast_server.get_pub_port()}"
+        pull_url = f"tcp://localhost:{broadcast_server.get_pull_port()}"
+
+        with SubprocGroup(
+            MetricsClientSubproc(pub_url, pull_url, metrics) for _ in range(num_subprocs)
+        ):
+            gathered, _ = broadcast_server.gather_with_polling(lambda: None)
+            assert all(isinstance(g, ipc.ConnectedMessage) for g in gathered)
+            broadcast_server.broadcast(None)
+
+            gathered, _ = broadcast_server.gather_with_polling(lambda: None)
+            broadcast_server.broadcast(None)
+
+            for metrics_info in gathered:
+                assert metrics_info.num_batches == 4
+                for name, value in metrics.items():
+                    assert np.array_equal(metrics_info.metrics[name], value)
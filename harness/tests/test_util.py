@@ -1,4 +1,6 @@
-from determined.util import _dict_to_list, _list_to_dict
+import numpy as np
+
+from determined.util import _dict_to_list, _list_to_dict, _pack_metric_values, make_metrics
 from determined_common.util import sizeof_fmt
 
 
@@ -12,6 +14,37 @@ def test_dict_to_list() -> None:
     assert r == [{"a": 1, "b": 3}, {"a": 2, "b": 4}]
 
 
+def test_pack_metric_values() -> None:
+    packed = _pack_metric_values([np.array(1.0, dtype=np.float32), np.float32(2.0), 3])
+    assert packed is not None
+    values, missing = packed
+    assert values.dtype == np.float64
+    assert list(values) == [1.0, 2.0, 3.0]
+    assert missing is None
+
+    packed = _pack_metric_values([1.0, None, np.array(float("nan"))])
+    assert packed is not None
+    values, missing = packed
+    assert missing is not None and list(missing) == [False, True, False]
+    assert values[0] == 1.0 and np.isnan(values[2])
+
+    # Only numeric scalars can be packed.
+    assert _pack_metric_values(["a", "b"]) is None
+    assert _pack_metric_values([np.array([1.0, 2.0]), np.array([3.0, 4.0])]) is None
+    assert _pack_metric_values([np.array([1.0, 2.0]), None]) is None
+
+
+def test_make_metrics() -> None:
+    batch_metrics = [
+        {"loss": np.array(1.0), "acc": None, "name": "a", "vec": np.array([1.0, 2.0])},
+        {"loss": np.array(3.0), "acc": 0.5, "name": "b", "vec": np.array([3.0, 4.0])},
+    ]
+    metrics = make_metrics(4, batch_metrics)
+    assert metrics["num_inputs"] == 4
+    assert metrics["batch_metrics"] is batch_metrics
+    assert metrics["avg_metrics"] == {"loss": 2.0, "acc": 0.5, "name": None, "vec": 2.5}
+
+
 def test_sizeof_fmt() -> None:
     assert sizeof_fmt(1024) == "1.0KB"
     assert sizeof_fmt(36) == "36.0B"
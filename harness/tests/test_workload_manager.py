@@ -1,6 +1,8 @@
 import contextlib
 import os
 import pathlib
+import random
+import threading
 from typing import Any, Dict, Iterator, Optional, cast
 
 import numpy as np
@@ -20,6 +22,27 @@ class NoopTensorboardManager(tensorboard.TensorboardManager):
         pass
 
 
+class BlockingTensorboardManager(tensorboard.TensorboardManager):
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.syncs = 0
+
+    def sync(self) -> None:
+        assert self.release.wait(timeout=10)
+        self.syncs += 1
+
+
+class RandomTensorboardManager(tensorboard.TensorboardManager):
+    """Draws random numbers while syncing, like uploads with retry jitter do."""
+
+    def __init__(self) -> None:
+        self.synced = threading.Event()
+
+    def sync(self) -> None:
+        random.random()
+        self.synced.set()
+
+
 class NoopBatchMetricWriter(tensorboard.BatchMetricWriter):
     def __init__(self) -> None:
         pass
@@ -91,6 +114,23 @@ class NoopTrialController(det.TrialController):
                 raise NotImplementedError()
 
 
+class TerminatingTrialController(NoopTrialController):
+    """NoopTrialController which also answers TERMINATE workloads."""
+
+    def run(self) -> None:
+        workloads = self.workloads
+
+        def answer_terminate() -> workload.Stream:
+            for w, args, response_func in workloads:
+                if w.kind == workload.Workload.Kind.TERMINATE:
+                    response_func({})
+                else:
+                    yield w, args, response_func
+
+        self.workloads = answer_terminate()
+        super().run()
+
+
 def test_checkpoint_upload_failure(tmp_path: pathlib.Path) -> None:
     hparams = {"global_batch_size": 64}
     env = utils.make_default_env_context(hparams)
@@ -166,3 +206,78 @@ def test_reject_nonscalar_searcher_metric() -> None:
         else:
             with pytest.raises(AssertionError, match="non-scalar"):
                 trial_controller.run()
+
+
+def test_background_tensorboard_sync(tmp_path: pathlib.Path) -> None:
+    hparams = {"global_batch_size": 64}
+    env = utils.make_default_env_context(hparams)
+    rendezvous_info = utils.make_default_rendezvous_info()
+    storage_manager = NoopStorageManager(str(tmp_path))
+    tensorboard_manager = BlockingTensorboardManager()
+    metric_writer = NoopBatchMetricWriter()
+
+    def make_workloads() -> workload.Stream:
+        # Workloads are answered while event files are being synced.
+        for step_id in range(1, 4):
+            yield workload.train_workload(step_id), [], workload.ignore_workload_response
+        assert tensorboard_manager.syncs == 0
+
+        # Event files are synced before the trial is terminated.
+        tensorboard_manager.release.set()
+        yield workload.terminate_workload(3), [], workload.ignore_workload_response
+        assert tensorboard_manager.syncs >= 1
+
+    workload_manager = layers.build_workload_manager(
+        env,
+        make_workloads(),
+        rendezvous_info,
+        storage_manager,
+        tensorboard_manager,
+        metric_writer,
+    )
+
+    trial_controller = TerminatingTrialController(iter(workload_manager))
+    trial_controller.run()
+
+
+def test_background_tensorboard_sync_preserves_random_state(tmp_path: pathlib.Path) -> None:
+    env = utils.make_default_env_context({"global_batch_size": 64})
+    tensorboard_manager = RandomTensorboardManager()
+    random.seed(0)
+    state = random.getstate()
+
+    def make_workloads() -> workload.Stream:
+        yield workload.train_workload(1), [], workload.ignore_workload_response
+        assert tensorboard_manager.synced.wait(timeout=10)
+        yield workload.terminate_workload(1), [], workload.ignore_workload_response
+
+    workload_manager = layers.build_workload_manager(
+        env,
+        make_workloads(),
+        utils.make_default_rendezvous_info(),
+        NoopStorageManager(str(tmp_path)),
+        tensorboard_manager,
+        NoopBatchMetricWriter(),
+    )
+
+    trial_controller = TerminatingTrialController(iter(workload_manager))
+    trial_controller.run()
+
+    assert random.getstate() == state
+
+
+def test_tensorboard_syncer_starts_lazily(tmp_path: pathlib.Path) -> None:
+    def syncer_threads() -> int:
+        return sum(t.name == "tensorboard-syncer" for t in threading.enumerate())
+
+    env = utils.make_default_env_context({"global_batch_size": 64})
+    layers.build_workload_manager(
+        env,
+        iter([]),
+        utils.make_default_rendezvous_info(),
+        NoopStorageManager(str(tmp_path)),
+        NoopTensorboardManager(),
+        NoopBatchMetricWriter(),
+    )
+    # A workload manager which is never iterated does not leave a thread behind.
+    assert syncer_threads() == 0
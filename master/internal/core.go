@@ -104,6 +104,8 @@ func (m *Master) Info() aproto.MasterInfo {
 		Version:     m.Version,
 		Telemetry:   telemetryInfo,
 		ClusterName: m.config.ClusterName,
+
+		GzipExperimentRequests: true,
 	}
 }
 
@@ -1,8 +1,10 @@
 package internal
 
 import (
+	"compress/gzip"
 	"encoding/json"
 	"fmt"
+	"io"
 	"io/ioutil"
 	"net/http"
 	"regexp"
@@ -422,7 +424,20 @@ func (m *Master) parseCreateExperiment(params *CreateExperimentParams) (
 }
 
 func (m *Master) postExperiment(c echo.Context) (interface{}, error) {
-	body, err := ioutil.ReadAll(c.Request().Body)
+	// The CLI compresses the model definition it streams.
+	var reader io.Reader = c.Request().Body
+	if c.Request().Header.Get(echo.HeaderContentEncoding) == "gzip" {
+		gzipReader, err := gzip.NewReader(reader)
+		if err != nil {
+			return nil, echo.NewHTTPError(
+				http.StatusBadRequest,
+				errors.Wrap(err, "invalid experiment params"))
+		}
+		defer gzipReader.Close()
+		reader = gzipReader
+	}
+
+	body, err := ioutil.ReadAll(reader)
 	if err != nil {
 		return nil, err
 	}
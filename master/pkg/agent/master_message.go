@@ -27,6 +27,8 @@ type MasterInfo struct {
 	ClusterID   string        `json:"cluster_id"`
 	ClusterName string        `json:"cluster_name"`
 	Telemetry   TelemetryInfo `json:"telemetry"`
+	// GzipExperimentRequests is set if POST /experiments accepts gzip-encoded request bodies.
+	GzipExperimentRequests bool `json:"gzip_experiment_requests"`
 }
 
 // MasterMessage is a union type for all messages sent from agents.
@@ -95,6 +95,8 @@ func DefaultExperimentConfig(taskContainerDefaults *TaskContainerDefaultsConfig)
 			AverageTrainingMetrics:     false,
 			GradientCompression:        false,
 			MixedPrecision:             "O0",
+			PrefetchBatches:            0,
+			ShardedCheckpoints:         false,
 			TensorFusionThreshold:      64,
 			TensorFusionCycleTime:      5,
 			AutoTuneTensorFusion:       false,
@@ -233,6 +233,8 @@ type OptimizationsConfig struct {
 	GradientCompression        bool   `json:"gradient_compression"`
 	GradUpdateSizeFile         string `json:"grad_updates_size_file,omitempty"`
 	MixedPrecision             string `json:"mixed_precision"`
+	PrefetchBatches            int    `json:"prefetch_batches"`
+	ShardedCheckpoints         bool   `json:"sharded_checkpoints"`
 	TensorFusionThreshold      int    `json:"tensor_fusion_threshold"`
 	TensorFusionCycleTime      int    `json:"tensor_fusion_cycle_time"`
 	AutoTuneTensorFusion       bool   `json:"auto_tune_tensor_fusion"`
@@ -245,6 +247,7 @@ func (r OptimizationsConfig) Validate() []error {
 		check.In(r.MixedPrecision, []string{"O0", "O1", "O2", "O3"}, "mixed_precision must be set "+
 			"to one of the following  options: `O0`, `O1`, `O2`, `O3`. Note that in `O0`, `O1`, etc., "+
 			"the prefix O is the capital letter O, not the number zero."),
+		check.GreaterThanOrEqualTo(r.PrefetchBatches, 0, "prefetch_batches must be >= 0"),
 		check.GreaterThanOrEqualTo(r.TensorFusionThreshold, 0, "tensor_fusion_threshold must be >= 0"),
 		check.GreaterThanOrEqualTo(r.TensorFusionCycleTime, 0, "tensor_fusion_cycle_time must be >= 0"),
 	}
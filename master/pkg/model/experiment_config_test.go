@@ -374,6 +374,8 @@ func TestExperiment(t *testing.T) {
 			AverageTrainingMetrics:     false,
 			GradientCompression:        false,
 			MixedPrecision:             "O0",
+			PrefetchBatches:            0,
+			ShardedCheckpoints:         false,
 			TensorFusionThreshold:      64,
 			TensorFusionCycleTime:      5,
 			AutoTuneTensorFusion:       false,
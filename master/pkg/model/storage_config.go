@@ -16,6 +16,8 @@ const (
 	DefaultSharedFSContainerPath = "/determined_shared_fs"
 	// DefaultSharedFSPropagation is the propagation setting for SharedFS storage.
 	DefaultSharedFSPropagation = "rprivate"
+	// minS3MultipartChunkSize is the smallest part size that S3 accepts for multipart uploads.
+	minS3MultipartChunkSize = 5 * 1024 * 1024
 )
 
 // CheckpointStorageConfig has the common checkpoint config params.
@@ -24,6 +26,8 @@ type CheckpointStorageConfig struct {
 	SaveTrialBest      int `json:"save_trial_best"`
 	SaveTrialLatest    int `json:"save_trial_latest"`
 
+	ContentAddressed *bool `json:"content_addressed,omitempty"`
+
 	SharedFSConfig *SharedFSConfig `union:"type,shared_fs" json:"-"`
 	HDFSConfig     *HDFSConfig     `union:"type,hdfs" json:"-"`
 	S3Config       *S3Config       `union:"type,s3" json:"-"`
@@ -36,6 +40,10 @@ func (c CheckpointStorageConfig) Validate() []error {
 		check.GreaterThanOrEqualTo(c.SaveExperimentBest, 0, "save_experiment_best must be >= 0"),
 		check.GreaterThanOrEqualTo(c.SaveTrialBest, 0, "save_trial_best must be >= 0"),
 		check.GreaterThanOrEqualTo(c.SaveTrialLatest, 0, "save_trial_latest must be >= 0"),
+		check.False(
+			c.HDFSConfig != nil && c.ContentAddressed != nil && *c.ContentAddressed,
+			"content_addressed is not supported for hdfs checkpoint storage",
+		),
 	}
 }
 
@@ -140,10 +148,21 @@ type S3Config struct {
 	AccessKey   *string `json:"access_key,omitempty"`
 	SecretKey   *string `json:"secret_key,omitempty"`
 	EndpointURL *string `json:"endpoint_url,omitempty"`
+
+	MaxConcurrency     *int `json:"max_concurrency,omitempty"`
+	MultipartChunkSize *int `json:"multipart_chunk_size,omitempty"`
 }
 
 // Validate implements the check.Validatable interface.
-func (S3Config) Validate() []error { return nil }
+func (s S3Config) Validate() []error {
+	return []error{
+		check.GreaterThan(s.MaxConcurrency, 0, "max_concurrency must be > 0"),
+		check.GreaterThanOrEqualTo(
+			s.MultipartChunkSize, minS3MultipartChunkSize,
+			"multipart_chunk_size must be >= 5MB",
+		),
+	}
+}
 
 // GCSConfig configures storing checkpoints on GCS.
 type GCSConfig struct {
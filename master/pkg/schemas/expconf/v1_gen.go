@@ -976,6 +976,13 @@ var (
         "bucket": {
             "type": "string"
         },
+        "content_addressed": {
+            "type": [
+                "boolean",
+                "null"
+            ],
+            "default": false
+        },
         "save_experiment_best": {
             "type": [
                 "integer",
@@ -1411,6 +1418,21 @@ var (
                 }
             }
         },
+        "prefetch_batches": {
+            "type": [
+                "integer",
+                "null"
+            ],
+            "minimum": 0,
+            "default": 0
+        },
+        "sharded_checkpoints": {
+            "type": [
+                "boolean",
+                "null"
+            ],
+            "default": false
+        },
         "tensor_fusion_cycle_time": {
             "type": [
                 "integer",
@@ -1532,6 +1554,29 @@ var (
             ],
             "default": null
         },
+        "max_concurrency": {
+            "type": [
+                "integer",
+                "null"
+            ],
+            "default": null,
+            "minimum": 1
+        },
+        "multipart_chunk_size": {
+            "type": [
+                "integer",
+                "null"
+            ],
+            "default": null,
+            "minimum": 5242880
+        },
+        "content_addressed": {
+            "type": [
+                "boolean",
+                "null"
+            ],
+            "default": false
+        },
         "save_experiment_best": {
             "type": [
                 "integer",
@@ -2313,6 +2358,13 @@ var (
             ],
             "default": null
         },
+        "content_addressed": {
+            "type": [
+                "boolean",
+                "null"
+            ],
+            "default": false
+        },
         "save_experiment_best": {
             "type": [
                 "integer",